@@ -0,0 +1,305 @@
+"""
+Offline bot benchmarks against the mock APIs (benchmarks/mock_server.py) and fake signer.
+
+Scenarios:
+    market_bot   Listing-to-buy latency: a new listing appears, time until the bot's purchase lands
+    post_lower   Repricing ticks for 1,000 NFTs across 50 templates while competitors undercut
+    pack_opener  Opening 500 packs and returning the minted actives to their senders
+
+Nothing touches the live APIs or mainnet. Runs are repeatable for a given --seed, so
+compare results before and after a change with the same arguments.
+
+With --push-nodes, extra mock servers share the scenario's chain and every transaction
+is broadcast to all of them, reporting which node accepted first.
+
+Usage:
+    python -m benchmarks.bench_bots
+    python -m benchmarks.bench_bots market_bot --latency 0.05 --client-rate 5
+    python -m benchmarks.bench_bots market_bot --push-nodes 3
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import asyncio
+import logging
+import argparse
+import statistics
+import threading
+import contextlib
+
+from benchmarks.mock_server import MockChain, MockServer
+
+SCENARIOS = {}
+
+PACK_REWARDS = {"350147": "350146", "408663": "423567", "896504": "896505"}  # Pack template -> active template
+
+
+def scenario(fn):
+    SCENARIOS[fn.__name__] = fn
+    return fn
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def report(label, unit, sample_name, samples, elapsed, count, requests):
+    """Print one line per scenario: throughput, latency percentiles and load on the mock APIs."""
+
+    print(
+        f"{label:<12} {count / elapsed:8.1f} {unit}/s  "
+        f"{sample_name} n={len(samples):<5} "
+        f"mean={statistics.mean(samples) * 1000:8.1f}ms  "
+        f"p50={percentile(samples, 0.50) * 1000:8.1f}ms  "
+        f"p95={percentile(samples, 0.95) * 1000:8.1f}ms  "
+        f"p99={percentile(samples, 0.99) * 1000:8.1f}ms  "
+        f"requests={requests['requests']} throttled={requests['throttled']} transactions={requests['transactions']}",
+        flush=True
+    )
+
+
+def use_chain(server, chain):
+    """Serve chain from the API server and every extra push node."""
+
+    for node in [server, *push_servers]:
+        node.chain = chain
+
+    return chain
+
+
+def usage(server, before):
+    """Mock API requests and transactions since the before snapshot."""
+
+    after = server.stats()
+    return {key: after[key] - before[key] for key in ("requests", "throttled", "transactions")}
+
+
+# ---------------- Scenarios ----------------------
+
+@scenario
+def market_bot(args, server, rng):
+    """Time from a listing being created to the bot's purchase being applied, one listing at a time."""
+
+    from bots.market_bot import market_bot
+
+    chain = use_chain(server, MockChain.from_fixtures())
+    buyer, seller, template_id, price = "benchbuyer", "benchseller", "783873", 5.0
+    chain.set_balance(buyer, 1_000_000)
+
+    market_bot.account = buyer
+    market_bot.event_source = None
+    market_bot.POLL_INTERVAL_SECONDS = args.poll_interval
+    market_bot.notification = lambda *args: None
+    market_bot.WATCHLIST = [{"template_id": template_id, "max_price": price, "budget": price * args.buys}]
+
+    before = server.stats()
+    bot = threading.Thread(target=market_bot.main, daemon=True)
+    bot.start()
+
+    # Wait for the startup sweep and the first poll so only steady-state latency is measured
+    while server.stats()["routes"].get("atomicmarket/v2/sales", 0) < 2:
+        if not bot.is_alive():
+            raise RuntimeError("market_bot exited during startup")
+        time.sleep(0.01)
+
+    samples = []
+    start = time.perf_counter()
+
+    for _ in range(args.buys):
+        time.sleep(rng.uniform(0, 0.2))  # Land at a random point of the polling cycle
+
+        listed_at = time.monotonic()
+        sale_id = chain.list_for_sale(seller, chain.mint(seller, template_id), price)
+
+        if not chain.wait_for(lambda: chain.sales[sale_id]["state"] == 3, timeout=30):
+            raise RuntimeError(f"Sale {sale_id} was not bought within 30s")
+
+        samples.append(chain.sales[sale_id]["purchased_at"] - listed_at)
+
+    elapsed = time.perf_counter() - start
+    bot.join(timeout=10)  # Exits once the budget is spent
+
+    return "buys", "listing-to-buy", samples, elapsed, len(samples), usage(server, before)
+
+
+@scenario
+def post_lower(args, server, rng):
+    """Duration of scheduler ticks while competitors undercut a share of the templates every tick."""
+
+    from bots.post_lower import post_lower
+    from src.api_session import close_async_session
+
+    chain = use_chain(server, MockChain.from_fixtures())
+    seller, competitor = "benchseller", "benchcompet"
+
+    template_ids = [f"9{i:05d}" for i in range(args.templates)]
+    floors = {}
+    nft_cfgs = []
+
+    for template_id in template_ids:
+        chain.add_template(template_id, f"Bench template {template_id}", "bench", "benchcollect")
+        floors[template_id] = 9.5
+        chain.list_for_sale(competitor, chain.mint(competitor, template_id), floors[template_id])
+
+    for i in range(args.nfts):
+        nft_id = chain.mint(seller, template_ids[i % len(template_ids)])
+        chain.list_for_sale(seller, nft_id, 10.0)
+        nft_cfgs.append({"nft_id": nft_id, "min_price": 1, "wax_increment": 0.01})
+
+    post_lower.remove_sold_nft_from_config = lambda *args: None  # Leave config.yaml alone
+    scheduler = post_lower.PostLowerScheduler(nft_cfgs, tick_seconds=0, api_refresh_seconds=0)
+    undercuts = max(1, len(template_ids) // 10)
+
+    async def run():
+        try:
+            load_start = time.perf_counter()
+            await scheduler.load()
+            load_seconds = time.perf_counter() - load_start
+
+            samples = []
+            for _ in range(args.ticks):
+                for template_id in rng.sample(template_ids, undercuts):
+                    floors[template_id] = round(floors[template_id] - 0.05, 8)
+                    chain.list_for_sale(competitor, chain.mint(competitor, template_id), floors[template_id])
+
+                tick_start = time.perf_counter()
+                await asyncio.gather(*(scheduler.process_template(group) for group in list(scheduler.groups.values())))
+                samples.append(time.perf_counter() - tick_start)
+
+            return load_seconds, samples
+
+        finally:
+            await close_async_session()
+
+    before = server.stats()
+    load_seconds, samples = asyncio.run(run())
+    print(f"post_lower   load of {args.nfts} NFTs took {load_seconds * 1000:.1f}ms", file=sys.__stdout__, flush=True)
+
+    return "NFTs", "tick", samples, sum(samples), args.nfts * len(samples), usage(server, before)
+
+
+@scenario
+def pack_opener(args, server, rng):
+    """Time to open packs and return the actives through the pipeline, with the bot's fixed sleeps skipped."""
+
+    from bots.pack_opener import pack_opener
+    from src.wax_class import WaxAccount
+    from src.wax_tools import get_collection_by_templates
+
+    chain = use_chain(server, MockChain.from_fixtures(pack_rewards=PACK_REWARDS))
+    opener = "benchopener"
+    senders = [f"benchsend{i}" for i in range(args.senders)]
+
+    for i in range(args.packs):
+        chain.mint(opener, rng.choice(list(PACK_REWARDS)), sender=senders[i % len(senders)])
+
+    pack_opener.account = opener
+    pack_opener.account_class = WaxAccount(opener)
+    pack_opener.wait = lambda seconds=0: None  # Benchmark the requests and transactions, not the sleeps
+
+    before = server.stats()
+    start = time.perf_counter()
+
+    packs = get_collection_by_templates(opener, pack_opener.template_ids)
+    pipeline = pack_opener.open_packs(packs)
+
+    elapsed = time.perf_counter() - start
+    print(f"pack_opener  stages: {pipeline.report()}", file=sys.__stdout__, flush=True)
+
+    returned = sum(1 for asset in chain.assets.values() if asset["owner"] in senders and asset["template_id"] in PACK_REWARDS.values())
+    if returned != args.packs:
+        raise RuntimeError(f"Only {returned} of {args.packs} actives were returned")
+
+    return "packs", "transaction", list(transaction_samples), elapsed, len(packs), usage(server, before)
+
+
+# ---------------- Harness ----------------------
+
+transaction_samples = []
+push_servers = []  # Extra push nodes, see --push-nodes
+
+
+def timed_signer(command):
+    """SignerClient recording the latency of every transaction into transaction_samples."""
+
+    from src.signer import SignerClient
+
+    class TimedSignerClient(SignerClient):
+
+        def send_transaction(self, actions, timeout=None):
+            start = time.perf_counter()
+            try:
+                return super().send_transaction(actions, timeout)
+            finally:
+                transaction_samples.append(time.perf_counter() - start)
+
+    return TimedSignerClient(command)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help=f"Any of {', '.join(SCENARIOS)}, all by default")
+    parser.add_argument("--latency", type=float, default=0.02, help="Mock API seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.01, help="Up to this many extra seconds per response")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Mock API requests per second before 429s")
+    parser.add_argument("--client-rate", type=float, default=0, help="API_RATE_LIMIT for the tools, 0 for unlimited")
+    parser.add_argument("--sign-ms", type=float, default=2.0, help="Simulated signing time per transaction")
+    parser.add_argument("--buys", type=int, default=50)
+    parser.add_argument("--poll-interval", type=float, default=0.5, help="market_bot seconds between listing queries")
+    parser.add_argument("--nfts", type=int, default=1000)
+    parser.add_argument("--templates", type=int, default=50)
+    parser.add_argument("--ticks", type=int, default=10)
+    parser.add_argument("--packs", type=int, default=500)
+    parser.add_argument("--senders", type=int, default=50)
+    parser.add_argument("--push-nodes", type=int, default=1, help="Mock nodes every transaction is broadcast to")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    server = MockServer(MockChain(), latency=args.latency, jitter=args.jitter, rate_limit=args.rate_limit, seed=args.seed).start()
+    push_servers.extend(
+        MockServer(server.chain, latency=args.latency, jitter=args.jitter, seed=args.seed + i).start()
+        for i in range(1, args.push_nodes)
+    )
+
+    # Point every API family and the signer at the mock before the tools are imported
+    for variable in ("API_ENDPOINT", "API_ENDPOINTS", "CHAIN_ENDPOINTS", "STATE_ENDPOINTS"):
+        os.environ[variable] = server.url
+    os.environ["API_RATE_LIMIT"] = str(args.client_rate)
+
+    logging.basicConfig(level=logging.WARNING, handlers=[logging.NullHandler()])  # Keep the bots' own logging setup quiet
+
+    from src.signer import set_signer
+
+    push_urls = [node.url for node in [server, *push_servers]]
+    signer = timed_signer([sys.executable, "-m", "benchmarks.fake_signer", *push_urls, "--sign-ms", str(args.sign_ms)])
+    set_signer(signer)
+
+    try:
+        for name in args.scenarios or SCENARIOS:
+            transaction_samples.clear()
+
+            with contextlib.redirect_stdout(io.StringIO()):  # The tools print every transaction
+                results = SCENARIOS[name](args, server, random.Random(args.seed))
+
+            report(name, *results)
+
+        if push_servers:
+            first_accepted = signer.stats()["push"]["first_accepted"]
+            print("push nodes   first accepted: " + ", ".join(f"{url} {first_accepted.get(url, 0)}" for url in push_urls))
+
+    finally:
+        signer.close()
+        for node in [server, *push_servers]:
+            node.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Decode microbenchmark: response.json() with dict lookups, as the tools used to decode, vs the
+typed decoders in src/records.py with every JSON backend installed.
+
+Runs on 100-item pages of assets, sales and transfers in benchmarks/fixtures/*_page.json.
+Record fresh pages from a live AtomicAssets API with --record.
+
+Usage:
+    python -m benchmarks.bench_decode --runs 200
+    python -m benchmarks.bench_decode --record https://wax.api.atomicassets.io/ --owner lean4lan.gm
+"""
+
+import argparse
+import json
+import statistics
+import time
+import tracemalloc
+from urllib.parse import urljoin
+
+import requests
+
+from src import records
+from benchmarks.mock_server import FIXTURES_DIR
+
+PAGES = {
+    "assets": "atomicassets/v1/assets",
+    "sales": "atomicmarket/v2/sales",
+    "transfers": "atomicassets/v1/transfers",
+}
+
+
+# ---------------- Previous decoding ----------------------
+
+def json_assets(content):
+    """iter_assets(records=True) before the records module."""
+
+    return [records.asset_record(nft) for nft in json.loads(content)["data"]]
+
+
+def json_sales(content):
+    """get_template_listings before the records module."""
+
+    return [
+        {
+            "asset_id": sale.get("assets")[0].get("asset_id"),
+            "sale_id": sale.get("sale_id"),
+            "price": float(sale.get("price").get("amount")) / 10**8,
+            "seller": sale.get("seller"),
+            "template_id": (sale.get("assets")[0].get("template") or {}).get("template_id"),
+        }
+        for sale in json.loads(content).get("data") or []
+    ]
+
+
+def json_transfers(content):
+    """build_sender_index before the records module."""
+
+    index = {}
+    for transfer in json.loads(content)["data"]:
+        for asset in transfer["assets"]:
+            index.setdefault(asset["asset_id"], transfer["sender_name"])
+    return index
+
+
+def records_sales(content):
+    return [
+        {"asset_id": sale.assets[0].asset_id, "sale_id": sale.sale_id, "price": sale.price, "seller": sale.seller, "template_id": sale.assets[0].template_id}
+        for sale in records.decode_sales(content)
+    ]
+
+
+def records_transfers(content):
+
+    index = {}
+    for transfer in records.decode_transfers(content):
+        for asset in transfer.assets:
+            index.setdefault(asset.asset_id, transfer.sender_name)
+    return index
+
+
+PREVIOUS = {"assets": json_assets, "sales": json_sales, "transfers": json_transfers}
+DECODERS = {"assets": records.decode_assets, "sales": records_sales, "transfers": records_transfers}
+
+
+# ---------------- Measurement ----------------------
+
+def time_calls(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def peak_allocated(fn):
+    """Peak bytes allocated while decoding once, including the result."""
+
+    tracemalloc.start()
+    try:
+        result = fn()
+        return tracemalloc.get_traced_memory()[1], result
+    finally:
+        tracemalloc.stop()
+
+
+def summarise(label, samples, peak, baseline=None):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    mean = statistics.mean(samples)
+    speedup = f"  {baseline / mean:5.1f}x" if baseline else ""
+    print(
+        f"{label:<22} n={len(samples):<4} "
+        f"mean={mean * 1e6:8.0f}us  "
+        f"p50={statistics.median(samples) * 1e6:8.0f}us  "
+        f"p95={p95 * 1e6:8.0f}us  "
+        f"peak={peak / 1024:7.0f}KiB{speedup}",
+        flush=True
+    )
+    return mean
+
+
+def record(api, owner):
+    """Save one live 100-item page of each kind over the fixtures."""
+
+    params = {
+        "assets": {"owner": owner, "limit": 100, "sort": "asset_id", "order": "desc"},
+        "sales": {"state": "1", "limit": 100, "sort": "created", "order": "desc", "symbol": "WAX"},
+        "transfers": {"account": owner, "limit": 100, "sort": "created", "order": "desc"},
+    }
+
+    for kind, path in PAGES.items():
+        response = requests.get(urljoin(api, path), params=params[kind], timeout=30)
+        response.raise_for_status()
+        with open(f"{FIXTURES_DIR}/{kind}_page.json", "wb") as f:
+            f.write(response.content)
+        print(f"Recorded {kind}: {len(response.json()['data'])} items, {len(response.content) / 1024:.0f} KiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kinds", nargs="*", help=f"Pages to decode, any of {', '.join(PAGES)}, all by default")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--record", metavar="API", help="Record fresh pages from this AtomicAssets API first")
+    parser.add_argument("--owner", default="lean4lan.gm", help="Account whose assets and transfers --record fetches")
+    args = parser.parse_args()
+
+    unknown = set(args.kinds) - set(PAGES)
+    if unknown:
+        parser.error(f"Unknown pages: {', '.join(sorted(unknown))}")
+
+    if args.record:
+        record(args.record, args.owner)
+
+    default_backend = records.BACKEND
+
+    for kind in args.kinds or PAGES:
+        with open(f"{FIXTURES_DIR}/{kind}_page.json", "rb") as f:
+            content = f.read()
+
+        print(f"{kind}: {len(content) / 1024:.0f} KiB page", flush=True)
+
+        previous = PREVIOUS[kind]
+        peak, expected = peak_allocated(lambda: previous(content))
+        baseline = summarise("  response.json()", time_calls(lambda: previous(content), args.runs), peak)
+
+        for backend in records.available_backends():
+            records.use_backend(backend)
+            decode = DECODERS[kind]
+
+            peak, result = peak_allocated(lambda: decode(content))
+            if result != expected:
+                raise AssertionError(f"{backend} decoded the {kind} page differently")
+
+            summarise(f"  records[{backend}]", time_calls(lambda: decode(content), args.runs), peak, baseline)
+
+        records.use_backend(default_backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Latency benchmark: persistent signer.js process vs spawning transfer.js per transaction.
+
+Transactions are signed but not broadcast (WAX_DRY_RUN=1), so this is safe to run against mainnet.
+Requires PRIVATE_KEY in .env to be a key for the given account.
+
+Usage:
+    python -m benchmarks.bench_signer lean4lan.gm --runs 20
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+os.environ["WAX_DRY_RUN"] = "1"
+
+from src.signer import SignerClient, send_via_subprocess
+
+
+def build_actions(account):
+    """A minimal token transfer to self, never broadcast."""
+
+    return [{
+        "account": "eosio.token",
+        "name": "transfer",
+        "authorization": [{"actor": account, "permission": "active"}],
+        "data": {
+            "from": account,
+            "to": account,
+            "quantity": "0.00000001 WAX",
+            "memo": "benchmark",
+        },
+    }]
+
+
+def summarise(label, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    print(
+        f"{label:<12} n={len(samples):<4} "
+        f"mean={statistics.mean(samples) * 1000:8.1f}ms  "
+        f"p50={statistics.median(samples) * 1000:8.1f}ms  "
+        f"p95={p95 * 1000:8.1f}ms",
+        flush=True
+    )
+
+
+def time_calls(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("account", help="Account that PRIVATE_KEY signs for")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    actions = build_actions(args.account)
+
+    subprocess_samples = time_calls(lambda: send_via_subprocess(actions), args.runs)
+
+    signer = SignerClient()
+    signer.ping()  # Warm up: exclude process start and eosjs import from the samples
+    signer_samples = time_calls(lambda: signer.send_transaction(actions), args.runs)
+    stats = signer.stats()
+    signer.close()
+
+    summarise("subprocess", subprocess_samples)
+    summarise("signer", signer_samples)
+    print(f"RPC calls saved by signer caches: {stats['rpc_saved']} over {stats['transactions']} transactions")
+
+
+if __name__ == "__main__":
+    main()
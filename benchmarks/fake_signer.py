@@ -0,0 +1,156 @@
+"""
+Stand-in for src/signer.js speaking the same JSON-lines protocol, for offline benchmarks.
+
+Transactions are not signed: their actions are pushed as is to a mock server's
+/v1/chain/push_transaction (see benchmarks/mock_server.py), so the mock chain applies them.
+Given several mock servers, every transaction is broadcast to all of them at once and the
+first to accept it answers, like signer.js with PUSH_ENDPOINTS.
+
+Usage (normally started by SignerClient):
+    python -m benchmarks.fake_signer http://127.0.0.1:8901/ --sign-ms 2
+    python -m benchmarks.fake_signer http://127.0.0.1:8901/ http://127.0.0.1:8902/
+"""
+
+import sys
+import json
+import time
+import queue
+import hashlib
+import argparse
+import itertools
+import threading
+import urllib.error
+import urllib.request
+
+TX_DUPLICATE_CODE = 3040008
+
+
+def push_transaction(endpoint, transaction):
+
+    request = urllib.request.Request(
+        endpoint + "v1/chain/push_transaction",
+        data=json.dumps(transaction).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.loads(e.read()))
+
+
+def is_duplicate(error):
+    return isinstance(error, dict) and (error.get("error") or {}).get("code") == TX_DUPLICATE_CODE
+
+
+def broadcast(endpoints, transaction, push_stats, stats_lock):
+    """
+    Push to every endpoint at once. Returns (endpoint, result or None for a duplicate) from the
+    first node to accept, raises the first error if every node refused the transaction.
+    """
+
+    outcomes = queue.Queue()
+
+    def push(endpoint):
+        try:
+            outcomes.put((endpoint, push_transaction(endpoint, transaction), None))
+        except RuntimeError as e:
+            kind = "duplicates" if is_duplicate(e.args[0]) else "failures"
+            with stats_lock:
+                push_stats[kind][endpoint] = push_stats[kind].get(endpoint, 0) + 1
+            outcomes.put((endpoint, None, e))
+
+    for endpoint in endpoints:
+        threading.Thread(target=push, args=(endpoint,), daemon=True).start()
+
+    errors = []
+    for _ in endpoints:
+        endpoint, result, error = outcomes.get()
+
+        if error is None or is_duplicate(error.args[0]):
+            with stats_lock:
+                push_stats["first_accepted"][endpoint] = push_stats["first_accepted"].get(endpoint, 0) + 1
+            return endpoint, result
+
+        errors.append(error)
+
+    raise errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("endpoints", nargs="+", help="Mock server base URLs with a trailing slash, pushed to in parallel")
+    parser.add_argument("--sign-ms", type=float, default=0.0, help="Simulated signing time per transaction")
+    args = parser.parse_args()
+
+    push_stats = {"first_accepted": {}, "duplicates": {}, "failures": {}}
+    stats = {"transactions": 0, "rpc_saved": 0, "rpc_calls": {}, "push": push_stats}
+    stats_lock = threading.Lock()
+    write_lock = threading.Lock()
+    nonces = itertools.count()
+
+    def reply(message):
+        with write_lock:
+            sys.stdout.write(json.dumps(message) + "\n")
+            sys.stdout.flush()
+
+    def handle(request):
+        request_id = request.get("id")
+        op = request.get("op", "transact")
+
+        try:
+            if op == "ping":
+                reply({"id": request_id, "result": "pong"})
+
+            elif op == "stats":
+                with stats_lock:
+                    reply({"id": request_id, "result": json.loads(json.dumps(stats))})
+
+            elif op == "transact":
+                time.sleep(args.sign_ms / 1000)
+
+                # Stands in for the hash of the packed transaction, unique per signature
+                payload = json.dumps({"actions": request["actions"], "nonce": next(nonces)}, sort_keys=True)
+                tx_id = hashlib.sha256(payload.encode()).hexdigest()
+                reply({"id": request_id, "signed": {"tx_id": tx_id}})
+
+                endpoint, result = broadcast(args.endpoints, {"transaction_id": tx_id, "actions": request["actions"]}, push_stats, stats_lock)
+                processed = (result or {}).get("processed") or {}
+                receipt = processed.get("receipt") or {}  # Duplicate responses carry no receipt
+
+                with stats_lock:
+                    stats["transactions"] += 1
+
+                reply({"id": request_id, "result": {
+                    "tx_id": tx_id,
+                    "rpc_saved": 0,
+                    "endpoint": endpoint,
+                    "block_num": processed.get("block_num"),
+                    "cpu_usage_us": receipt.get("cpu_usage_us"),
+                    "net_usage_words": receipt.get("net_usage_words"),
+                }})
+
+            else:
+                raise RuntimeError({"message": f"Unknown op: {op}"})
+
+        except RuntimeError as e:
+            reply({"id": request_id, "error": e.args[0]})
+
+        except Exception as e:
+            reply({"id": request_id, "error": {"message": str(e)}})
+
+    # Requests are handled concurrently like signer.js, responses are matched by id
+    threads = []
+    for line in sys.stdin:
+        if line.strip():
+            thread = threading.Thread(target=handle, args=(json.loads(line),))
+            thread.start()
+            threads.append(thread)
+
+    for thread in threads:
+        thread.join()
+
+
+if __name__ == "__main__":
+    main()
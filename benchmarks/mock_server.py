@@ -0,0 +1,687 @@
+"""
+Local stand-in for the AtomicAssets, AtomicMarket, Hyperion and chain RPC routes used by the tools,
+for benchmarking without touching mainnet.
+
+MockChain holds assets, sales, transfers and balances in memory and applies pushed transactions
+to them, so the bots see their own actions reflected in later reads. MockServer serves it over HTTP
+in the response shapes of the live APIs, with configurable latency and rate limiting.
+
+Transactions are pushed by benchmarks/fake_signer.py to /v1/chain/push_transaction as
+{"transaction_id": ..., "actions": [...]}, unsigned. Several servers can share one MockChain
+to stand in for a set of push nodes: a transaction ID seen before is refused as tx_duplicate,
+as a node answers once another one has relayed the transaction to it. Signed pushes from
+src/signer.js ({"packed_trx": ...}) are accepted as opaque transactions, with the same
+duplicate detection but no effect on the state.
+
+Usage:
+    python -m benchmarks.mock_server --port 8901 --latency 0.02 --rate-limit 20
+"""
+
+import json
+import time
+import hashlib
+import random
+import argparse
+import itertools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURES_DIR = "benchmarks/fixtures"
+PRECISION = 10**8
+START_BLOCK = 300_000_000
+DEFAULT_CPU_MAX_US = 10_000_000     # Per account, unless set_resources says otherwise
+DEFAULT_NET_MAX_BYTES = 10_000_000
+USAGE_WINDOW_SECONDS = 24 * 3600
+PACK_OPENER = "battleminers"  # Receives packs and sends back one reward asset per pack
+
+
+class TransactionError(Exception):
+    """Raised for actions the contracts would reject, returned as a chain RPC error."""
+
+    code = 3050003
+    name = "eosio_assert_message_exception"
+
+
+class ResourceExhausted(TransactionError):
+    """Raised when the paying account lacks the CPU for a transaction."""
+
+    code = 3080004
+    name = "tx_cpu_usage_exceeded"
+
+
+class DuplicateTransaction(TransactionError):
+    """Raised for a transaction ID the chain has already seen."""
+
+    code = 3040008
+    name = "tx_duplicate"
+
+
+class MockChain:
+    """
+    In-memory market state.
+
+    Parameters:
+        templates (list): Dicts with "template_id", "name", "schema_name" and "collection_name".
+        pack_rewards (dict): Pack template ID -> template ID minted back to whoever opens it.
+    """
+
+    def __init__(self, templates=(), pack_rewards=None):
+        self.templates = {}
+        self.assets = {}     # asset_id -> {"owner", "template_id"}
+        self.sales = {}      # sale_id -> {"seller", "asset_ids", "price", "state", "created", ...}
+        self.transfers = []  # Oldest first
+        self.balances = {}   # account -> WAX units
+        self.resources = {}  # account -> {"cpu_max", "net_max", "cpu_used", "net_used", "updated"}
+        self.pack_rewards = dict(pack_rewards or {})
+
+        self.head_block = START_BLOCK
+        self.transactions = 0
+        self.transaction_ids = {}  # transaction_id -> block_num
+
+        self._asset_ids = itertools.count(1099500000000)
+        self._sale_ids = itertools.count(140000000)
+        self._transfer_ids = itertools.count(1)
+        self._changed = threading.Condition()
+
+        for template in templates:
+            self.add_template(**template)
+
+
+    @classmethod
+    def from_fixtures(cls, path=f"{FIXTURES_DIR}/templates.json", **kwargs):
+        with open(path, "r") as f:
+            return cls(json.load(f), **kwargs)
+
+
+    "--------------SETUP METHODS--------------"
+
+
+    def add_template(self, template_id, name, schema_name, collection_name):
+        self.templates[str(template_id)] = {
+            "template_id": str(template_id),
+            "name": name,
+            "schema_name": schema_name,
+            "collection_name": collection_name,
+        }
+
+
+    def mint(self, owner, template_id, sender=None):
+        """Create an asset. With a sender, a transfer from it is recorded as well, as for pack rewards."""
+
+        with self._changed:
+            asset_id = str(next(self._asset_ids))
+            self.assets[asset_id] = {"owner": owner, "template_id": str(template_id), "minted": _now_ms()}
+
+            if sender is not None:
+                self._record_transfer(sender, owner, [asset_id], "")
+
+            self._changed.notify_all()
+
+        return asset_id
+
+
+    def list_for_sale(self, seller, asset_id, price):
+        """List an asset as another market participant would. Returns the sale ID."""
+
+        with self._changed:
+            sale_id = self._announce(seller, [str(asset_id)], round(price * PRECISION))
+            self._changed.notify_all()
+
+        return sale_id
+
+
+    def set_balance(self, account, wax):
+        self.balances[account] = round(wax * PRECISION)
+
+
+    def set_resources(self, account, cpu_max_us=DEFAULT_CPU_MAX_US, net_max_bytes=DEFAULT_NET_MAX_BYTES, cpu_used_us=0):
+        """Give an account CPU and NET limits, transactions it can't afford fail with tx_cpu_usage_exceeded."""
+
+        with self._changed:
+            self.resources[account] = {
+                "cpu_max": cpu_max_us, "net_max": net_max_bytes, "cpu_used": cpu_used_us, "net_used": 0, "updated": time.monotonic()
+            }
+
+
+    def _resources(self, account):
+        """An account's limits, with usage decayed linearly over the chain's 24h window."""
+
+        if account not in self.resources:
+            self.set_resources(account)
+
+        resources = self.resources[account]
+        now = time.monotonic()
+        fraction = min(1.0, (now - resources["updated"]) / USAGE_WINDOW_SECONDS)
+        resources["cpu_used"] -= resources["cpu_used"] * fraction
+        resources["net_used"] -= resources["net_used"] * fraction
+        resources["updated"] = now
+
+        return resources
+
+
+    def wait_for(self, predicate, timeout=None):
+        """Block until predicate() is true after some state change, returns its final value."""
+
+        with self._changed:
+            return self._changed.wait_for(predicate, timeout)
+
+
+    "--------------TRANSACTION METHODS--------------"
+
+
+    def push_transaction(self, actions, transaction_id=None):
+        """
+        Apply actions atomically, as a transaction would.
+
+        Parameters:
+            actions (list): Actions to apply.
+            transaction_id (str): ID given by the signer, refused as a duplicate if seen before. Generated when None.
+
+        Returns:
+            dict: Chain RPC style result with transaction_id and processed.receipt.
+        """
+
+        with self._changed:
+            if transaction_id is not None and transaction_id in self.transaction_ids:
+                raise DuplicateTransaction(f"Duplicate transaction {transaction_id}")
+
+            cpu_usage_us = 150 + 100 * len(actions)
+            net_usage_words = 12 + 8 * len(actions)
+
+            payer = actions[0]["authorization"][0]["actor"] if actions and actions[0].get("authorization") else None
+            if payer is not None:
+                resources = self._resources(payer)
+                if resources["cpu_used"] + cpu_usage_us > resources["cpu_max"]:
+                    raise ResourceExhausted(f"billed CPU time ({cpu_usage_us} us) is greater than the maximum billable CPU time for the transaction")
+
+            snapshot = (
+                {asset_id: dict(asset) for asset_id, asset in self.assets.items()},
+                {sale_id: dict(sale) for sale_id, sale in self.sales.items()},
+                len(self.transfers),
+                dict(self.balances),
+            )
+
+            try:
+                for action in actions:
+                    self._apply(action)
+
+            except TransactionError:
+                self.assets, self.sales, transfers, self.balances = snapshot
+                del self.transfers[transfers:]
+                raise
+
+            if payer is not None:
+                resources["cpu_used"] += cpu_usage_us
+                resources["net_used"] += net_usage_words * 8
+
+            self.transactions += 1
+            self.head_block += 1
+            transaction_id = transaction_id or f"{self.transactions:064x}"
+            self.transaction_ids[transaction_id] = self.head_block
+            self._changed.notify_all()
+
+        return {
+            "transaction_id": transaction_id,
+            "processed": {
+                "id": transaction_id,
+                "block_num": self.head_block,
+                "receipt": {
+                    "status": "executed",
+                    "cpu_usage_us": cpu_usage_us,
+                    "net_usage_words": net_usage_words,
+                },
+            },
+        }
+
+
+    def _apply(self, action):
+
+        name = f"{action['account']}:{action['name']}"
+        data = action["data"]
+
+        if name == "atomicassets:transfer":
+            self._transfer(data["from"], data["to"], [str(asset_id) for asset_id in data["asset_ids"]], data.get("memo", ""))
+
+        elif name == "atomicmarket:announcesale":
+            for asset_id in data["asset_ids"]:
+                if self.assets.get(str(asset_id), {}).get("owner") != data["seller"]:
+                    raise TransactionError("assertion failure with message: You are not the owner of at least one of the assets")
+            self._announce(data["seller"], [str(asset_id) for asset_id in data["asset_ids"]], _parse_units(data["listing_price"]))
+
+        elif name == "atomicmarket:cancelsale":
+            sale = self._active_sale(data["sale_id"])
+            sale["state"] = 2
+
+        elif name == "atomicmarket:assertsale":
+            sale = self._active_sale(data["sale_id"])
+            if sale["price"] != _parse_units(data["listing_price_to_assert"]):
+                raise TransactionError("assertion failure with message: The listing price of the sale is not the same as specified")
+
+        elif name == "atomicmarket:purchasesale":
+            sale = self._active_sale(data["sale_id"])
+            buyer = data["buyer"]
+
+            if self.balances.get(buyer, 0) < sale["price"]:
+                raise TransactionError("assertion failure with message: The specified account does not have enough WAX")
+
+            self.balances[buyer] -= sale["price"]
+            self.balances[sale["seller"]] = self.balances.get(sale["seller"], 0) + sale["price"]
+            sale.update(state=3, buyer=buyer, purchased_at=time.monotonic())
+
+            for asset_id in sale["asset_ids"]:
+                self.assets[asset_id]["owner"] = buyer
+            self._record_transfer(sale["seller"], buyer, sale["asset_ids"], "")
+
+        # createoffer and token deposits are implied by the above
+
+
+    def _transfer(self, sender, recipient, asset_ids, memo):
+
+        for asset_id in asset_ids:
+            if self.assets.get(asset_id, {}).get("owner") != sender:
+                raise TransactionError("assertion failure with message: Sender doesn't own at least one of the provided assets")
+
+        for asset_id in asset_ids:
+            self.assets[asset_id]["owner"] = recipient
+            for sale in self.sales.values():  # Moving an asset invalidates its listing
+                if sale["state"] == 1 and asset_id in sale["asset_ids"]:
+                    sale["state"] = 2
+
+        self._record_transfer(sender, recipient, asset_ids, memo)
+
+        if recipient == PACK_OPENER:
+            for asset_id in asset_ids:
+                reward = self.pack_rewards.get(self.assets[asset_id]["template_id"])
+                if reward:
+                    self.assets[asset_id]["owner"] = None  # Burned
+                    reward_id = str(next(self._asset_ids))
+                    self.assets[reward_id] = {"owner": sender, "template_id": reward, "minted": _now_ms()}
+                    self._record_transfer(PACK_OPENER, sender, [reward_id], "")
+
+
+    def _announce(self, seller, asset_ids, price):
+
+        sale_id = str(next(self._sale_ids))
+        self.sales[sale_id] = {
+            "sale_id": sale_id,
+            "seller": seller,
+            "asset_ids": asset_ids,
+            "price": price,
+            "state": 1,
+            "created": _now_ms(),
+        }
+        return sale_id
+
+
+    def _active_sale(self, sale_id):
+
+        sale = self.sales.get(str(sale_id))
+        if sale is None or sale["state"] != 1:
+            raise TransactionError("assertion failure with message: No sale with this sale_id exists")
+        return sale
+
+
+    def _record_transfer(self, sender, recipient, asset_ids, memo):
+        self.transfers.append({
+            "transfer_id": str(next(self._transfer_ids)),
+            "sender": sender,
+            "recipient": recipient,
+            "asset_ids": list(asset_ids),
+            "memo": memo,
+            "created": _now_ms(),
+            "block": self.head_block + 1,  # Recorded while its transaction is applied, before the head moves
+        })
+
+
+    "--------------QUERY METHODS--------------"
+
+
+    def query_assets(self, query):
+
+        ids = _split(query.get("ids"))
+        owners = _split(query.get("owner"))
+        template_ids = _split(query.get("template_id"))
+        schema_names = _split(query.get("schema_name"))
+        upper_bound = int(query["upper_bound"]) if query.get("upper_bound") else None
+        lower_bound = int(query["lower_bound"]) if query.get("lower_bound") else None
+        after = int(query["after"]) if query.get("after") else None  # Minted after, like the real API
+
+        with self._changed:
+            rows = [
+                self._render_asset(asset_id)
+                for asset_id, asset in self.assets.items()
+                if asset["owner"] is not None
+                and (ids is None or asset_id in ids)
+                and (owners is None or asset["owner"] in owners)
+                and (template_ids is None or asset["template_id"] in template_ids)
+                and (schema_names is None or self.templates[asset["template_id"]]["schema_name"] in schema_names)
+                and (upper_bound is None or int(asset_id) < upper_bound)
+                and (lower_bound is None or int(asset_id) >= lower_bound)
+                and (after is None or asset["minted"] > after)
+            ]
+
+        rows.sort(key=lambda row: int(row["asset_id"]), reverse=query.get("order", "desc") == "desc")
+        return _paginate(rows, query)
+
+
+    def query_sales(self, query):
+
+        asset_ids = _split(query.get("asset_id"))
+        template_ids = _split(query.get("template_id"))
+        sellers = _split(query.get("seller"))
+        states = _split(query.get("state"))
+
+        with self._changed:
+            rows = [
+                self._render_sale(sale)
+                for sale in self.sales.values()
+                if (states is None or str(sale["state"]) in states)
+                and (sellers is None or sale["seller"] in sellers)
+                and (asset_ids is None or asset_ids.intersection(sale["asset_ids"]))
+                and (template_ids is None or self.assets[sale["asset_ids"][0]]["template_id"] in template_ids)
+            ]
+
+        if query.get("sort") == "price":
+            key = lambda row: int(row["price"]["amount"])
+        else:
+            key = lambda row: int(row["created_at_time"])
+
+        rows.sort(key=key, reverse=query.get("order", "desc") == "desc")
+        return _paginate(rows, query)
+
+
+    def query_transfers(self, query):
+
+        asset_ids = _split(query.get("asset_id"))
+        recipients = _split(query.get("recipient"))
+        senders = _split(query.get("sender"))
+        accounts = _split(query.get("account"))  # Sender or recipient
+        after = int(query["after"]) if query.get("after") else None
+
+        with self._changed:
+            rows = [
+                self._render_transfer(transfer)
+                for transfer in reversed(self.transfers)
+                if (recipients is None or transfer["recipient"] in recipients)
+                and (senders is None or transfer["sender"] in senders)
+                and (accounts is None or transfer["sender"] in accounts or transfer["recipient"] in accounts)
+                and (asset_ids is None or asset_ids.intersection(transfer["asset_ids"]))
+                and (after is None or transfer["created"] > after)
+            ]
+
+        if query.get("order") == "asc":
+            rows.reverse()
+
+        return _paginate(rows, query)
+
+
+    def get_asset(self, asset_id):
+        with self._changed:
+            asset = self.assets.get(asset_id)
+            return self._render_asset(asset_id) if asset and asset["owner"] is not None else None
+
+
+    def get_account(self, account):
+        units = self.balances.get(account, 0)
+
+        with self._changed:
+            resources = self._resources(account)
+
+        cpu_used, net_used = round(resources["cpu_used"]), round(resources["net_used"])
+
+        return {
+            "account_name": account,
+            "core_liquid_balance": f"{units / PRECISION:.8f} WAX",
+            "cpu_weight": str(10 * PRECISION),
+            "net_weight": str(PRECISION),
+            "cpu_limit": {"used": cpu_used, "available": max(0, resources["cpu_max"] - cpu_used), "max": resources["cpu_max"]},
+            "net_limit": {"used": net_used, "available": max(0, resources["net_max"] - net_used), "max": resources["net_max"]},
+        }
+
+
+    def _render_asset(self, asset_id):
+
+        asset = self.assets[asset_id]
+        template = self.templates[asset["template_id"]]
+
+        return {
+            "asset_id": asset_id,
+            "owner": asset["owner"],
+            "name": template["name"],
+            "collection": {"collection_name": template["collection_name"]},
+            "schema": {"schema_name": template["schema_name"]},
+            "template": {"template_id": template["template_id"], "immutable_data": {"name": template["name"]}},
+            "minted_at_time": str(asset["minted"]),
+        }
+
+
+    def _render_sale(self, sale):
+        return {
+            "sale_id": sale["sale_id"],
+            "seller": sale["seller"],
+            "buyer": sale.get("buyer"),
+            "state": sale["state"],
+            "listing_price": str(sale["price"]),
+            "listing_symbol": "WAX",
+            "price": {"amount": str(sale["price"]), "token_symbol": "WAX", "token_precision": 8},
+            "assets": [self._render_asset(asset_id) for asset_id in sale["asset_ids"]],
+            "created_at_time": str(sale["created"]),
+        }
+
+
+    def _render_transfer(self, transfer):
+        return {
+            "transfer_id": transfer["transfer_id"],
+            "sender_name": transfer["sender"],
+            "recipient_name": transfer["recipient"],
+            "memo": transfer["memo"],
+            "assets": [self._render_asset(asset_id) for asset_id in transfer["asset_ids"]],
+            "created_at_time": str(transfer["created"]),
+            "created_at_block": str(transfer["block"]),
+        }
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _parse_units(quantity):
+    """Convert an asset string like "10.00000000 WAX" to integer units."""
+
+    return round(float(quantity.split(" ")[0]) * PRECISION)
+
+
+def _split(value):
+    return set(value.split(",")) if value else None
+
+
+def _paginate(rows, query):
+    limit = int(query.get("limit", 100))
+    page = int(query.get("page", 1))
+    return rows[(page - 1) * limit:page * limit]
+
+
+class MockServer:
+    """
+    Serves a MockChain over HTTP.
+
+    Parameters:
+        chain (MockChain): State to serve.
+        latency (float): Seconds added to every response.
+        jitter (float): Up to this many extra seconds, drawn from a seeded generator so runs repeat.
+        rate_limit (float): Requests per second before answering 429, None for unlimited.
+        port (int): Port to listen on, 0 picks a free one (see self.url).
+    """
+
+    def __init__(self, chain, latency=0.0, jitter=0.0, rate_limit=None, host="127.0.0.1", port=0, seed=0):
+        self.chain = chain
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+
+        self.requests = 0
+        self.throttled = 0
+        self.routes = {}
+
+        self._random = random.Random(seed)
+        self._tokens = rate_limit or 0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the live APIs
+
+            def do_GET(self):
+                server.handle(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                server.handle(self, self.rfile.read(length) if length else b"")
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/"
+
+
+    def handle(self, handler, body):
+
+        parts = urlsplit(handler.path)
+        path = parts.path.lstrip("/")
+        query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+
+        throttled, delay = self._admit(path)
+        if delay:
+            time.sleep(delay)
+
+        if throttled:
+            status, payload = 429, {"success": False, "message": "Rate limit"}
+        else:
+            try:
+                status, payload = self.route(path, query, body)
+            except TransactionError as e:
+                status, payload = 500, {"code": 500, "message": "Internal Service Error", "error": {"code": e.code, "name": e.name, "what": str(e)}}
+
+        content = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+
+    def _admit(self, path):
+        """Count the request and take a rate limit token. Returns (throttled, delay)."""
+
+        route = "/".join(path.split("/")[:3])
+
+        with self._lock:
+            self.requests += 1
+            self.routes[route] = self.routes.get(route, 0) + 1
+            delay = self.latency + (self._random.random() * self.jitter if self.jitter else 0)
+
+            if not self.rate_limit:
+                return False, delay
+
+            now = time.monotonic()
+            self._tokens = min(max(1, self.rate_limit), self._tokens + (now - self._updated) * self.rate_limit)
+            self._updated = now
+
+            if self._tokens < 1:
+                self.throttled += 1
+                return True, delay
+
+            self._tokens -= 1
+            return False, delay
+
+
+    def route(self, path, query, body):
+        """Returns (status, payload) for a request."""
+
+        chain = self.chain
+
+        if path == "atomicassets/v1/assets":
+            return 200, {"success": True, "data": chain.query_assets(query)}
+
+        if path.startswith("atomicassets/v1/assets/"):
+            asset = chain.get_asset(path.rsplit("/", 1)[-1])
+            return (200, {"success": True, "data": asset}) if asset else (416, {"success": False, "message": "Asset not found"})
+
+        if path == "atomicassets/v1/transfers":
+            return 200, {"success": True, "data": chain.query_transfers(query)}
+
+        if path in ("atomicmarket/v1/sales", "atomicmarket/v2/sales"):
+            return 200, {"success": True, "data": chain.query_sales(query)}
+
+        if path == "health":
+            return 200, {"success": True, "data": {"chain": {"head_block": chain.head_block}, "postgres": {"readers": [{"block_num": str(chain.head_block)}]}}}
+
+        if path == "v2/health":
+            return 200, {"health": [{"service": "Elasticsearch", "service_data": {"last_indexed_block": chain.head_block}}]}
+
+        if path == "v2/history/get_transaction":
+            block_num = chain.transaction_ids.get(query.get("id"))
+            if block_num is None:
+                return 404, {"executed": False, "message": "Transaction not found"}
+            return 200, {"executed": True, "trx_id": query.get("id"), "actions": [{"block_num": block_num}]}
+
+        if path == "v2/state/get_account":
+            return 200, {"account": chain.get_account(query.get("account"))}
+
+        if path == "v1/chain/get_info":
+            return 200, {
+                "chain_id": "1064487b3cd1a897ce03ae5b6a865651747e2e152090f99c1d19d44e01aea5a4",
+                "head_block_num": chain.head_block,
+                "last_irreversible_block_num": chain.head_block - 330,
+                "head_block_time": time.strftime("%Y-%m-%dT%H:%M:%S.000", time.gmtime()),
+            }
+
+        if path == "v1/chain/push_transaction":
+            transaction = json.loads(body)
+
+            if "packed_trx" in transaction:
+                # Signed by src/signer.js, the ID is the hash of the packed transaction
+                transaction_id = hashlib.sha256(bytes.fromhex(transaction["packed_trx"])).hexdigest()
+                return 202, chain.push_transaction([], transaction_id)
+
+            return 202, chain.push_transaction(transaction["actions"], transaction.get("transaction_id"))
+
+        return 404, {"success": False, "message": f"Unknown route {path}"}
+
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "throttled": self.throttled, "transactions": self.chain.transactions, "routes": dict(self.routes)}
+
+
+    def start(self):
+        """Serve from a daemon thread."""
+
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per second before answering 429")
+    args = parser.parse_args()
+
+    server = MockServer(MockChain.from_fixtures(), latency=args.latency, rate_limit=args.rate_limit, port=args.port)
+    print(f"Serving mock APIs at {server.url}", flush=True)
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
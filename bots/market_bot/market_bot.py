@@ -5,10 +5,17 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 import traceback
 import os
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
 
+from src import metrics
+from src.api_session import api_priority, PRIORITY_HIGH, PRIORITY_LOW
 from src.wax_class import WaxNFT, WaxAccount
-from src.wax_tools import get_lowest_listing
+from src.confirmations import INDEXED
+from src.signer import OutcomeUnknownError
+from src.wax_tools import get_lowest_listing, get_recent_listings, PAGE_SIZE
+from src.events import EventBus, SaleAnnounced, make_event_source
 
 logging.basicConfig(
     level=logging.INFO,
@@ -23,17 +30,46 @@ load_dotenv()
 email_sender = os.getenv("EMAIL_SENDER")
 email_recipient = os.getenv("EMAIL_RECIPIENT")
 sender_password = os.getenv("EMAIL_PASSWORD")
+event_source = os.getenv("EVENT_SOURCE")  # e.g. "hyperion:https://<HYPERION_ENDPOINT>/", polls continuously when unset
 
 account = "lean4lan.gm"
-RATE_LIMIT_SECONDS = 0.5
 BALANCE_REFRESH_INTERVAL_SECONDS = 60
+ERROR_BACKOFF_SECONDS = 1  # Avoid retrying a failing buy at the full API rate
+POLL_INTERVAL_SECONDS = 0.5  # Between listing queries, buys go ahead of them in the API rate limiter
+MAX_POLL_PAGES = 10          # Newest-first pages read back per poll while a burst of listings outruns one page
+SALE_GONE_ERROR = "No sale with this sale_id exists"  # Sold or cancelled on chain, not yet indexed by the market API
 
-template_id = "783873"  # NBM Spin and Win
-target_price = 10
+# Each entry buys listings of its template at or below max_price until budget WAX has been spent.
+# Earlier entries take priority when several listings match in the same tick.
+WATCHLIST = [
+    {"template_id": "783873", "max_price": 10, "budget": 100},  # NBM Spin and Win
+]
+SEEN_SALES_LIMIT = 10_000  # Sale IDs bought or rejected for good, so they aren't considered again
+
+# With an event source, query only after a matching listing is announced on chain
+EVENT_HOT_SECONDS = 3        # Keep polling this long after an announcement while the market API indexes it
+EVENT_FALLBACK_SECONDS = 30  # Poll anyway if no announcement arrives, in case the feed misses one
+listing_announced = threading.Event()
+
+
+def start_event_feed():
+    """Wake the buy loop whenever a listing cheap enough for any watchlist entry is announced."""
+
+    max_price = max(entry["max_price"] for entry in WATCHLIST)
+
+    def on_announce(event):
+        if event.listing_price <= max_price:
+            listing_announced.set()
+
+    bus = EventBus()
+    bus.subscribe(SaleAnnounced, on_announce)
+    make_event_source(event_source, actions=("atomicmarket:announcesale",)).start(bus)
 
 
 def main():
 
+    metrics.start_exporter()  # METRICS_EXPORTER, if set
+
     buyer = WaxAccount(account)
     buyer.fetch_details()
     wax_balance = buyer.wax_balance
@@ -43,14 +79,43 @@ def main():
     last_error_logged = False  # Prevent error spam to the log
     low_balance_notified = False
 
+    priorities = {entry["template_id"]: i for i, entry in enumerate(WATCHLIST)}
+    spent = {entry["template_id"]: 0 for entry in WATCHLIST}
+    seen_sales = OrderedDict()
+    pending_buys = []  # Purchases the API may not reflect yet
+    hot_until = 0
+    last_poll = 0
+    newest_sale = None  # Newest sale ID polled so far, later polls page back to it
+
+    if event_source:
+        start_event_feed()
+
+    # The newest-first query only sees new listings, sweep the current floors once at startup
+    listings = [
+        {**listing, "template_id": entry["template_id"]}
+        for entry in WATCHLIST
+        if (listing := get_lowest_listing(entry["template_id"]))
+    ]
+
     while True:
 
+        metrics.bot_iterations.inc(bot="market_bot")
+
+        # A balance read before our last buys are indexed would undo their local deduction
+        pending_buys = [handle for handle in pending_buys if not handle.expired and not handle.confirmed(INDEXED)]
+
         now = time.time()
-        if now - last_balance_update > BALANCE_REFRESH_INTERVAL_SECONDS:
+        if now - last_balance_update > BALANCE_REFRESH_INTERVAL_SECONDS and not pending_buys:
             wax_balance = check_balance(wax_balance, low_balance_notified)
             last_balance_update = time.time()
 
+        open_entries = [entry for entry in WATCHLIST if spent[entry["template_id"]] + entry["max_price"] <= entry["budget"]]
+        if not open_entries:
+            logging.info("All watchlist budgets spent. Stopping.")
+            break
+
         try:
+            target_price = min(entry["max_price"] for entry in open_entries)
             if wax_balance < target_price:
                 if not low_balance_notified:
                     warning_msg = f"Balance {wax_balance:.2f} WAX below target price {target_price:.2f}. Pausing operation."
@@ -68,44 +133,158 @@ def main():
                 last_balance_update = time.time()
                 continue
 
-            listing_details = get_lowest_listing(template_id)
+            # One query per tick covers the whole watchlist. Only the buys themselves run at
+            # PRIORITY_HIGH, polling at normal priority every POLL_INTERVAL_SECONDS
+            if not listings:
+                if event_source and time.time() > hot_until:
+                    idle_start = time.time()
+                    if listing_announced.wait(EVENT_FALLBACK_SECONDS):
+                        hot_until = time.time() + EVENT_HOT_SECONDS
+                    listing_announced.clear()
+                    metrics.bot_sleep.inc(time.time() - idle_start, bot="market_bot")
+
+                delay = last_poll + POLL_INTERVAL_SECONDS - time.time()
+                if delay > 0:
+                    wait(delay)
+                last_poll = time.time()
+
+                listings, newest_sale = poll_listings([entry["template_id"] for entry in open_entries], newest_sale)
+
+            purchases = select_purchases(listings, spent, seen_sales, wax_balance)
+            purchases.sort(key=lambda listing: (priorities[listing["template_id"]], listing["price"]))
+            listings = []
+
+            tick_failed = False
+            for listing_details in purchases:
+                # A failed buy must not drop the remaining matches of this tick
+                try:
+                    wax_balance -= buy_listing(listing_details, spent, pending_buys)
+                    mark_seen(seen_sales, listing_details["sale_id"])
+                    logging.info(f"Remaining balance: {wax_balance:.2f} WAX")
+                except Exception as e:
+                    if SALE_GONE_ERROR in str(e):
+                        mark_seen(seen_sales, listing_details["sale_id"])
+                    # Anything else may be transient, the listing is considered again next tick
+                    last_error_logged = report_error(e, last_error_logged)
+                    tick_failed = True
+
+            if not tick_failed:
+                last_error_logged = False
 
-            if listing_details and listing_details["price"] <= target_price:
-                nft = WaxNFT(
-                    nft_id=listing_details["asset_id"],
-                    price=listing_details["price"],
-                    sale_id=listing_details["sale_id"]
-                )
+        except Exception as e:
+            listings = []
+            last_error_logged = report_error(e, last_error_logged)
 
-                nft.buy(account)
-                logging.info(f"Purchased NFT: {listing_details}")
 
-                wax_balance -= listing_details["price"]
-                logging.info(f"Remaining balance: {wax_balance:.2f} WAX")
+def poll_listings(template_ids, newest_sale):
+    """
+    Listings created since the sale newest_sale, newest first. Pages back until reaching it, so
+    cheap listings in a burst of more than one page are still seen. The first poll reads one page.
 
-            last_error_logged = False
+    Returns:
+        tuple: (listings, newest sale ID polled so far)
+    """
 
-        except Exception as e:
-            error_message = str(e)
+    listings = {}
 
-            if "No sale with this sale_id exists" in error_message:  # Handle API lag
-                pass
+    for page in range(1, MAX_POLL_PAGES + 1):
+        batch = get_recent_listings(template_ids, page=page)
+        for listing in batch:
+            listings.setdefault(listing["sale_id"], listing)  # New listings shift pages, don't buy one twice
 
-            else:
-                if not last_error_logged:
-                    detailed_trace = traceback.format_exc()
-                    logging.error("An error occurred:\n" + detailed_trace)
+        if newest_sale is None or len(batch) < PAGE_SIZE or any(int(listing["sale_id"]) <= newest_sale for listing in batch):
+            break
+    else:
+        logging.warning(f"More than {MAX_POLL_PAGES} pages of new listings since the last poll, older ones skipped")
 
-                    last_error_logged = True
-                    error_warning = f"Market bot encountered an error:\n\n{error_message}"
-                    notification(
-                        error_warning,
-                        email_sender,
-                        email_recipient,
-                        sender_password
-                    )
+    sale_ids = [int(sale_id) for sale_id in listings] + ([newest_sale] if newest_sale is not None else [])
+    return list(listings.values()), max(sale_ids, default=None)
+
+
+def buy_listing(listing_details, spent, pending_buys):
+    """Buy a listing and charge it to its watchlist entry, returns the price paid. The transaction is added to pending_buys."""
+
+    nft = WaxNFT(
+        nft_id=listing_details["asset_id"],
+        price=listing_details["price"],
+        sale_id=listing_details["sale_id"]
+    )
+
+    try:
+        with api_priority(PRIORITY_HIGH):
+            pending_buys.append(nft.buy(account))
+        logging.info(f"Purchased NFT: {listing_details}")
+
+    except OutcomeUnknownError as e:
+        # May have landed: charged like a purchase and never bought again, the balance refresh settles it
+        logging.warning(f"Purchase of {listing_details} unconfirmed: {e}")
+        if e.handle is not None:
+            pending_buys.append(e.handle)
+
+    spent[listing_details["template_id"]] += listing_details["price"]
+    return listing_details["price"]
+
+
+def report_error(e, last_error_logged):
+    """Log and notify about an error once per run of consecutive errors, returns the new last_error_logged."""
+
+    error_message = str(e)
+
+    if SALE_GONE_ERROR in error_message:
+        return last_error_logged
+
+    if not last_error_logged:
+        detailed_trace = traceback.format_exc()
+        logging.error("An error occurred:\n" + detailed_trace)
+
+        error_warning = f"Market bot encountered an error:\n\n{error_message}"
+        notification(
+            error_warning,
+            email_sender,
+            email_recipient,
+            sender_password
+        )
+
+    wait(ERROR_BACKOFF_SECONDS)
+    return True
 
-        wait()
+
+def select_purchases(listings, spent, seen_sales, wax_balance):
+    """
+    Return unseen listings within their entry's max price and remaining budget.
+    Listings over the max price are marked seen, those only short of budget or balance are considered again later.
+    """
+
+    entries = {entry["template_id"]: entry for entry in WATCHLIST}
+    purchases = []
+    committed = {}
+
+    for listing in listings:
+        entry = entries.get(listing["template_id"])
+        if entry is None or listing["sale_id"] in seen_sales:
+            continue
+
+        template_id = listing["template_id"]
+        price = listing["price"]
+        total = spent[template_id] + committed.get(template_id, 0) + price
+
+        if price > entry["max_price"]:
+            mark_seen(seen_sales, listing["sale_id"])
+            continue
+
+        if total <= entry["budget"] and price <= wax_balance:
+            purchases.append(listing)
+            committed[template_id] = committed.get(template_id, 0) + price
+            wax_balance -= price
+
+    return purchases
+
+
+def mark_seen(seen_sales, sale_id):
+
+    seen_sales[sale_id] = True
+    if len(seen_sales) > SEEN_SALES_LIMIT:
+        seen_sales.popitem(last=False)
 
 
 def notification(message, email_sender, email_recipient, sender_password):
@@ -131,7 +310,8 @@ def notification(message, email_sender, email_recipient, sender_password):
 def check_balance(wax_balance, low_balance_notified):
 
     buyer = WaxAccount(account)
-    buyer.fetch_details()
+    with api_priority(PRIORITY_LOW):
+        buyer.fetch_details()
     if buyer.wax_balance != wax_balance:
         wax_balance = buyer.wax_balance
         if not low_balance_notified:
@@ -140,8 +320,8 @@ def check_balance(wax_balance, low_balance_notified):
     return wax_balance
 
 
-def wait(seconds=RATE_LIMIT_SECONDS):
-    time.sleep(seconds)
+def wait(seconds):
+    metrics.sleep(seconds, "market_bot")
 
 
 if __name__ == "__main__":
@@ -1,109 +1,482 @@
+"""
+Open packs as they arrive and return the minted actives to whoever sent each pack.
+
+The work runs as a pipeline of stages, each on its own thread, with bounded queues between them:
+
+    detect -> open -> await mints -> map -> return
+
+New packs are opened in batched transactions while earlier batches are still waiting for
+their mints or being returned. Per-stage throughput and backlog are printed every few seconds.
+"""
+
+import os
 import time
 import sys
+import queue
+import threading
 
-from src.wax_class import WaxNFT, WaxAccount
-from src.wax_tools import get_collection_by_templates, get_collection_by_category, group_transactions
+from src import metrics
+from src.api_session import api_priority, PRIORITY_LOW
+from src.wax_class import WaxNFT, WaxNFTCollection, WaxAccount
+from src.events import EventBus, AssetTransferred, make_event_source
+from src.confirmations import INDEXED
+from src.signer import OutcomeUnknownError
+from src.wax_tools import get_collection_by_templates, group_by_recipient, build_sender_index, pack_transfer_actions
 
 account = "lean4lan.gm"
 template_ids = ["350147", "408663", "896504"]  # Active card Mining pack, Active card War pack, Basic Active Catalyst pack
+pack_opener_account = "battleminers"  # Receives packs and mints the actives back
 rate_limit_seconds = 2
+clock_margin_ms = 60_000  # Allowance for clock skew against the API when filtering by time
 account_class = WaxAccount(account)
+event_source = os.getenv("EVENT_SOURCE")  # e.g. "hyperion:https://<HYPERION_ENDPOINT>/", polls continuously when unset
+event_fallback_seconds = 30  # Poll anyway if no transfer event arrives, in case the feed misses one
+
+open_batch_size = 10       # Packs per opening transaction
+queue_size = 50            # Items each queue holds before the stage feeding it blocks
+mint_poll_seconds = 1      # Between checks for a batch's actives
+mint_timeout_seconds = 60  # Give up waiting for the rest of a batch's actives after this long
+stats_seconds = 10         # Between stage reports
+max_return_attempts = 5    # Failed returns before an active is dropped and logged
+permanent_error = "assertion failure"  # The contract refused the transfer, e.g. an active no longer owned. Retrying as is won't help
+
+stage_items = metrics.registry.counter("wax_pack_opener_stage_items_total", "Items processed per pack_opener stage", ["stage"])
+
 
 def wait(seconds=rate_limit_seconds):
-    time.sleep(seconds)
+    metrics.sleep(seconds, "pack_opener")
 
-iter = 0
-while True:
+# Wake the idle pack check only when something is transferred to the account
+asset_received = threading.Event()
 
-    iter += 1
-    sys.stdout.write(f"\rFetching packs: ({iter})")
-    sys.stdout.flush()
 
-    packs = get_collection_by_templates(account, template_ids)
+def start_event_feed():
+    bus = EventBus()
+    bus.subscribe(AssetTransferred, lambda event: event.recipient == account and asset_received.set())
+    make_event_source(event_source, actions=("atomicassets:transfer",), account=account).start(bus)
 
-    if not packs:
-        wait()
-        continue
-    
-    wait()  # Try to identify all packs in the first pass, may need adjusting
-    packs = get_collection_by_templates(account, template_ids)
 
-    print(f"\n{len(packs)} NFTs found")
+# ---------------- Pipeline ----------------------
 
-    senders = []
-    new_actives = []
+class Batch:
+    """Packs opened in one transaction, followed through the later stages."""
 
-    # Store senders and open packs
-    for pack_id in packs:
-        nft = WaxNFT(pack_id)
-        sender = nft.fetch_previous_owner()
+    def __init__(self, packs, senders, opened_at_ms, handle=None):
+        self.packs = packs
+        self.senders = senders
+        self.opened_at_ms = opened_at_ms
+        self.handle = handle  # The opening transaction
+        self.actives = []
 
-        try:
-            nft.transfer("battleminers", "pack_opening")
-            senders.append(sender)
-        except:
-            print("Transfer unsuccessful.. continuing")
-            pass
-
-        wait()
-
-    print()
-    total_actives = len(senders)
-    attempts = 0
-    max_attempts = 20
-
-    wait_time = 6
-    for i in range(wait_time, 0, -1):
-        sys.stdout.write(f"\rWaiting for actives.. {i - 1}s")
-        sys.stdout.flush()
-        wait(1)
-
-    print()
-    # Iterate through received actives until they all arrive or max attempts reached
-    while attempts < max_attempts:
-        actives = get_collection_by_category(account, "active", display="none")
-        
-        sys.stdout.write(f"\rFetching actives: Attempt {attempts + 1}/{max_attempts} | {len(actives)} / {total_actives}")
-        sys.stdout.flush()
 
-        if len(actives) == total_actives:
-            break
+class Stage:
+    """
+    One pipeline stage: a thread taking items from its input queue and handing them to work.
+    Counts items and busy time for the throughput and backlog report.
+
+    Work that takes extra items from its queue marks them done itself, after handing on its output.
+    """
+
+    def __init__(self, name, work, inbox=None):
+        self.name = name
+        self.work = work
+        self.inbox = inbox
+        self.processed = 0
+        self.busy_seconds = 0
+
+
+    def run(self, stop):
+
+        while not stop.is_set():
+            if self.inbox is None:
+                item = None
+            else:
+                try:
+                    item = self.inbox.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+
+            start = time.monotonic()
+
+            try:
+                count = self.work(item)
+            except Exception as e:
+                print(f"\n{self.name} stage error: {e}", flush=True)
+                count = 0
+            finally:
+                if self.inbox is not None:
+                    self.inbox.task_done()
+
+            self.busy_seconds += time.monotonic() - start
+            self.processed += count or 0
+            stage_items.inc(count or 0, stage=self.name)
+
+
+class PackPipeline:
+    """
+    Detect, open, await mints, map and return, each stage on its own thread.
+
+    Parameters:
+        detect (bool): Poll the account for packs. Off when packs are fed with submit instead.
+    """
+
+    def __init__(self, detect=True):
+        self.open_queue = queue.Queue(maxsize=queue_size)   # Pack IDs
+        self.mint_queue = queue.Queue(maxsize=queue_size)   # Opened batches
+        self.map_queue = queue.Queue(maxsize=queue_size)    # Batches with their actives
+        self.return_queue = queue.Queue(maxsize=queue_size) # Recipient -> actives
+
+        self.stages = [
+            Stage("open", self.open_batch, self.open_queue),
+            Stage("mints", self.await_mints, self.mint_queue),
+            Stage("map", self.map_senders, self.map_queue),
+            Stage("return", self.return_actives, self.return_queue),
+        ]
+        if detect:
+            self.stages.insert(0, Stage("detect", self.detect))
+
+        self.queued = set()            # Packs handed to the open stage, not re-detected while the API still lists them
+        self.claimed = set()           # Actives matched to a batch, until returned or dropped
+        self.unreturned = {}           # Recipient -> actives a failed return left unsent
+        self.return_attempts = {}      # Active -> failed returns so far
+        self.returned = 0
+        self.started_at = None
+        self._stop = threading.Event()
+        self._threads = []
+
+
+    def start(self):
+
+        self.started_at = time.monotonic()
+
+        for stage in self.stages:
+            thread = threading.Thread(target=stage.run, args=(self._stop,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        return self
 
-        attempts += 1
-        wait()
 
-    print()
-    current_progress = 0
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+
+    def submit(self, packs):
+        """Queue packs for opening, blocking while the open stage is backed up."""
+
+        for pack_id in packs:
+            if pack_id not in self.queued:
+                self.queued.add(pack_id)
+                self.open_queue.put(pack_id)
+
+
+    def drain(self):
+        """Block until everything submitted has gone through every stage."""
+
+        # In pipeline order, each stage hands on its output before marking its input done
+        for q in (self.open_queue, self.mint_queue, self.map_queue, self.return_queue):
+            q.join()
+
+
+    "--------------STAGE METHODS--------------"
+
+
+    def detect(self, _):
+        """Wait for something to arrive, then queue any packs not already in the pipeline."""
+
+        if event_source:
+            idle_start = time.time()
+            asset_received.wait(event_fallback_seconds)
+            asset_received.clear()
+            metrics.bot_sleep.inc(time.time() - idle_start, bot="pack_opener")
+        else:
+            wait()
+
+        metrics.bot_iterations.inc(bot="pack_opener")
+
+        # Idle polling is paced by the shared API rate limiter
+        with api_priority(PRIORITY_LOW):
+            packs = get_collection_by_templates(account, template_ids)
+
+        # Opened packs drop out of the listing, forget them once they do
+        self.queued.intersection_update(packs)
+
+        new_packs = [pack_id for pack_id in packs if pack_id not in self.queued]
+        self.submit(new_packs)
+        return len(new_packs)
+
+
+    def open_batch(self, first_pack):
+        """Open up to open_batch_size queued packs in one transaction."""
+
+        packs = [first_pack]
+        while len(packs) < open_batch_size:
+            try:
+                packs.append(self.open_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        try:
+            return self._open(packs)
+        finally:
+            for _ in packs[1:]:
+                self.open_queue.task_done()
+
+
+    def _open(self, packs):
 
-    for active_id in actives:
-        nft = WaxNFT(active_id)
         try:
-            source = nft.fetch_previous_owner()
+            # Resolve every pack's sender from the account's incoming transfers in a few requests
+            pack_senders = build_sender_index(account, asset_ids=packs)
+            senders = [pack_senders.get(pack_id) or WaxNFT(pack_id).fetch_previous_owner() for pack_id in packs]
+
+            opened_at_ms = int(time.time() * 1000)
+            handle = account_class.transfer_nfts_separately(pack_opener_account, packs, "pack_opening")
+        except OutcomeUnknownError as e:
+            # May have landed, sending the packs again would fail: wait for their mints like any opened batch
+            print(f"\nOpening {len(packs)} packs unconfirmed: {e}", flush=True)
+            handle = e.handle
         except Exception as e:
-            print(f"Error fetching previous owner for {active_id}: {e}", flush=True)
-            wait()
-            continue
+            print(f"\nOpening {len(packs)} packs failed: {e}", flush=True)
+            self.queued.difference_update(packs)  # Detected again on the next poll
+            return 0
+
+        self.mint_queue.put(Batch(packs, senders, opened_at_ms, handle))
+        return len(packs)
+
+
+    def await_mints(self, batch):
+        """
+        Collect one active per pack of the batch: minted by the pack opener no earlier than the opening
+        transaction's block, still owned by the account and not claimed by an earlier batch.
+        Batches are handled in the order they were opened, so earlier batches claim the older actives.
+
+        claimed only covers actives still on their way through the pipeline. Returned actives leave the
+        account, so after a restart ownership alone tells which actives are still to be returned.
+        """
 
-        wait(0.1)  # Adjust to avoid rate-limiting for large sets of data
+        deadline = time.monotonic() + mint_timeout_seconds
 
-        # Only match freshly minted actives to senders, otherwise
-        # sending an already existing active to the account would break it
-        if source == "battleminers" and active_id not in new_actives:
-            new_actives.append(active_id)
+        # The actives can't show up before the opening itself, don't poll for them until the API has indexed it
+        if batch.handle is not None:
+            batch.handle.wait(INDEXED, timeout=mint_timeout_seconds)
+        from_block = batch.handle.block_num if batch.handle is not None else None
 
-        current_progress += 1
-        progress_display = f" {current_progress} / {total_actives} "
-        sys.stdout.write(f"\rMapping actives to senders: {progress_display}")
+        while True:
+            # Only freshly minted actives, sending an already existing active to the account would break it.
+            # The time window keeps the paging short, the block bound ties the actives to this opening
+            senders = build_sender_index(
+                account, after=batch.opened_at_ms - clock_margin_ms, sender=pack_opener_account, from_block=from_block
+            )
+            candidates = [asset_id for asset_id in senders if asset_id not in self.claimed]
+            minted = sorted(owned(candidates), key=int)
+
+            if len(minted) >= len(batch.packs) or time.monotonic() >= deadline or self._stop.is_set():
+                break
+
+            time.sleep(mint_poll_seconds)
+
+        batch.actives = minted[:len(batch.packs)]
+        self.claimed.update(batch.actives)
+
+        if len(batch.actives) < len(batch.packs):
+            print(f"\nOnly {len(batch.actives)} / {len(batch.packs)} actives arrived, returning those", flush=True)
+
+        self.map_queue.put(batch)
+        return len(batch.actives)
+
+
+    def map_senders(self, batch):
+        """Pair each active with the sender of a pack from the same batch."""
+
+        senders = batch.senders[:len(batch.actives)]
+        self.return_queue.put(group_by_recipient(batch.actives, senders))
+        return len(batch.actives)
+
+
+    def return_actives(self, transfers):
+        """
+        Return actives to their senders, merging whatever is queued into as few transactions as possible.
+        Every transaction is sent even when an earlier one fails. Actives a failure left unsent are
+        queued again, see _sort_failed.
+        """
+
+        merged = 0
+        while True:
+            try:
+                more = self.return_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            merged += 1
+            for recipient, actives in more.items():
+                transfers.setdefault(recipient, []).extend(actives)
+
+        for recipient, actives in self.unreturned.items():
+            transfers.setdefault(recipient, []).extend(actives)
+        self.unreturned = {}
+
+        sent = set()
+        failures = []  # (recipient -> actives, error) per failed transaction
+
+        try:
+            # One transaction per chunk, a failed chunk doesn't hold back the others
+            for actions in pack_transfer_actions(account, transfers):
+                chunk = {action["data"]["to"]: action["data"]["asset_ids"] for action in actions}
+                try:
+                    account_class.bulk_transfer_nfts(chunk)
+                    sent.update(asset_id for actives in chunk.values() for asset_id in actives)
+                except Exception as e:
+                    failures.append((chunk, e))
+        finally:
+            for _ in range(merged):
+                self.return_queue.task_done()
+
+        unsent = {}
+        for chunk, error in failures:
+            landed, retry = self._sort_failed(chunk, error)
+            sent.update(landed)
+
+            for recipient, actives in retry.items():
+                unsent.setdefault(recipient, []).extend(actives)
+
+        for asset_id in sent:
+            self._forget(asset_id)
+
+        if unsent:
+            try:
+                self.return_queue.put_nowait(unsent)
+            except queue.Full:
+                self.unreturned = unsent  # Merged into the next call, a full queue won't keep it waiting
+            self._stop.wait(rate_limit_seconds)
+
+        self.returned += len(sent)
+        return len(sent)
+
+
+    def _sort_failed(self, chunk, error):
+        """
+        Work out what became of the actives of a failed return transaction.
+
+        The account's current ownership decides after a refused or unconfirmed transaction: actives
+        it no longer owns were either returned after all or can't be sent anymore. Others count an
+        attempt and are retried until max_return_attempts.
+
+        Returns:
+            tuple: (actives the transaction did return, recipient -> actives to retry)
+        """
+
+        actives = [asset_id for chunk_actives in chunk.values() for asset_id in chunk_actives]
+        unknown = isinstance(error, OutcomeUnknownError)
+        still_owned = set(actives)
+
+        if unknown or permanent_error in str(error):
+            if unknown and error.handle is not None:
+                error.handle.wait(INDEXED, timeout=mint_timeout_seconds)
+
+            try:
+                still_owned = set(owned(actives))
+            except Exception as e:
+                print(f"\nChecking ownership of {len(actives)} actives failed, retrying them: {e}", flush=True)
+
+        landed = set()
+        retry = {}
+
+        for recipient, chunk_actives in chunk.items():
+            for asset_id in chunk_actives:
+                if asset_id not in still_owned:
+                    if unknown:
+                        landed.add(asset_id)
+                    else:
+                        print(f"\nActive {asset_id} for {recipient} is no longer owned, dropped: {error}", flush=True)
+                        self._forget(asset_id)
+                    continue
+
+                attempts = self.return_attempts[asset_id] = self.return_attempts.get(asset_id, 0) + 1
+
+                if attempts >= max_return_attempts:
+                    print(f"\nReturning active {asset_id} to {recipient} failed {attempts} times, dropped: {error}", flush=True)
+                    self._forget(asset_id)
+                else:
+                    retry.setdefault(recipient, []).append(asset_id)
+
+        if retry:
+            print(f"\nReturning {sum(map(len, retry.values()))} actives failed, retrying: {error}", flush=True)
+
+        return landed, retry
+
+
+    def _forget(self, asset_id):
+        self.claimed.discard(asset_id)
+        self.return_attempts.pop(asset_id, None)
+
+
+    def stats(self):
+        """
+        Returns:
+            dict: Stage name -> {"processed", "per_second", "backlog", "busy_seconds"}.
+        """
+
+        elapsed = max(time.monotonic() - self.started_at, 1e-9) if self.started_at else None
+
+        return {
+            stage.name: {
+                "processed": stage.processed,
+                "per_second": stage.processed / elapsed if elapsed else 0,
+                "backlog": stage.inbox.qsize() if stage.inbox is not None else 0,
+                "busy_seconds": stage.busy_seconds,
+            }
+            for stage in self.stages
+        }
+
+
+    def report(self):
+        return " | ".join(
+            f"{name} {stats['processed']} ({stats['per_second']:.2f}/s, backlog {stats['backlog']})"
+            for name, stats in self.stats().items()
+        )
+
+
+def owned(asset_ids):
+    """The asset IDs of asset_ids the account currently owns, in the same order."""
+
+    if not asset_ids:
+        return []
+
+    collection = WaxNFTCollection(asset_ids)
+    collection.fetch_assets()
+    return [asset_id for asset_id in asset_ids if collection.nfts[str(asset_id)].owner == account]
+
+
+def open_packs(packs):
+    """Open a known set of packs through the pipeline and return once their actives have been returned."""
+
+    pipeline = PackPipeline(detect=False).start()
+    try:
+        pipeline.submit(packs)
+        pipeline.drain()
+    finally:
+        pipeline.stop()
+
+    return pipeline
+
+
+def main():
+
+    metrics.start_exporter()  # METRICS_EXPORTER, if set
+
+    if event_source:
+        start_event_feed()
+
+    pipeline = PackPipeline().start()
+
+    while True:
+        time.sleep(stats_seconds)
+        sys.stdout.write(f"\r{pipeline.report()}")
         sys.stdout.flush()
 
-    print()
-    # Return NFTs to senders before resetting the loop
-    transactions = group_transactions(new_actives, senders)
-
-    for wallet in transactions:
-        for transaction in transactions[wallet]:
-            account_class.bulk_transfer_nfts(wallet, transaction)
-            wait(0.5)
-    
-    print()
-    iter = 0
\ No newline at end of file
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,18 +1,36 @@
 """
 Manage multiple undercutting bots simultaneously, setup via config.yaml.
 Activity recorded in post_lower.log.
+
+A single asyncio scheduler groups tracked NFTs by template. Each tick fetches every
+template's floor once and decides the price of all our NFTs in that template together,
+so the request budget grows with the number of templates, not NFTs, and NFTs sharing
+a template never undercut each other.
+
+The floors seen every tick are recorded in a price history. Competitor listings far
+below the template's median floor over the last hours are treated as outliers and not
+followed, so one troll listing can't drag our prices down.
 """
 
 import time
 import yaml
-import threading
+import asyncio
 import logging
 
-from src.wax_class import WaxNFT
-from src.wax_tools import get_lowest_listing
+from src import metrics
+from src.api_session import api_priority, configure_rate_limit, enable_cache, close_async_session, PRIORITY_LOW, ATOMIC_PREFIXES
+from src.wax_class import WaxNFT, WaxNFTCollection
+from src.confirmations import INDEXED
+from src.signer import OutcomeUnknownError
+from src.price_history import PriceHistory, DEPTH
+from src.wax_tools import get_template_listings_async
 
 config_path = "./bots/post_lower/config.yaml"
 log_path = "./bots/post_lower/post_lower.log"
+history_path = "./bots/post_lower/price_history.bin"
+
+DEFAULT_TICK_SECONDS = 5
+DEFAULT_OUTLIER_TOLERANCE = 0.3  # Ignore competitors more than 30% below the reference price
 
 # ---------------- Logging Setup ----------------------
 
@@ -33,108 +51,239 @@ def get_logger(template_name: str):
     return logging.LoggerAdapter(logger, {"nft_template": template_name})
 
 
-def thread_excepthook(args):
-    """Catch daemon thread errors"""
-    logging.error(
-        f"Uncaught thread exception: {args.exc_value}",
-        exc_info=(args.exc_type, args.exc_value, args.exc_traceback)
-    )
+# ---------------- Bot Logic --------------------------
 
-threading.excepthook = thread_excepthook
+class TrackedNFT:
+    """Pricing settings and state for one NFT managed by the scheduler."""
+
+    def __init__(self, nft: WaxNFT, min_price: float, wax_increment: float):
+        self.nft = nft
+        self.min_price = min_price
+        self.wax_increment = wax_increment
+        self.listing_account = nft.owner
+        self.listed_price = nft.price
+        self.pending = None  # Last price change, decisions wait until the API has indexed it
+        self.resume_at = 0   # ... or until this time, whichever comes first
+
+
+class TemplateGroup:
+    """All tracked NFTs sharing a template, priced together from one floor lookup."""
+
+    def __init__(self, template_id: str, template_name: str):
+        self.template_id = template_id
+        self.logger = get_logger(template_name)
+        self.tracked = {}  # nft_id -> TrackedNFT
+        self.err_count = 0
+        self.resume_at = 0
+
+
+class PostLowerScheduler:
+
+    def __init__(
+        self,
+        nft_cfgs: list,
+        tick_seconds: float,
+        api_refresh_seconds: int,
+        history: PriceHistory=None,
+        outlier_tolerance: float=DEFAULT_OUTLIER_TOLERANCE
+    ):
+        self.nft_cfgs = nft_cfgs
+        self.tick_seconds = tick_seconds
+        self.api_refresh_seconds = api_refresh_seconds
+        self.history = history
+        self.outlier_tolerance = outlier_tolerance
+        self.groups = {}  # template_id -> TemplateGroup
+        self.references = {}  # template_id -> robust reference price, refreshed every tick
+
+
+    async def load(self):
+        """Load every configured NFT with batched requests and group them by template."""
+
+        collection = WaxNFTCollection(nft_cfg["nft_id"] for nft_cfg in self.nft_cfgs)
+        await asyncio.to_thread(collection.fetch_details)
+
+        for nft_cfg in self.nft_cfgs:
+            nft = collection[nft_cfg["nft_id"]]
+
+            # Burned, transferred away or mistyped: without a template it can't be priced against its own market
+            if nft.template_id is None:
+                get_logger(f"NFT {nft.nft_id}").warning(f"No template found for NFT {nft.nft_id}, not tracking it.")
+                continue
 
+            group = self.groups.get(nft.template_id)
+            if group is None:
+                group = self.groups[nft.template_id] = TemplateGroup(nft.template_id, nft.template_name)
 
-# ---------------- Bot Logic --------------------------
+            group.tracked[nft.nft_id] = TrackedNFT(nft, nft_cfg["min_price"], nft_cfg["wax_increment"])
 
-def initialise_nft(nft_id: str, min_price: float, wax_increment: float, api_refresh_seconds: int) -> WaxNFT:
-    """Initialise NFT object and ensure it is listed at a valid starting price."""
 
-    nft = WaxNFT(nft_id)
-    nft.fetch_details()
-    template_id = nft.template_id
-    logger = get_logger(nft.template_name)
+    async def run(self):
 
-    if nft.sale_id is None:
-        lowest_listing = get_lowest_listing(template_id)
-        start_price = lowest_listing.get("price") - wax_increment
+        await self.load()
 
-        if start_price < min_price:
-            logger.warning(f"Starting price {start_price} below minimum {min_price}, listing witheld.")
-            raise ValueError("Starting price is below minimum price")
+        while self.groups:
+            tick_start = time.monotonic()
+            metrics.bot_iterations.inc(bot="post_lower")
 
-        nft.sell(start_price)
-        logger.info(f"NFT listed for sale at {start_price} WAX")
+            if self.history is not None:
+                # One vectorized pass for every template, no extra API calls
+                try:
+                    self.references = self.history.reference_prices(list(self.groups))
+                except Exception as e:
+                    # Keep the last references rather than stop repricing every template
+                    get_logger("scheduler").error(f"Reference prices not refreshed: {e}")
 
-        time.sleep(api_refresh_seconds)
-        nft.fetch_details()
+            await asyncio.gather(*(self.process_template(group) for group in list(self.groups.values())))
 
-    return nft
+            if self.history is not None:
+                self.history.flush()
 
+            delay = max(0, self.tick_seconds - (time.monotonic() - tick_start))
+            metrics.bot_sleep.inc(delay, bot="post_lower")
+            await asyncio.sleep(delay)
 
-def adjust_price_loop(
-    nft: WaxNFT,
-    min_price: float,
-    wax_increment: float,
-    rate_limit_seconds: int,
-    api_refresh_seconds: int,
-):
-    """Main loop for monitoring and adjusting NFT price with exponential backoff on errors."""
 
-    logger = get_logger(nft.template_name)
-    template_id = nft.template_id
-    err_count = 0  # Track number of consecutive errors
-    listing_account = nft.owner
+    async def process_template(self, group: TemplateGroup):
+        """Refresh one template's floor and reprice all our NFTs in it, with exponential backoff on errors."""
 
-    while True:
+        if time.monotonic() < group.resume_at:
+            return
 
         try:
-            lowest_listing = get_lowest_listing(template_id)
+            await self.reprice(group)
+            group.err_count = 0
 
-            if lowest_listing.get("asset_id") == nft.nft_id:
-                time.sleep(rate_limit_seconds)
-                err_count = 0
-                continue
-            
-            # Check if it has sold
-            nft.fetch_market_details()
+        except Exception as e:
+            group.err_count += 1
+            backoff = (2 ** (group.err_count - 1)) * self.api_refresh_seconds
+            group.logger.error(f"{e}. Retrying in {backoff}s..")
+            group.resume_at = time.monotonic() + backoff
+
+        if not group.tracked:
+            self.groups.pop(group.template_id, None)
+
+
+    async def reprice(self, group: TemplateGroup):
+
+        now = time.monotonic()
+        active = [tracked for tracked in group.tracked.values() if self.settled(tracked, now)]
+        if not active:
+            return
+
+        # Enough listings to see past all of ours and a few outliers to the cheapest genuine competitor
+        listings = await get_template_listings_async(group.template_id, limit=len(group.tracked) + DEPTH)
+
+        if self.history is not None:
+            self.history.record_listings(group.template_id, listings)
+
+        competitor = self.pick_competitor(group, [listing for listing in listings if listing["asset_id"] not in group.tracked])
+        ours = {listing["asset_id"]: listing for listing in listings if listing["asset_id"] in group.tracked}
+
+        for tracked in active:
+            listing = ours.get(tracked.nft.nft_id)
+            if listing:
+                tracked.nft.price = tracked.listed_price = listing["price"]
+                tracked.nft.sale_id = listing["sale_id"]
+
+        # NFTs outside the cheapest listings have been outbid, sold or delisted: refresh them together
+        unknown = [tracked for tracked in active if tracked.nft.nft_id not in ours]
+        if unknown:
+            await asyncio.to_thread(self.refresh, unknown)
+
+        for tracked in active:
+            await self.decide(group, tracked, competitor)
+
+
+    def settled(self, tracked: TrackedNFT, now: float):
+        """Whether the API already shows our last transaction for this NFT, so its listing can be trusted."""
+
+        if tracked.pending is None or now >= tracked.resume_at:
+            return True
+
+        # Non-blocking, the shared confirmation poller keeps it current between ticks
+        return tracked.pending.confirmed(INDEXED)
+
+
+    def pick_competitor(self, group: TemplateGroup, competitors: list):
+        """Cheapest competitor listing that isn't an outlier below the template's reference price."""
+
+        reference = self.references.get(group.template_id)
+        if reference is None or self.outlier_tolerance is None:
+            return competitors[0] if competitors else None
+
+        lowest_sane = reference * (1 - self.outlier_tolerance)
+
+        for listing in competitors:
+            if listing["price"] >= lowest_sane:
+                return listing
+
+            group.logger.info(f"Ignoring outlier listing at {listing['price']} WAX, reference price is {reference} WAX")
+
+        return None
+
+
+    def refresh(self, tracked_nfts: list):
+        """Reload owner and market details for several NFTs in batched requests."""
+
+        collection = WaxNFTCollection.from_nfts(tracked.nft for tracked in tracked_nfts)
+        collection.fetch_assets()
+        collection.fetch_market_details()
+
+
+    async def decide(self, group: TemplateGroup, tracked: TrackedNFT, competitor: dict):
+        """Undercut the cheapest competitor if needed, never our own listings."""
+
+        nft = tracked.nft
+        logger = group.logger
+
+        if nft.owner != tracked.listing_account:
+            logger.info(f"NFT sold to {nft.owner} for {tracked.listed_price} WAX")
+            if self.history is not None:
+                self.history.record_sale(group.template_id, tracked.listed_price)
+            remove_sold_nft_from_config(config_path, nft.nft_id)
+            del group.tracked[nft.nft_id]
+            return
+
+        if competitor is None:
             if nft.sale_id is None:
-                time.sleep(api_refresh_seconds)
-
-            owner = nft.fetch_owner()
-            if owner != listing_account:
-                logger.info(f"NFT sold to {owner} for {nft.price} WAX")
-                remove_sold_nft_from_config(config_path, nft.nft_id)
-                break
-
-            # Undercut by increment
-            new_price = lowest_listing.get("price") - wax_increment
-            if new_price < min_price:
-                logger.info(f"Minimum price reached: {new_price} WAX < {min_price} WAX")
-                break
-
-            nft.update_offer(new_price)
-            logger.info(f"Price updated to {new_price} WAX")
-            time.sleep(api_refresh_seconds)
-            err_count = 0  # Reset error counter on success
-
-        except Exception as e:      
-
-            err_count += 1
-            backoff = (2 ** (err_count - 1)) * api_refresh_seconds
-            logger.error(f"{e}. Retrying in {backoff}s..")
-            time.sleep(backoff)
-            nft.fetch_details()
-
-
-def run_price_bot(
-    nft_id: WaxNFT,
-    min_price: float,
-    wax_increment: float,
-    rate_limit_seconds: int,
-    api_refresh_seconds: int,
-):
-    
-    nft = initialise_nft(nft_id, min_price, wax_increment, api_refresh_seconds)
-    adjust_price_loop(nft, min_price, wax_increment, rate_limit_seconds, api_refresh_seconds)
+                logger.warning(f"No listings to price NFT {nft.nft_id} from, listing witheld.")
+            return
+
+        if nft.sale_id is not None and nft.price < competitor["price"]:
+            return  # Already the floor
+
+        new_price = competitor["price"] - tracked.wax_increment
+        if new_price < tracked.min_price:
+            logger.info(f"Minimum price reached: {new_price} WAX < {tracked.min_price} WAX")
+            del group.tracked[nft.nft_id]
+            return
+
+        try:
+            if nft.sale_id is None:
+                handle = await asyncio.to_thread(nft.sell, new_price)
+                logger.info(f"NFT listed for sale at {new_price} WAX")
+            else:
+                handle = await asyncio.to_thread(nft.update_offer, new_price)
+                logger.info(f"Price updated to {new_price} WAX")
+
+        except OutcomeUnknownError as e:
+            # May have landed: waited for like a sent change instead of sent again next tick
+            logger.warning(f"Price change to {new_price} WAX unconfirmed: {e}")
+            handle = e.handle
+
+        tracked.listed_price = new_price
+        tracked.pending = handle
+        tracked.resume_at = time.monotonic() + self.api_refresh_seconds  # Upper bound if the indexer can't be checked
+
+
+async def run_scheduler(scheduler: PostLowerScheduler):
+
+    # Monitoring is background work, leave headroom for anything latency-critical sharing the process
+    with api_priority(PRIORITY_LOW):
+        try:
+            await scheduler.run()
+        finally:
+            await close_async_session()
 
 
 def run_from_config(config_path):
@@ -144,26 +293,29 @@ def run_from_config(config_path):
         cfg = yaml.safe_load(f)
 
     # Global settings
-    rate_limit_seconds = cfg["rate_limit_seconds"]
     refresh = cfg["api_refresh_seconds"]
-
-    for nft_cfg in cfg.get("nfts", []):
-        t = threading.Thread(
-            target=run_price_bot,
-            args=(
-                nft_cfg["nft_id"],
-                nft_cfg["min_price"],
-                nft_cfg["wax_increment"],
-                rate_limit_seconds,
-                refresh,
-            ),
-            daemon=True
-        )
-        t.start()
-        time.sleep(1)  # Stagger requests
-
-    while True:
-        time.sleep(60)  # We keep the main thread running and use daemons, this allows for easy shutdown via keyboard interrupt
+    tick_seconds = cfg.get("tick_seconds", DEFAULT_TICK_SECONDS)
+
+    if "requests_per_second" in cfg:
+        configure_rate_limit(cfg["requests_per_second"], path_prefix=ATOMIC_PREFIXES)
+
+    # Repeated lookups within a tick share one upstream call
+    enable_cache()
+    metrics.start_exporter()  # METRICS_EXPORTER, if set
+
+    history = None
+    if cfg.get("price_history", history_path) is not None:
+        history = PriceHistory(cfg.get("price_history", history_path))
+        history.compact()  # Drop records past retention before the file grows further
+
+    scheduler = PostLowerScheduler(
+        cfg.get("nfts", []),
+        tick_seconds,
+        refresh,
+        history=history,
+        outlier_tolerance=cfg.get("outlier_tolerance", DEFAULT_OUTLIER_TOLERANCE)
+    )
+    asyncio.run(run_scheduler(scheduler))
 
 
 def remove_sold_nft_from_config(config_path, nft_id):
@@ -177,4 +329,4 @@ def remove_sold_nft_from_config(config_path, nft_id):
 
 
 if __name__ == "__main__":
-    run_from_config(config_path)
\ No newline at end of file
+    run_from_config(config_path)
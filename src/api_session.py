@@ -1,25 +1,686 @@
 import os
+import json
+import time
+import asyncio
+import weakref
+import threading
+import contextvars
+import aiohttp
 import requests
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait, as_completed
+from contextlib import contextmanager
 from dotenv import load_dotenv
-from urllib.parse import urljoin
+from urllib.parse import urljoin, urlsplit
 
 load_dotenv()
 
+from src import metrics
+from src.endpoints import build_pools, family_for, FAMILY_PREFIXES, HEALTH_CHECK_SECONDS
+
 API_ENDPOINT = os.getenv("API_ENDPOINT")
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "50"))  # Open connections per event loop
+API_KEEPALIVE_SECONDS = 30
+API_RATE_LIMIT = float(os.getenv("API_RATE_LIMIT", "0"))  # AtomicAssets/AtomicMarket requests per second for the whole process, 0 for none
 
-session = requests.Session()
-session.headers.update({
+HEADERS = {
     "User-Agent": "Mozilla/5.0"
-})
+}
+
+session = requests.Session()
+session.headers.update(HEADERS)
+
+
+# ---------------- Endpoint routing ----------------------
+
+_pools = build_pools(API_ENDPOINT)
+_health_thread = None
+_health_lock = threading.Lock()
+
+
+def _candidates(path):
+    """
+    Return (url, endpoint) pairs to try for a path, best first.
+    Relative paths are routed to their API family's pool, full URLs are used as is.
+    """
+
+    if path.startswith(("http://", "https://")):
+        endpoint = next((pool.find(path) for pool in _pools.values() if pool.find(path)), None)
+        return [(path, endpoint)]
+
+    _ensure_health_checks()
+
+    pool = _pools[family_for(path)]
+    if not pool.endpoints:
+        raise ValueError(f"No endpoints configured for the {pool.family} API")
+
+    return [(urljoin(endpoint.url, path.lstrip("/")), endpoint) for endpoint in pool.ranked()]
+
+
+def _resolve(path):
+    """Join relative paths with the best endpoint for their API family, full URLs are used as is."""
+
+    return _candidates(path)[0][0]
+
+
+def _ensure_health_checks():
+    """Start refreshing endpoint head blocks in the background, for pools with a choice of endpoints."""
+
+    global _health_thread
+
+    with _health_lock:
+        if _health_thread is not None:
+            return
+
+        pools = [pool for pool in _pools.values() if len(pool.endpoints) > 1]
+        if not pools:
+            _health_thread = False
+            return
+
+        def check_forever():
+            while True:
+                for pool in pools:
+                    pool.check_health(lambda url: session.get(url, timeout=5))
+                time.sleep(HEALTH_CHECK_SECONDS)
+
+        _health_thread = threading.Thread(target=check_forever, daemon=True)
+        _health_thread.start()
+
+
+def endpoint_stats():
+    """
+    Returns:
+        dict: API family -> list of dicts with each endpoint's "url", "latency" (moving average),
+              "p95", "head_block" and "healthy", in the order requests would try them.
+    """
+
+    stats = {}
+
+    for family, pool in _pools.items():
+        ranked = pool.ranked()
+        stats[family] = [
+            {
+                "url": endpoint.url,
+                "latency": endpoint.latency,
+                "p95": endpoint.p95(),
+                "head_block": endpoint.head_block,
+                "healthy": endpoint in ranked and not endpoint.cooling_down(),
+            }
+            for endpoint in ranked + [endpoint for endpoint in pool.endpoints if endpoint not in ranked]
+        ]
+
+    return stats
+
+
+def _usable(response):
+    """Whether a response came from a working endpoint, server errors and throttling count against it."""
+
+    return response.status_code < 500 and response.status_code != 429
+
+
+# ---------------- Rate limiting ----------------------
+
+PRIORITY_HIGH = 0    # Buy-path lookups
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2     # Background refreshes and idle polling
+
+_priority = contextvars.ContextVar("api_priority", default=PRIORITY_NORMAL)
+
+
+@contextmanager
+def api_priority(priority):
+    """Run the enclosed API calls at the given priority, applies to both threads and asyncio tasks."""
+
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    """Priority of the enclosing api_priority block, PRIORITY_NORMAL outside of one."""
+
+    return _priority.get()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with priority classes.
+
+    A caller only takes a token when no caller of a higher priority is waiting,
+    so high priority requests go first whenever the bucket is contended.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+        self._lock = threading.Lock()
+        self._waiting = [0, 0, 0]
+
+
+    def _try_acquire(self, priority):
+        """Take a token if possible. Returns 0 on success, otherwise the seconds to wait before retrying."""
+
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+            if any(self._waiting[:priority]):
+                return 1 / self.rate
+
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+
+            return (1 - self.tokens) / self.rate
+
+
+    def _set_waiting(self, priority, delta):
+        with self._lock:
+            self._waiting[priority] += delta
+
+
+    def acquire(self, priority=PRIORITY_NORMAL):
+        """Block until a token is available."""
+
+        self._set_waiting(priority, 1)
+        try:
+            while (delay := self._try_acquire(priority)) > 0:
+                time.sleep(delay)
+        finally:
+            self._set_waiting(priority, -1)
+
+
+    async def acquire_async(self, priority=PRIORITY_NORMAL):
+        """Wait until a token is available without blocking the event loop."""
+
+        self._set_waiting(priority, 1)
+        try:
+            while (delay := self._try_acquire(priority)) > 0:
+                await asyncio.sleep(delay)
+        finally:
+            self._set_waiting(priority, -1)
+
+
+_rate_limits = []  # (host, path_prefixes, TokenBucket)
+_rate_limits_lock = threading.Lock()
+
+# The AtomicAssets family, chain and Hyperion reads (confirmations, events, resources) have their own budgets
+ATOMIC_PREFIXES = tuple(prefix for prefix, family in FAMILY_PREFIXES if family == "atomic")
+
+
+def configure_rate_limit(rate, burst=None, host=None, path_prefix=None):
+    """
+    Add or replace a rate limit rule. Requests take a token from every rule they match.
+
+    Parameters:
+        rate (float): Requests per second.
+        burst (float): Bucket size, defaults to one second of requests.
+        host (str): Only apply to this host, e.g. "wax.api.atomicassets.io". None matches all hosts.
+        path_prefix (str | tuple): Only apply to paths starting with this, e.g. "atomicmarket/", or with any
+            of several prefixes sharing one bucket, e.g. ATOMIC_PREFIXES. None matches all paths.
+    """
+
+    if path_prefix is not None:
+        path_prefix = tuple(prefix.lstrip("/") for prefix in ((path_prefix,) if isinstance(path_prefix, str) else path_prefix))
+
+    with _rate_limits_lock:
+        _rate_limits[:] = [rule for rule in _rate_limits if rule[:2] != (host, path_prefix)]
+        _rate_limits.append((host, path_prefix, TokenBucket(rate, burst)))
+
+
+def _matching_buckets(url):
+    parts = urlsplit(url)
+    path = parts.path.lstrip("/")
+
+    with _rate_limits_lock:
+        return [
+            bucket for host, path_prefix, bucket in _rate_limits
+            if (host is None or host == parts.netloc) and (path_prefix is None or path.startswith(path_prefix))
+        ]
+
+
+if API_RATE_LIMIT > 0:
+    configure_rate_limit(API_RATE_LIMIT, path_prefix=ATOMIC_PREFIXES)
+
+
+# ---------------- Response cache ----------------------
+
+DEFAULT_CACHE_TTLS = {
+    "atomicmarket/v2/sales": 1,       # get_lowest_listing
+    "atomicassets/v1/assets/": 2,     # Single asset lookups
+}
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache of successful GET responses with per-route TTLs.
+    Identical requests made while one is already in flight wait for and share its response.
+    """
+
+    def __init__(self, ttls=None, max_entries=1024):
+        self.ttls = dict(DEFAULT_CACHE_TTLS if ttls is None else ttls)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._in_flight = {}
+        self._in_flight_async = weakref.WeakKeyDictionary()  # event loop -> {key: asyncio.Future}
+        self._lock = threading.Lock()
+
+
+    def ttl_for(self, url):
+        """TTL of the longest route prefix matching the URL's path, None if the route isn't cached."""
+
+        path = urlsplit(url).path.lstrip("/")
+        matches = [prefix for prefix in self.ttls if path.startswith(prefix)]
+        return self.ttls[max(matches, key=len)] if matches else None
+
+
+    def _lookup(self, key, in_flight):
+        """Return (cached response, in-flight future, is_leader). Caller must hold self._lock."""
+
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], None, False
+
+        future = in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return None, future, False
+
+        self.misses += 1
+        return None, None, True
+
+
+    def _store(self, key, ttl, response):
+
+        if response.status_code != 200:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, response)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+    def get_or_fetch(self, key, ttl, fetch):
+        """Return a cached or in-flight response for key, otherwise call fetch() and share its result."""
+
+        with self._lock:
+            cached, future, leader = self._lookup(key, self._in_flight)
+            if leader:
+                future = self._in_flight[key] = Future()
+
+        if cached is not None:
+            return cached
+
+        if not leader:
+            return future.result()
+
+        try:
+            response = fetch()
+            self._store(key, ttl, response)
+            future.set_result(response)
+            return response
+
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+
+
+    async def get_or_fetch_async(self, key, ttl, fetch):
+        """Async version of get_or_fetch, fetch is a coroutine function."""
+
+        loop = asyncio.get_running_loop()
+
+        with self._lock:
+            in_flight = self._in_flight_async.setdefault(loop, {})
+            cached, future, leader = self._lookup(key, in_flight)
+            if leader:
+                future = in_flight[key] = loop.create_future()
 
-def api_get(path, params=None):
+        if cached is not None:
+            return cached
+
+        if not leader:
+            return await asyncio.shield(future)
+
+        try:
+            response = await fetch()
+            self._store(key, ttl, response)
+            future.set_result(response)
+            return response
+
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved so an unawaited failure isn't logged
+            raise
+
+        finally:
+            with self._lock:
+                in_flight.pop(key, None)
+
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "entries": len(self._entries),
+            }
+
+
+_cache = None
+
+
+def enable_cache(ttls=None, max_entries=1024):
+    """
+    Opt in to caching GET responses for hot read routes.
+
+    Parameters:
+        ttls (dict): Route path prefix -> TTL in seconds, defaults to DEFAULT_CACHE_TTLS.
+        max_entries (int): Least recently used responses are evicted beyond this.
+    """
+
+    global _cache
+    _cache = ResponseCache(ttls, max_entries)
+
+
+def disable_cache():
+    global _cache
+    _cache = None
+
+
+def cache_stats():
+    """
+    Returns:
+        dict: Cache "hits", "misses", "coalesced" (requests that shared an in-flight call) and "entries".
+              Empty if caching is disabled.
+    """
+
+    return _cache.stats() if _cache is not None else {}
+
+
+def _cache_key(url, params):
+    return url, tuple(sorted((key, str(value)) for key, value in (params or {}).items()))
+
+
+def api_get(path, params=None, priority=None, hedge=False):
     """
     Makes a GET request using the shared session.
     If a full URL is provided, it is used as is.
-    Otherwise, it's joined with the BASE_URL.
+    Otherwise, it's routed to the fastest healthy endpoint of its API family,
+    retrying once on the next endpoint if the connection fails.
+    Waits for the process-wide rate limiter first, priority defaults to the api_priority context.
+    Served from the response cache when enabled and the route has a TTL.
+
+    Parameters:
+        hedge (bool): For latency-critical reads, send a second request to the next endpoint
+                      if the first hasn't answered within the best endpoint's p95 latency.
     """
 
-    if not path.startswith(("http://", "https://")):
-        path = urljoin(API_ENDPOINT, path)
+    priority = _priority.get() if priority is None else priority
+
+    cache = _cache
+    ttl = cache.ttl_for(path) if cache is not None else None
+
+    if ttl:
+        return cache.get_or_fetch(_cache_key(path, params), ttl, lambda: _fetch_routed(path, params, priority, hedge))
+
+    return _fetch_routed(path, params, priority, hedge)
+
+
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="api-hedge")
+
+
+def _fetch_routed(path, params, priority, hedge):
+
+    candidates = _candidates(path)
+
+    if hedge and len(candidates) > 1:
+        return _fetch_hedged(candidates[:2], params, priority)
+
+    for i, (url, endpoint) in enumerate(candidates[:2]):
+        try:
+            return _fetch(url, params, priority, endpoint)
+        except requests.ConnectionError:
+            if i == len(candidates[:2]) - 1:
+                raise
+            metrics.api_retries.inc(route=metrics.route_of(url), reason="failover")
+
+
+def _fetch_hedged(candidates, params, priority):
+    """Request the primary endpoint, then the backup too if the primary is slower than its p95 or fails."""
+
+    (primary_url, primary), (backup_url, backup) = candidates
+
+    futures = [_hedge_executor.submit(_fetch, primary_url, params, priority, primary)]
+    done, _ = wait(futures, timeout=primary.p95())
+
+    if not done or futures[0].exception() is not None or not _usable(futures[0].result()):
+        futures.append(_hedge_executor.submit(_fetch, backup_url, params, priority, backup))
+        metrics.api_retries.inc(route=metrics.route_of(backup_url), reason="hedge")
+
+    response = error = None
+
+    for future in as_completed(futures):
+        try:
+            response = future.result()
+        except requests.RequestException as e:
+            error = e
+            continue
+
+        if _usable(response):
+            return response
+
+    if response is None:
+        raise error
+
+    return response
+
+
+def _fetch(url, params, priority, endpoint=None):
+
+    route = metrics.route_of(url)
+    queued = time.monotonic()
+
+    for bucket in _matching_buckets(url):
+        bucket.acquire(priority)
+
+    start = time.monotonic()
+    metrics.api_rate_limit_wait.inc(start - queued, route=route)
+
+    try:
+        response = session.get(url, params=params)
+    except requests.RequestException:
+        _record(route, endpoint, time.monotonic() - start)
+        raise
+
+    _record(route, endpoint, time.monotonic() - start, response)
+    return response
+
+
+def _record(route, endpoint, seconds, response=None):
+    """Update metrics and endpoint statistics for one request, response is None if the connection failed."""
+
+    metrics.api_request_seconds.observe(seconds, route=route)
+
+    if response is None:
+        metrics.api_requests.inc(route=route, status="error")
+    else:
+        metrics.api_requests.inc(route=route, status=str(response.status_code))
+        metrics.api_bytes.inc(len(response.content), route=route)
+
+    if endpoint is not None:
+        endpoint.record(seconds, ok=response is not None and _usable(response))
+
+
+# ---------------- Asyncio client ----------------------
+
+class AsyncResponse:
+    """The subset of requests.Response used by the tools, returned by api_get_async."""
+
+    __slots__ = ("url", "status_code", "content")
+
+    def __init__(self, url, status_code, content):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+_async_sessions = weakref.WeakKeyDictionary()  # One pooled session per event loop
+
+
+def configure_async(max_concurrency=None):
+    """
+    Set the connection cap for async sessions created after this call.
+
+    Parameters:
+        max_concurrency (int): Maximum open connections per event loop, further requests queue for a free one.
+    """
+
+    global API_MAX_CONCURRENCY
+
+    if max_concurrency is not None:
+        API_MAX_CONCURRENCY = max_concurrency
+
+
+def _get_async_session():
+    """Return the keep-alive session for the running event loop, creating it on first use."""
+
+    loop = asyncio.get_running_loop()
+    async_session = _async_sessions.get(loop)
+
+    if async_session is None or async_session.closed:
+        connector = aiohttp.TCPConnector(limit=API_MAX_CONCURRENCY, keepalive_timeout=API_KEEPALIVE_SECONDS)
+        async_session = aiohttp.ClientSession(connector=connector, headers=HEADERS)
+        _async_sessions[loop] = async_session
+
+    return async_session
+
+
+async def close_async_session():
+    """Close the running loop's session, call before the event loop shuts down."""
+
+    async_session = _async_sessions.pop(asyncio.get_running_loop(), None)
+    if async_session is not None:
+        await async_session.close()
+
+
+async def api_get_async(path, params=None, priority=None, hedge=False):
+    """
+    Async version of api_get sharing a pooled keep-alive connector per event loop.
+
+    Returns:
+        AsyncResponse: Exposes status_code, content and json() like requests.Response.
+    """
+
+    priority = _priority.get() if priority is None else priority
+
+    cache = _cache
+    ttl = cache.ttl_for(path) if cache is not None else None
+
+    if ttl:
+        return await cache.get_or_fetch_async(_cache_key(path, params), ttl, lambda: _fetch_routed_async(path, params, priority, hedge))
+
+    return await _fetch_routed_async(path, params, priority, hedge)
+
+
+async def _fetch_routed_async(path, params, priority, hedge):
+
+    candidates = _candidates(path)
+
+    if hedge and len(candidates) > 1:
+        return await _fetch_hedged_async(candidates[:2], params, priority)
+
+    for i, (url, endpoint) in enumerate(candidates[:2]):
+        try:
+            return await _fetch_async(url, params, priority, endpoint)
+        except aiohttp.ClientConnectionError:
+            if i == len(candidates[:2]) - 1:
+                raise
+            metrics.api_retries.inc(route=metrics.route_of(url), reason="failover")
+
+
+async def _fetch_hedged_async(candidates, params, priority):
+    """Async version of _fetch_hedged, the slower request is cancelled once one succeeds."""
+
+    (primary_url, primary), (backup_url, backup) = candidates
+
+    tasks = [asyncio.ensure_future(_fetch_async(primary_url, params, priority, primary))]
+    done, _ = await asyncio.wait(tasks, timeout=primary.p95())
+
+    if not done or tasks[0].exception() is not None or not _usable(tasks[0].result()):
+        tasks.append(asyncio.ensure_future(_fetch_async(backup_url, params, priority, backup)))
+        metrics.api_retries.inc(route=metrics.route_of(backup_url), reason="hedge")
+
+    response = error = None
+
+    try:
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                    continue
+
+                response = task.result()
+                if _usable(response):
+                    return response
+
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    if response is None:
+        raise error
+
+    return response
+
+
+async def _fetch_async(url, params, priority, endpoint=None):
+
+    route = metrics.route_of(url)
+    queued = time.monotonic()
+
+    for bucket in _matching_buckets(url):
+        await bucket.acquire_async(priority)
+
+    if params:
+        params = {key: str(value) for key, value in params.items() if value is not None}
+
+    start = time.monotonic()
+    metrics.api_rate_limit_wait.inc(start - queued, route=route)
+
+    try:
+        async with _get_async_session().get(url, params=params) as response:
+            result = AsyncResponse(str(response.url), response.status, await response.read())
+
+    except aiohttp.ClientError:
+        _record(route, endpoint, time.monotonic() - start)
+        raise
 
-    return session.get(path, params=params)
\ No newline at end of file
+    _record(route, endpoint, time.monotonic() - start, result)
+    return result
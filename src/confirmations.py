@@ -0,0 +1,303 @@
+"""
+Tracks sent transactions until they are confirmed, instead of sleeping a guessed delay.
+
+_send_transaction returns a TransactionHandle: the transaction ID (it is a str) that can
+also be waited on until the transaction reaches a confirmation level:
+
+    handle = nft.update_offer(12.5)
+    handle.wait(INDEXED, timeout=40)          # Blocks until the AtomicAssets API shows the change
+    handle.wait(IRREVERSIBLE)                 # Final, no fork can undo it
+    await handle.wait_async(INCLUDED)         # From a coroutine
+    handle.confirmed(IRREVERSIBLE)            # Non-blocking check, the poller keeps it current
+
+Levels:
+    included     - in a block the chain's head has reached. Not fork-safe: the block is the one the
+                   accepting node executed the transaction in, a microfork can still drop it
+    irreversible - in a block at or below the last irreversible block
+    indexed      - the AtomicAssets indexer has processed the block
+
+One shared poller thread serves every pending handle. Each round is one get_info request
+and one AtomicAssets health request, however many transactions are pending, and rounds
+back off while nothing changes.
+"""
+
+import time
+import asyncio
+import logging
+import threading
+
+from src import metrics
+from src.api_session import api_get
+from src.endpoints import atomic_head
+
+logger = logging.getLogger(__name__)
+
+INCLUDED = "included"  # Head past the push block_num, wait for IRREVERSIBLE when a fork must not undo it
+IRREVERSIBLE = "irreversible"
+INDEXED = "indexed"
+LEVELS = (INCLUDED, IRREVERSIBLE, INDEXED)
+
+MIN_POLL_SECONDS = 0.5     # One block
+MAX_POLL_SECONDS = 5       # Backoff ceiling while nothing changes
+GIVE_UP_SECONDS = 600      # Stop tracking a transaction after this long, waiters return False
+MAX_LOOKUPS_PER_ROUND = 10 # Block number lookups for handles the signer gave none
+
+confirmation_seconds = metrics.registry.histogram(
+    "wax_confirmation_seconds", "Time from sending a transaction until it reached a confirmation level", ["level"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 180, 300, 600)
+)
+
+
+class TransactionHandle(str):
+    """
+    A sent transaction's ID, which can be waited on until the transaction is included, irreversible or indexed.
+
+    Parameters:
+        tx_id (str): The transaction ID.
+        block_num (int): Block the transaction was executed in, as reported by the node that accepted it. Looked up when None.
+        tracker (ConfirmationTracker): Poller to register with, the shared one by default.
+    """
+
+    def __new__(cls, tx_id, block_num=None, tracker=None):
+        return super().__new__(cls, tx_id)
+
+
+    def __init__(self, tx_id, block_num=None, tracker=None):
+        self.tx_id = str(tx_id)
+        self.block_num = block_num
+        self.sent_at = time.monotonic()
+        self.reached = set()
+        self.wanted = set()  # Levels someone has asked about, only these are polled for
+        self.expired = False
+
+        self._tracker = tracker
+        self._events = {level: threading.Event() for level in LEVELS}
+        self._callbacks = {level: [] for level in LEVELS}
+        self._lock = threading.Lock()
+
+
+    def confirmed(self, level=INCLUDED):
+        """Whether the transaction has reached level, without blocking. Starts tracking it if needed."""
+
+        if level not in LEVELS:
+            raise ValueError(f"Unknown confirmation level {level}, expected one of {LEVELS}")
+
+        if level not in self.reached:
+            self._watch(level)
+
+        return level in self.reached
+
+
+    def wait(self, level=INCLUDED, timeout=None):
+        """
+        Block until the transaction reaches level.
+
+        Returns:
+            bool: False on timeout, or if the transaction stopped being tracked before reaching level.
+        """
+
+        if not self.confirmed(level):
+            self._events[level].wait(timeout)
+
+        return level in self.reached
+
+
+    async def wait_async(self, level=INCLUDED, timeout=None):
+        """Same as wait, without blocking the event loop."""
+
+        if self.confirmed(level):
+            return True
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        self._add_callback(level, wake)
+
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        return level in self.reached
+
+
+    def _watch(self, level):
+
+        with self._lock:
+            self.wanted.add(level)
+
+        (self._tracker or get_tracker()).watch(self)
+
+
+    def _add_callback(self, level, callback):
+
+        with self._lock:
+            if not self._events[level].is_set():
+                self._callbacks[level].append(callback)
+                return
+
+        callback()
+
+
+    def _set(self, level, reached=True):
+        """Record the outcome for level and wake its waiters."""
+
+        with self._lock:
+            if self._events[level].is_set():
+                return
+
+            if reached:
+                self.reached.add(level)
+                confirmation_seconds.observe(time.monotonic() - self.sent_at, level=level)
+
+            self._events[level].set()
+            callbacks, self._callbacks[level] = self._callbacks[level], []
+
+        for callback in callbacks:
+            callback()
+
+
+    def _unsettled(self):
+        """Wanted levels still waiting for an outcome."""
+
+        with self._lock:
+            return {level for level in self.wanted if not self._events[level].is_set()}
+
+
+class ConfirmationTracker:
+    """
+    Background poller advancing every watched TransactionHandle from shared head block reads.
+
+    Parameters:
+        min_interval (float): Seconds between rounds while transactions are progressing.
+        max_interval (float): Longest backoff between rounds while nothing changes.
+        give_up (float): Seconds after sending to stop tracking an unconfirmed transaction.
+    """
+
+    def __init__(self, min_interval=MIN_POLL_SECONDS, max_interval=MAX_POLL_SECONDS, give_up=GIVE_UP_SECONDS):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.give_up = give_up
+        self.rounds = 0
+
+        self._pending = {}  # tx_id -> TransactionHandle
+        self._changed = threading.Condition()
+        self._thread = None
+
+
+    def watch(self, handle):
+        """Track handle until every wanted level is settled. Cheap to call again."""
+
+        with self._changed:
+            if handle.tx_id in self._pending or not handle._unsettled():
+                return
+
+            self._pending[handle.tx_id] = handle
+            self._changed.notify_all()  # Poll soon, a fresh transaction is usually included within a block
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="confirmations", daemon=True)
+                self._thread.start()
+
+
+    def pending(self):
+        with self._changed:
+            return len(self._pending)
+
+
+    def _run(self):
+
+        interval = self.min_interval
+
+        while True:
+            with self._changed:
+                self._changed.wait_for(lambda: self._pending)
+                handles = list(self._pending.values())
+
+            try:
+                progressed = self.poll(handles)
+            except Exception as e:
+                logger.warning(f"Confirmation poll failed: {e}")
+                progressed = False
+
+            interval = self.min_interval if progressed else min(interval * 2, self.max_interval)
+
+            with self._changed:
+                self._pending = {tx_id: handle for tx_id, handle in self._pending.items() if handle._unsettled()}
+                # New handles cut the backoff short
+                if self._pending and set(self._pending) <= {handle.tx_id for handle in handles}:
+                    self._changed.wait(interval)
+
+
+    def poll(self, handles):
+        """
+        One round: look up missing block numbers, read the chain and indexer heads, settle what they cover.
+
+        Returns:
+            bool: Whether any handle reached a new level.
+        """
+
+        self.rounds += 1
+        progressed = False
+
+        for handle in [handle for handle in handles if handle.block_num is None][:MAX_LOOKUPS_PER_ROUND]:
+            handle.block_num = self._lookup_block(handle.tx_id)
+
+        wanted = set().union(*(handle._unsettled() for handle in handles))
+        head = irreversible = indexed = None
+
+        if wanted & {INCLUDED, IRREVERSIBLE}:
+            info = api_get("v1/chain/get_info").json()
+            head, irreversible = info.get("head_block_num"), info.get("last_irreversible_block_num")
+
+        if INDEXED in wanted:
+            indexed = atomic_head(api_get("health").json())
+
+        now = time.monotonic()
+
+        for handle in handles:
+            if handle.block_num is not None:
+                for level, block in ((INCLUDED, head), (IRREVERSIBLE, irreversible), (INDEXED, indexed)):
+                    if block is not None and block >= handle.block_num and level not in handle.reached:
+                        handle._set(level)
+                        progressed = True
+
+            if now - handle.sent_at >= self.give_up:
+                logger.warning(f"Stopped tracking transaction {handle.tx_id}, reached {sorted(handle.reached) or 'nothing'}")
+                handle.expired = True
+                for level in LEVELS:
+                    handle._set(level, reached=False)
+
+        return progressed
+
+
+    def _lookup_block(self, tx_id):
+        """Block number of a transaction from Hyperion's history, None until it is indexed there."""
+
+        try:
+            response = api_get("v2/history/get_transaction", params={"id": tx_id})
+            actions = (response.json().get("actions") or []) if response.status_code == 200 else []
+        except Exception as e:
+            logger.debug(f"Could not look up transaction {tx_id}: {e}")
+            return None
+
+        return actions[0].get("block_num") if actions else None
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker():
+    """Return the process-wide ConfirmationTracker, creating it on first use."""
+
+    global _tracker
+
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = ConfirmationTracker()
+
+    return _tracker
@@ -0,0 +1,173 @@
+"""
+Pools of interchangeable API endpoints per API family, ranked by observed latency and freshness.
+
+    atomic  - AtomicAssets / AtomicMarket API      (API_ENDPOINTS, defaults to API_ENDPOINT)
+    chain   - Chain RPC, v1/chain/*                  (CHAIN_ENDPOINTS)
+    state   - Hyperion, v2/state/* and v2/history/*  (STATE_ENDPOINTS)
+
+Each variable is a comma-separated list of base URLs with trailing slashes.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+
+MAX_LAG_BLOCKS = 20           # Endpoints further behind the freshest one are skipped
+FAILURE_COOLDOWN_SECONDS = 30
+HEALTH_CHECK_SECONDS = 30
+LATENCY_SMOOTHING = 0.2
+
+FAMILY_PREFIXES = (
+    ("atomicassets/", "atomic"),
+    ("atomicmarket/", "atomic"),
+    ("atomictools/", "atomic"),
+    ("v1/chain/", "chain"),
+    ("v2/", "state"),
+)
+
+
+class Endpoint:
+    """Latency and health statistics for one base URL."""
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None  # Exponentially weighted moving average, seconds
+        self.samples = deque(maxlen=100)
+        self.head_block = None
+        self.failed_at = 0
+
+        self._lock = threading.Lock()
+
+
+    def record(self, seconds, ok=True):
+
+        with self._lock:
+            if not ok:
+                self.failed_at = time.monotonic()
+                return
+
+            self.samples.append(seconds)
+            self.latency = seconds if self.latency is None else self.latency + LATENCY_SMOOTHING * (seconds - self.latency)
+
+
+    def p95(self):
+        with self._lock:
+            samples = sorted(self.samples)
+
+        return samples[int(len(samples) * 0.95)] if samples else None
+
+
+    def cooling_down(self):
+        return time.monotonic() - self.failed_at < FAILURE_COOLDOWN_SECONDS
+
+
+class EndpointPool:
+    """Endpoints serving one API family, fastest healthy first."""
+
+    def __init__(self, family, urls, health_path, parse_head):
+        self.family = family
+        self.endpoints = [Endpoint(url if url.endswith("/") else url + "/") for url in urls]
+        self.health_path = health_path
+        self.parse_head = parse_head
+
+
+    def ranked(self):
+        """
+        Healthy endpoints ordered by latency, untried endpoints first so each gets measured.
+        Falls back to every endpoint ordered by last failure if none are healthy.
+        """
+
+        freshest = max((endpoint.head_block or 0 for endpoint in self.endpoints), default=0)
+
+        healthy = [
+            endpoint for endpoint in self.endpoints
+            if not endpoint.cooling_down()
+            and (endpoint.head_block is None or freshest - endpoint.head_block <= MAX_LAG_BLOCKS)
+        ]
+
+        if not healthy:
+            return sorted(self.endpoints, key=lambda endpoint: endpoint.failed_at)
+
+        return sorted(healthy, key=lambda endpoint: -1 if endpoint.latency is None else endpoint.latency)
+
+
+    def best(self):
+        return self.ranked()[0]
+
+
+    def find(self, url):
+        """Return the endpoint a full URL belongs to, or None."""
+
+        return next((endpoint for endpoint in self.endpoints if url.startswith(endpoint.url)), None)
+
+
+    def hedge_delay(self):
+        """Seconds to wait for the primary before sending a hedged request: the best endpoint's p95."""
+
+        return self.best().p95()
+
+
+    def check_health(self, get):
+        """
+        Refresh head block and latency of every endpoint.
+
+        Parameters:
+            get (callable): Performs a GET for a URL and returns a requests-like response.
+        """
+
+        for endpoint in self.endpoints:
+            start = time.monotonic()
+
+            try:
+                response = get(endpoint.url + self.health_path)
+                response.raise_for_status()
+                endpoint.head_block = self.parse_head(response.json())
+                endpoint.record(time.monotonic() - start)
+
+            except Exception:
+                endpoint.record(time.monotonic() - start, ok=False)
+
+
+def atomic_head(data):
+    """Block the AtomicAssets indexer has processed up to."""
+
+    readers = data.get("data", {}).get("postgres", {}).get("readers") or []
+    blocks = [int(reader["block_num"]) for reader in readers if reader.get("block_num")]
+    return min(blocks) if blocks else None
+
+
+def _chain_head(data):
+    return data.get("head_block_num")
+
+
+def _state_head(data):
+    """Last block indexed by Hyperion's Elasticsearch."""
+
+    for service in data.get("health", []):
+        if service.get("service") == "Elasticsearch":
+            return service.get("service_data", {}).get("last_indexed_block")
+
+    return None
+
+
+def _urls(variable, default):
+    value = os.getenv(variable) or default or ""
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+def build_pools(api_endpoint):
+    """Create the endpoint pools from the environment."""
+
+    return {
+        "atomic": EndpointPool("atomic", _urls("API_ENDPOINTS", api_endpoint), "health", atomic_head),
+        "chain": EndpointPool("chain", _urls("CHAIN_ENDPOINTS", "https://wax.greymass.com/"), "v1/chain/get_info", _chain_head),
+        "state": EndpointPool("state", _urls("STATE_ENDPOINTS", "https://api.waxsweden.org/"), "v2/health", _state_head),
+    }
+
+
+def family_for(path):
+    """API family for a relative path, atomic by default."""
+
+    path = path.lstrip("/")
+    return next((family for prefix, family in FAMILY_PREFIXES if path.startswith(prefix)), "atomic")
@@ -0,0 +1,298 @@
+"""
+Typed market and transfer events from an on-chain action stream.
+
+An EventSource reads Hyperion-format actions (one JSON object per action, as returned by
+v2/history/get_actions) and publishes the ones the bots care about to an EventBus:
+
+    bus = EventBus()
+    bus.subscribe(SaleAnnounced, on_listing)
+    make_event_source("stream:http://127.0.0.1:8900/stream").start(bus)
+"""
+
+import json
+import time
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import requests
+
+from src.api_session import api_get, HEADERS
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SECONDS = 0.5
+RECONNECT_BACKOFF_SECONDS = (1, 2, 5, 10, 30)
+
+SaleAnnounced = namedtuple("SaleAnnounced", ["block_num", "tx_id", "seller", "asset_ids", "listing_price"])
+SalePurchased = namedtuple("SalePurchased", ["block_num", "tx_id", "buyer", "sale_id"])
+SaleCancelled = namedtuple("SaleCancelled", ["block_num", "tx_id", "sale_id"])
+AssetTransferred = namedtuple("AssetTransferred", ["block_num", "tx_id", "sender", "recipient", "asset_ids", "memo"])
+
+WATCHED_ACTIONS = (
+    "atomicmarket:announcesale",
+    "atomicmarket:purchasesale",
+    "atomicmarket:cancelsale",
+    "atomicassets:transfer",
+)
+
+
+def _parse_price(quantity):
+    """Convert an asset string like "10.00000000 WAX" to a float."""
+
+    return float(quantity.split(" ")[0])
+
+
+def parse_action(action):
+    """
+    Convert a Hyperion-format action into a typed event.
+
+    Returns:
+        namedtuple: One of the event types above, or None for actions that aren't watched.
+    """
+
+    act = action.get("act", {})
+    data = act.get("data", {})
+    block_num = action.get("block_num")
+    tx_id = action.get("trx_id")
+    name = f"{act.get('account')}:{act.get('name')}"
+
+    if name == "atomicmarket:announcesale":
+        return SaleAnnounced(block_num, tx_id, data.get("seller"), [str(i) for i in data.get("asset_ids", [])], _parse_price(data.get("listing_price", "0 WAX")))
+
+    if name == "atomicmarket:purchasesale":
+        return SalePurchased(block_num, tx_id, data.get("buyer"), str(data.get("sale_id")))
+
+    if name == "atomicmarket:cancelsale":
+        return SaleCancelled(block_num, tx_id, str(data.get("sale_id")))
+
+    if name == "atomicassets:transfer":
+        return AssetTransferred(block_num, tx_id, data.get("from"), data.get("to"), [str(i) for i in data.get("asset_ids", [])], data.get("memo", ""))
+
+    return None
+
+
+class EventBus:
+    """Thread-safe publish/subscribe for typed events. Callbacks run on the source's thread."""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+
+    def subscribe(self, event_type, callback):
+        with self._lock:
+            self._subscribers.setdefault(event_type, []).append(callback)
+
+
+    def unsubscribe(self, event_type, callback):
+        with self._lock:
+            self._subscribers.get(event_type, []).remove(callback)
+
+
+    def publish(self, event):
+
+        with self._lock:
+            callbacks = list(self._subscribers.get(type(event), []))
+
+        for callback in callbacks:
+            try:
+                callback(event)
+            except Exception:
+                logger.exception(f"Event subscriber failed for {type(event).__name__}")
+
+
+class EventSource:
+    """
+    Base class for action streams. Subclasses implement actions(after_block),
+    yielding Hyperion-format actions in block order from the block after after_block onwards.
+
+    A reconnect resumes from (last_block, block_offset): the last block is read again from
+    its start and the actions already published from it are skipped, so a block the
+    connection dropped part way through is neither lost nor published twice.
+    """
+
+    def __init__(self):
+        self.last_block = None
+        self.block_offset = 0  # Actions published from last_block
+        self._stop = threading.Event()
+        self._thread = None
+
+
+    def actions(self, after_block):
+        raise NotImplementedError
+
+
+    def start(self, bus):
+        """Publish events to bus from a daemon thread, reconnecting with backoff."""
+
+        self._thread = threading.Thread(target=self.run, args=(bus,), daemon=True)
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        self._stop.set()
+
+
+    def run(self, bus):
+
+        failures = 0
+
+        while not self._stop.is_set():
+            resume_block, skip = self.last_block, self.block_offset
+
+            try:
+                for action in self.actions(resume_block - 1 if resume_block is not None else None):
+                    if self._stop.is_set():
+                        return
+
+                    failures = 0
+                    block = action.get("block_num", self.last_block)
+
+                    if skip and block == resume_block:
+                        skip -= 1  # Published before the reconnect
+                        continue
+
+                    if block != self.last_block:
+                        self.last_block, self.block_offset = block, 0
+                    self.block_offset += 1
+
+                    event = parse_action(action)
+                    if event is not None:
+                        bus.publish(event)
+
+            except Exception as e:
+                backoff = RECONNECT_BACKOFF_SECONDS[min(failures, len(RECONNECT_BACKOFF_SECONDS) - 1)]
+                failures += 1
+                logger.warning(f"{type(self).__name__} disconnected: {e}. Reconnecting in {backoff}s..")
+                self._stop.wait(backoff)
+
+
+class ActionStreamSource(EventSource):
+    """
+    Reads newline-delimited JSON actions from a streaming HTTP endpoint,
+    such as a state-history relay or the local replay server.
+    """
+
+    def __init__(self, url):
+        super().__init__()
+        self.url = url
+
+
+    def actions(self, after_block):
+
+        params = {"after_block": after_block} if after_block is not None else None
+
+        with requests.get(self.url, params=params, headers=HEADERS, stream=True, timeout=(5, 60)) as response:
+            response.raise_for_status()
+
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+        raise ConnectionError("Stream ended")
+
+
+class HyperionSource(EventSource):
+    """
+    Follows a Hyperion node's v2/history/get_actions for the watched actions,
+    asking for new actions once per block time.
+
+    Narrow actions and account to what the consumer needs: chain-wide atomicassets:transfer
+    is one of the busiest actions on WAX.
+
+    Parameters:
+        endpoint (str): Hyperion node URL.
+        actions (tuple): "contract:action" names to follow, all WATCHED_ACTIONS by default.
+        account (str): Only actions notifying this account, e.g. transfers to or from it.
+    """
+
+    PAGE_SIZE = 100
+
+    def __init__(self, endpoint, poll_seconds=BLOCK_SECONDS, actions=WATCHED_ACTIONS, account=None):
+        super().__init__()
+        self.endpoint = endpoint.rstrip("/") + "/"
+        self.poll_seconds = poll_seconds
+        self.watched = tuple(actions)
+        self.account = account
+        self._block_time = {}  # Block of the last action yielded -> its timestamp, where a reconnect resumes
+
+
+    def actions(self, after_block):
+
+        if after_block is None:
+            info = api_get(self.endpoint + "v1/chain/get_info").json()
+            after_block, cursor = info["head_block_num"], info["head_block_time"]
+        else:
+            cursor = self._block_time.get(after_block + 1)
+            if cursor is None:
+                logger.warning(f"No timestamp known for block {after_block + 1}, following from the head block")
+                cursor = api_get(self.endpoint + "v1/chain/get_info").json()["head_block_time"]
+
+        # Paged by time, get_actions filters on the action timestamp. Blocks are 0.5s apart, so one
+        # timestamp is one block: skip counts the actions already read from the cursor's block.
+        skip = 0
+
+        while True:
+            params = {
+                "filter": ",".join(self.watched),
+                "sort": "asc",
+                "limit": self.PAGE_SIZE,
+                "skip": skip,
+                "after": _just_before(cursor),
+            }
+            if self.account is not None:
+                params["account"] = self.account
+
+            response = api_get(self.endpoint + "v2/history/get_actions", params=params)
+            response.raise_for_status()
+            actions = response.json().get("actions", [])
+
+            for action in actions:
+                if action["block_num"] > after_block:
+                    self._block_time = {action["block_num"]: _timestamp(action)}
+                    yield action
+
+            if actions:
+                # Continue from the last block read, past its actions on this page, in case the page
+                # ended part way through it. A block with more watched actions than a page takes several.
+                last = _timestamp(actions[-1])
+                in_last = sum(1 for action in actions if _timestamp(action) == last)
+                skip = skip + in_last if last == cursor else in_last
+                cursor = last
+
+            if len(actions) < self.PAGE_SIZE:
+                time.sleep(self.poll_seconds)
+
+
+def _timestamp(action):
+    return action.get("@timestamp") or action.get("timestamp")
+
+
+def _just_before(timestamp):
+    """ISO timestamp 1ms earlier, so after= includes the block at timestamp whether the node compares with > or >=."""
+
+    moment = datetime.fromisoformat(timestamp.rstrip("Z")) - timedelta(milliseconds=1)
+    return moment.isoformat(timespec="milliseconds")
+
+
+def make_event_source(spec, actions=WATCHED_ACTIONS, account=None):
+    """
+    Create an event source from "kind:url", e.g. "stream:http://127.0.0.1:8900/stream"
+    or "hyperion:https://wax.eosphere.io/".
+
+    A Hyperion source only asks for actions and, if given, those notifying account. A stream
+    relays everything, the EventBus subscriptions pick out what is needed.
+    """
+
+    kind, _, url = spec.partition(":")
+
+    if kind == "stream":
+        return ActionStreamSource(url)
+
+    if kind == "hyperion":
+        return HyperionSource(url, actions=actions, account=account)
+
+    raise ValueError(f"Unknown event source: {spec}")
@@ -0,0 +1,347 @@
+"""
+Local on-disk index of the assets an account owns.
+
+The index is a SQLite file filled from one full listing, then kept current from the
+account's transfers and new mints after a stored cursor, a request or two per sync.
+Queries are answered locally, so the wax_tools collection functions can use it instead
+of paging through the API:
+
+    inventory = InventoryIndex("lean4lan.gm")
+    packs = get_collection_by_templates("lean4lan.gm", ["350147", "408663"], inventory=inventory)
+    actives = get_collection_by_category("lean4lan.gm", "active", inventory=inventory)
+
+Burns and other changes that are not transfers don't show up in the transfer history,
+so the index is compared against a full listing every check_interval seconds and repaired.
+"""
+
+import time
+import sqlite3
+import logging
+import threading
+
+from src import metrics
+from src.api_session import api_get
+from src.records import decode_transfers
+from src.wax_tools import PAGE_SIZE, AssetRecord, iter_assets
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = "inventory.sqlite"
+MAX_STALENESS_SECONDS = 300    # Queries sync first when the last sync is older than this, force_sync=True for sooner
+CHECK_INTERVAL_SECONDS = 600   # Full comparison against the API
+SYNC_OVERLAP_MS = 60_000       # Re-read this much history every sync, covers API indexing lag
+MAX_SYNC_PAGES = 20            # More transfers than this since the cursor and a full reload is cheaper
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS assets (
+    account TEXT NOT NULL,
+    asset_id INTEGER NOT NULL,
+    template_id TEXT,
+    schema_name TEXT,
+    collection_name TEXT,
+    minted_at INTEGER,
+    PRIMARY KEY (account, asset_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS assets_by_template ON assets (account, template_id);
+CREATE INDEX IF NOT EXISTS assets_by_schema ON assets (account, schema_name);
+CREATE TABLE IF NOT EXISTS sync_state (
+    account TEXT PRIMARY KEY,
+    cursor INTEGER,
+    synced_at REAL,
+    checked_at REAL
+);
+"""
+
+syncs = metrics.registry.counter("wax_inventory_syncs_total", "Inventory index syncs by kind", ["kind"])
+mismatches = metrics.registry.counter(
+    "wax_inventory_mismatches_total", "Assets the consistency check found missing from or stale in the inventory index", ["kind"]
+)
+
+
+class InventoryIndex:
+    """
+    SQLite index of one account's assets.
+
+    Parameters:
+        account (str): The WAX account name.
+        path (str): Database file, shared by any number of accounts. ":memory:" for a throwaway index.
+        max_staleness (float): Seconds a query may trust the last sync, 0 to sync before every query.
+            A query right after the account's own transaction should pass force_sync=True instead.
+        check_interval (float): Seconds between consistency checks against a full listing, None to disable.
+    """
+
+    def __init__(self, account, path=DEFAULT_PATH, max_staleness=MAX_STALENESS_SECONDS, check_interval=CHECK_INTERVAL_SECONDS):
+        self.account = account
+        self.path = path
+        self.max_staleness = max_staleness
+        self.check_interval = check_interval
+
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(SCHEMA)
+        self._lock = threading.RLock()
+
+
+    "--------------QUERY METHODS--------------"
+
+
+    def asset_ids(self, template_ids=None, schema_name=None, force_sync=False):
+        """
+        Asset IDs owned by the account, newest first like the API.
+
+        Parameters:
+            template_ids (list): Only these templates.
+            schema_name (str): Only this schema.
+            force_sync (bool): Sync first however recent the last sync is.
+
+        Returns:
+            list: Asset ID strings.
+        """
+
+        return [record.asset_id for record in self.records(template_ids, schema_name, force_sync)]
+
+
+    def grouped_by_templates(self, template_ids, force_sync=False):
+        """
+        Returns:
+            dict: Template ID -> list of asset IDs, in the order the templates were given.
+        """
+
+        if isinstance(template_ids, (int, str)):
+            template_ids = [template_ids]
+
+        grouped = {str(template_id): [] for template_id in template_ids}
+        for record in self.records(template_ids=template_ids, force_sync=force_sync):
+            grouped[record.template_id].append(record.asset_id)
+
+        return grouped
+
+
+    def records(self, template_ids=None, schema_name=None, force_sync=False):
+        """
+        Returns:
+            list: AssetRecord tuples owned by the account, newest first.
+        """
+
+        self.ensure_fresh(force_sync)
+
+        query = "SELECT asset_id, template_id, schema_name, collection_name, minted_at FROM assets WHERE account = ?"
+        params = [self.account]
+
+        if template_ids is not None:
+            if isinstance(template_ids, (int, str)):
+                template_ids = [template_ids]
+            template_ids = [str(template_id) for template_id in template_ids]
+            query += f" AND template_id IN ({','.join('?' * len(template_ids))})"
+            params += template_ids
+
+        if schema_name is not None:
+            query += " AND schema_name = ?"
+            params.append(schema_name)
+
+        with self._lock:
+            rows = self._db.execute(query + " ORDER BY asset_id DESC", params).fetchall()
+
+        return [
+            AssetRecord(str(asset_id), template_id, schema, collection, self.account, minted_at)
+            for asset_id, template_id, schema, collection, minted_at in rows
+        ]
+
+
+    def __len__(self):
+
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM assets WHERE account = ?", (self.account,)).fetchone()[0]
+
+
+    "--------------SYNC METHODS--------------"
+
+
+    def ensure_fresh(self, force=False):
+        """Sync if the last sync is older than max_staleness or force is set, and check consistency when due."""
+
+        with self._lock:
+            cursor, synced_at, checked_at = self._state()
+            now = time.time()
+
+            if cursor is None:
+                self.reload()
+            elif self.check_interval is not None and now - (checked_at or 0) >= self.check_interval:
+                self.check_consistency()
+            elif force or now - (synced_at or 0) >= self.max_staleness:
+                self.sync()
+
+
+    def sync(self):
+        """
+        Apply mints and transfers since the cursor. Builds the index with a full reload the first time.
+
+        Returns:
+            int: Transfers and mints applied.
+        """
+
+        with self._lock:
+            cursor = self._state()[0]
+            if cursor is None:
+                return self.reload()
+
+            started = int(time.time() * 1000)
+            applied = 0
+            overflow = False
+
+            with self._db:
+                # Mints first, a transfer out of a freshly minted asset must win
+                for record in iter_assets({"owner": self.account, "after": cursor}, records=True, prefetch=False):
+                    self._insert([record])
+                    applied += 1
+
+                for page in range(1, MAX_SYNC_PAGES + 1):
+                    transfers = self._transfers_after(cursor, page)
+
+                    for transfer in transfers:
+                        self._apply_transfer(transfer)
+                    applied += len(transfers)
+
+                    if len(transfers) < PAGE_SIZE:
+                        break
+                else:
+                    overflow = True
+
+                if not overflow:
+                    self._save_state(cursor=started - SYNC_OVERLAP_MS, synced_at=time.time())
+
+            if overflow:
+                # Outside the transaction above, the listing takes many requests and reload commits on its own
+                logger.info(f"{self.account}: more than {MAX_SYNC_PAGES} pages of transfers to sync, reloading")
+                return self.reload()
+
+            syncs.inc(kind="incremental")
+            return applied
+
+
+    def reload(self):
+        """
+        Replace the index with a full listing of the account's assets.
+
+        Returns:
+            int: Assets listed.
+        """
+
+        with self._lock:
+            started = int(time.time() * 1000)
+            records = list(iter_assets({"owner": self.account}, records=True))
+
+            with self._db:
+                self._db.execute("DELETE FROM assets WHERE account = ?", (self.account,))
+                self._insert(records)
+                now = time.time()
+                self._save_state(cursor=started - SYNC_OVERLAP_MS, synced_at=now, checked_at=now)
+
+            syncs.inc(kind="full")
+            return len(records)
+
+
+    def check_consistency(self):
+        """
+        Compare the index against a full listing and repair it.
+
+        Returns:
+            dict: "missing" (assets owned but not indexed) and "stale" (indexed but no longer owned) asset ID lists.
+        """
+
+        with self._lock:
+            self.sync()  # Recent activity first, so only genuine drift is reported
+
+            indexed = set(self._indexed_ids())
+            started = int(time.time() * 1000)
+            records = {record.asset_id: record for record in iter_assets({"owner": self.account}, records=True)}
+
+            missing = sorted(set(records) - indexed, key=int)
+            stale = sorted(indexed - set(records), key=int)
+
+            with self._db:
+                self._insert(records[asset_id] for asset_id in missing)
+                self._db.executemany(
+                    "DELETE FROM assets WHERE account = ? AND asset_id = ?", [(self.account, int(asset_id)) for asset_id in stale]
+                )
+                now = time.time()
+                self._save_state(cursor=started - SYNC_OVERLAP_MS, synced_at=now, checked_at=now)
+
+            if missing or stale:
+                logger.warning(f"{self.account}: inventory index repaired, {len(missing)} missing and {len(stale)} stale assets")
+                mismatches.inc(len(missing), kind="missing")
+                mismatches.inc(len(stale), kind="stale")
+
+            syncs.inc(kind="check")
+            return {"missing": missing, "stale": stale}
+
+
+    def _indexed_ids(self):
+
+        with self._lock:
+            rows = self._db.execute("SELECT asset_id FROM assets WHERE account = ?", (self.account,)).fetchall()
+
+        return [str(asset_id) for asset_id, in rows]
+
+
+    def close(self):
+
+        with self._lock:
+            self._db.close()
+
+
+    def _transfers_after(self, cursor, page):
+
+        params = {
+            "account": self.account,
+            "after": cursor,
+            "sort": "created",
+            "order": "asc",
+            "limit": PAGE_SIZE,
+            "page": page,
+        }
+
+        response = api_get("atomicassets/v1/transfers", params=params)
+        if response.status_code != 200:
+            # An error read as an empty page would move the cursor past unread transfers
+            raise ValueError(f"Failed to fetch transfers. HTTP Status: {response.status_code}")
+
+        return decode_transfers(response.content)
+
+
+    def _apply_transfer(self, transfer):
+
+        if transfer.sender_name == self.account:
+            self._db.executemany(
+                "DELETE FROM assets WHERE account = ? AND asset_id = ?",
+                [(self.account, int(asset.asset_id)) for asset in transfer.assets]
+            )
+
+        if transfer.recipient_name == self.account:
+            self._insert(transfer.assets)
+
+
+    def _insert(self, records):
+
+        self._db.executemany(
+            "INSERT OR REPLACE INTO assets VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (self.account, int(record.asset_id), record.template_id, record.schema_name, record.collection_name, record.minted_at)
+                for record in records
+            ]
+        )
+
+
+    def _state(self):
+
+        row = self._db.execute("SELECT cursor, synced_at, checked_at FROM sync_state WHERE account = ?", (self.account,)).fetchone()
+        return row or (None, None, None)
+
+
+    def _save_state(self, cursor, synced_at, checked_at=None):
+
+        self._db.execute(
+            "INSERT INTO sync_state (account, cursor, synced_at, checked_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (account) DO UPDATE SET cursor = excluded.cursor, synced_at = excluded.synced_at, "
+            "checked_at = COALESCE(excluded.checked_at, sync_state.checked_at)",
+            (self.account, cursor, synced_at, checked_at)
+        )
@@ -0,0 +1,375 @@
+"""
+In-process metrics: counters and fixed-bucket histograms keyed by label values.
+
+The tools record API calls, transactions and bot loop iterations into the shared registry.
+An exporter publishes them, chosen with METRICS_EXPORTER:
+
+    METRICS_EXPORTER=prometheus:9108              # Prometheus text format at http://127.0.0.1:9108/metrics
+    METRICS_EXPORTER=json:metrics.json            # JSON snapshot rewritten every 15 seconds
+    METRICS_EXPORTER=json:metrics.json:60         # ... every 60 seconds
+
+Recording is a dict lookup and a few additions under a lock, cheap enough to leave on.
+"""
+
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Seconds, from a cached API hit to a slow transaction
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+JSON_DUMP_SECONDS = 15
+
+
+class Counter:
+    """Monotonic count per combination of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+        self._values = {}
+        self._lock = threading.Lock()
+
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+    def samples(self):
+        """
+        Returns:
+            list: (labels dict, value) pairs.
+        """
+
+        with self._lock:
+            items = list(self._values.items())
+
+        return [(dict(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Histogram:
+    """Distribution of observed values in fixed cumulative buckets, per combination of label values."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+        self._values = {}  # labels key -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+
+            counts[index] += 1
+            counts[-1] += value
+
+
+    def samples(self):
+        """
+        Returns:
+            list: (labels dict, {"count", "sum", "buckets"}) pairs, buckets as cumulative (upper bound, count).
+        """
+
+        with self._lock:
+            items = [(key, list(counts)) for key, counts in self._values.items()]
+
+        samples = []
+        for key, counts in items:
+            cumulative = []
+            total = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts[:-1]):
+                total += count
+                cumulative.append((bound, total))
+
+            samples.append((dict(zip(self.labelnames, key)), {"count": total, "sum": counts[-1], "buckets": cumulative}))
+
+        return samples
+
+
+def quantile(histogram_value, q):
+    """Upper bound of the bucket holding the q-th quantile of a histogram sample, None if empty."""
+
+    target = q * histogram_value["count"]
+    for bound, count in histogram_value["buckets"]:
+        if count and count >= target:
+            return bound
+
+    return None
+
+
+class Registry:
+    """Named metrics, created on first use so modules can declare the same metric independently."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+
+    def _get_or_create(self, cls, name, help, labelnames, **kwargs):
+
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as a {metric.kind}")
+
+        return metric
+
+
+    def counter(self, name, help, labelnames=()):
+        return self._get_or_create(Counter, name, help, labelnames)
+
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics.values())
+
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format."""
+
+        lines = []
+
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+
+            for labels, value in metric.samples():
+                if metric.kind == "counter":
+                    lines.append(f"{metric.name}{_format_labels(labels)} {value}")
+                    continue
+
+                for bound, count in value["buckets"]:
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{metric.name}_bucket{_format_labels({**labels, 'le': le})} {count}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {value['sum']}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {value['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+    def to_dict(self):
+        """Snapshot of every metric, histograms summarised with approximate p50/p95/p99."""
+
+        snapshot = {}
+
+        for metric in self.metrics():
+            samples = []
+
+            for labels, value in metric.samples():
+                if metric.kind == "counter":
+                    samples.append({"labels": labels, "value": value})
+                else:
+                    samples.append({
+                        "labels": labels,
+                        "count": value["count"],
+                        "sum": value["sum"],
+                        "p50": quantile(value, 0.50),
+                        "p95": quantile(value, 0.95),
+                        "p99": quantile(value, 0.99),
+                    })
+
+            snapshot[metric.name] = {"type": metric.kind, "help": metric.help, "samples": samples}
+
+        return snapshot
+
+
+def _format_labels(labels):
+
+    if not labels:
+        return ""
+
+    escaped = (
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+registry = Registry()
+
+
+# ---------------- Tool metrics ----------------------
+
+api_request_seconds = registry.histogram("wax_api_request_seconds", "API request latency, excluding rate limiter waits", ["route"])
+api_requests = registry.counter("wax_api_requests_total", "API responses by status code, \"error\" for connection failures", ["route", "status"])
+api_retries = registry.counter("wax_api_retries_total", "Extra API requests sent to another endpoint", ["route", "reason"])
+api_bytes = registry.counter("wax_api_response_bytes_total", "API response body bytes", ["route"])
+api_rate_limit_wait = registry.counter("wax_api_rate_limit_wait_seconds_total", "Time spent waiting for the API rate limiter", ["route"])
+
+transaction_seconds = registry.histogram("wax_transaction_seconds", "Time to sign and push a transaction", ["action"])
+transactions = registry.counter("wax_transactions_total", "Transactions by result", ["action", "result"])
+
+bot_iterations = registry.counter("wax_bot_iterations_total", "Bot main loop iterations", ["bot"])
+bot_sleep = registry.counter("wax_bot_sleep_seconds_total", "Time bots spent in their own sleeps", ["bot"])
+
+
+def route_of(url):
+    """Path of a URL with numeric segments replaced, e.g. atomicassets/v1/assets/:id."""
+
+    segments = urlsplit(url).path.strip("/").split("/")
+    return "/".join(":id" if segment.isdigit() else segment for segment in segments)
+
+
+def action_label(actions):
+    """Distinct contract:action names of a transaction, e.g. "atomicmarket:cancelsale+atomicmarket:announcesale"."""
+
+    return "+".join(dict.fromkeys(f"{action['account']}:{action['name']}" for action in actions))
+
+
+def sleep(seconds, bot):
+    """time.sleep, counted as the bot's own waiting."""
+
+    bot_sleep.inc(seconds, bot=bot)
+    time.sleep(seconds)
+
+
+# ---------------- Exporters ----------------------
+
+class Exporter:
+    """Publishes a registry somewhere. Subclasses implement start and stop."""
+
+    def __init__(self, registry):
+        self.registry = registry
+
+
+    def start(self):
+        raise NotImplementedError
+
+
+    def stop(self):
+        raise NotImplementedError
+
+
+class PrometheusExporter(Exporter):
+    """Serves /metrics in the Prometheus text format from a daemon thread, on localhost by default."""
+
+    def __init__(self, registry, port=9108, host="127.0.0.1"):
+        super().__init__(registry)
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if urlsplit(self.path).path != "/metrics":
+                    self.send_error(404)
+                    return
+
+                content = exporter.registry.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/metrics"
+
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class JsonFileExporter(Exporter):
+    """Rewrites a JSON snapshot of the registry every interval seconds, atomically."""
+
+    def __init__(self, registry, path, interval=JSON_DUMP_SECONDS):
+        super().__init__(registry)
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+
+
+    def dump(self):
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"timestamp": time.time(), "metrics": self.registry.to_dict()}, f, indent=2)
+
+        os.replace(tmp_path, self.path)
+
+
+    def run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.dump()
+            except OSError as e:
+                logger.warning(f"Metrics dump to {self.path} failed: {e}")
+
+
+    def start(self):
+        threading.Thread(target=self.run, daemon=True).start()
+        return self
+
+
+    def stop(self):
+        self._stop.set()
+        self.dump()
+
+
+def start_exporter(spec=None):
+    """
+    Start an exporter for the shared registry.
+
+    Parameters:
+        spec (str): "prometheus:<port>" or "json:<path>[:<seconds>]", defaults to METRICS_EXPORTER.
+
+    Returns:
+        Exporter: The running exporter, or None when no exporter is configured.
+    """
+
+    spec = spec or os.getenv("METRICS_EXPORTER")
+    if not spec:
+        return None
+
+    kind, _, target = spec.partition(":")
+
+    if kind == "prometheus":
+        return PrometheusExporter(registry, port=int(target or 9108)).start()
+
+    if kind == "json":
+        path, _, interval = target.rpartition(":") if target.rpartition(":")[2].isdigit() else (target, "", "")
+        return JsonFileExporter(registry, path, float(interval or JSON_DUMP_SECONDS)).start()
+
+    raise ValueError(f"Unknown metrics exporter: {spec}")
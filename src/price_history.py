@@ -0,0 +1,285 @@
+"""
+Time series of observed floor listings and sale prices per template.
+
+Observations are fixed-size binary records (18 bytes each) appended to one file, and
+kept in memory as a NumPy structured array. Statistics for many templates are computed
+together with array operations, no per-template Python loops:
+
+    history = PriceHistory("price_history.bin")
+    history.record_listings("350147", listings)      # Cheapest listings, as from get_template_listings
+    history.record_sale("350147", 12.5)
+    history.flush()
+
+    history.stats(["350147", "408663"])    # {"350147": {"floor", "p10", "p50", "p90", "ema", "depth_floor", ...}}
+    history.reference_prices(["350147"])   # {"350147": 12.1} robust floor, None until there is enough history
+"""
+
+import os
+import time
+import logging
+import warnings
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PRICE_SCALE = 10**8  # Fixed point at the WAX token's precision
+
+KIND_LISTING = 0
+KIND_SALE = 1
+
+RECORD_DTYPE = np.dtype([
+    ("template", "<u4"),
+    ("time", "<u4"),     # Unix seconds
+    ("kind", "u1"),
+    ("rank", "u1"),      # Position among the cheapest listings of a snapshot, 0 is the floor
+    ("price", "<i8"),    # Fixed point
+])
+
+DEPTH = 5                          # Cheapest listings kept per snapshot
+SNAPSHOT_SECONDS = 60              # At most one snapshot per template per interval, unless the floor moves
+WINDOW_SECONDS = 6 * 3600          # Rolling window for the statistics
+EMA_HALFLIFE_SECONDS = 1800
+RETENTION_SECONDS = 7 * 24 * 3600  # Older records are dropped when the file is loaded or compacted
+MIN_OBSERVATIONS = 10              # Floor snapshots needed before a reference price is trusted
+
+
+class PriceHistory:
+    """
+    Append-only store of price observations with vectorized rolling statistics.
+
+    Parameters:
+        path (str): Binary file to load and append to, None to keep everything in memory.
+        window (float): Seconds of history the statistics cover.
+        ema_halflife (float): Seconds for an observation's weight in the EMA to halve.
+        retention (float): Seconds of history kept in memory and on disk.
+    """
+
+    def __init__(self, path=None, window=WINDOW_SECONDS, ema_halflife=EMA_HALFLIFE_SECONDS, retention=RETENTION_SECONDS):
+        self.path = path
+        self.window = window
+        self.ema_halflife = ema_halflife
+        self.retention = retention
+
+        self._data = np.empty(0, dtype=RECORD_DTYPE)
+        self._pending = []
+        self._last_snapshot = {}  # template -> (time, floor price)
+        self._lock = threading.Lock()
+
+        if path is not None and os.path.exists(path):
+            self._data = self._drop_expired(np.fromfile(path, dtype=RECORD_DTYPE))
+
+
+    def __len__(self):
+
+        with self._lock:
+            return len(self._data) + len(self._pending)
+
+
+    "--------------RECORD METHODS--------------"
+
+
+    def record_listings(self, template_id, listings, now=None):
+        """
+        Record a snapshot of a template's cheapest listings.
+
+        Snapshots closer than SNAPSHOT_SECONDS to the previous one are skipped unless the floor changed,
+        so calling this on every repricing tick stays compact.
+
+        Parameters:
+            template_id (str): The template ID.
+            listings (list): Dicts with "price" in WAX, cheapest first. Only the first DEPTH are kept.
+
+        Returns:
+            bool: Whether the snapshot was recorded.
+        """
+
+        if not listings:
+            return False
+
+        now = int(now if now is not None else time.time())
+        template = int(template_id)
+        prices = [_to_fixed(listing["price"]) for listing in listings[:DEPTH]]
+
+        with self._lock:
+            last = self._last_snapshot.get(template)
+            if last is not None and now - last[0] < SNAPSHOT_SECONDS and last[1] == prices[0]:
+                return False
+
+            self._last_snapshot[template] = (now, prices[0])
+            self._pending.extend((template, now, KIND_LISTING, rank, price) for rank, price in enumerate(prices))
+
+        return True
+
+
+    def record_sale(self, template_id, price, now=None):
+        """Record a completed sale at price WAX."""
+
+        now = int(now if now is not None else time.time())
+
+        with self._lock:
+            self._pending.append((int(template_id), now, KIND_SALE, 0, _to_fixed(price)))
+
+
+    def flush(self):
+        """Move pending observations into the in-memory array and append them to the file."""
+
+        with self._lock:
+            if not self._pending:
+                return
+
+            records = np.array(self._pending, dtype=RECORD_DTYPE)
+            self._pending = []
+            self._data = np.concatenate([self._data, records])
+
+            if self.path is not None:
+                with open(self.path, "ab") as f:
+                    records.tofile(f)
+
+
+    def compact(self):
+        """Drop records older than the retention period and rewrite the file without them."""
+
+        self.flush()
+
+        with self._lock:
+            self._data = self._drop_expired(self._data)
+
+            if self.path is not None:
+                tmp_path = f"{self.path}.tmp"
+                self._data.tofile(tmp_path)
+                os.replace(tmp_path, self.path)
+
+
+    def _drop_expired(self, data):
+        return data[data["time"] >= time.time() - self.retention]
+
+
+    "--------------STATISTICS METHODS--------------"
+
+
+    def stats(self, template_ids, now=None, percentiles=(10, 50, 90)):
+        """
+        Rolling statistics over the last window seconds for several templates at once.
+
+        Parameters:
+            template_ids (list): Template IDs.
+            percentiles (tuple): Floor percentiles to compute, returned as "p<q>".
+
+        Returns:
+            dict: Template ID -> {
+                "floor": latest floor,
+                "p<q>": floor percentiles over the window,
+                "ema": exponentially time-weighted mean of the floor,
+                "depth_floor": latest snapshot's cheapest listings averaged with weights 1, 1/2, 1/3...,
+                "sale_median": median sale price over the window,
+                "observations": floor snapshots in the window,
+            }, prices in WAX and None where there is no data.
+        """
+
+        self.flush()
+
+        now = now if now is not None else time.time()
+        templates = np.array([int(template_id) for template_id in template_ids], dtype=np.int64)
+        order = np.argsort(templates)
+        sorted_templates = templates[order]
+
+        with self._lock:
+            data = self._data
+
+        recent = data[(data["time"] >= now - self.window) & np.isin(data["template"], sorted_templates)]
+        rows = order[np.searchsorted(sorted_templates, recent["template"])]  # Position in template_ids of every record
+
+        floors = recent["rank"] == 0
+        listing = recent["kind"] == KIND_LISTING
+        floor_rows, floor_times, floor_prices = _series(rows, recent, listing & floors)
+        floor_matrix = _padded(floor_rows, floor_prices, len(templates))
+
+        count = np.count_nonzero(~np.isnan(floor_matrix), axis=1)
+        result = {"observations": count}
+
+        # Latest floor: last column filled in each row, records are in time order within a template
+        has_floor = count > 0
+        latest = np.full(len(templates), np.nan)
+        latest[has_floor] = floor_matrix[has_floor, count[has_floor] - 1]
+        result["floor"] = latest
+
+        with np.errstate(all="ignore"), warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN rows for templates without data
+
+            for q in percentiles:
+                result[f"p{q}"] = np.nanpercentile(floor_matrix, q, axis=1) if floor_matrix.shape[1] else latest * np.nan
+
+            weights = np.exp2(-(now - floor_times) / self.ema_halflife)
+            weighted = np.bincount(floor_rows, weights * floor_prices, minlength=len(templates))
+            total = np.bincount(floor_rows, weights, minlength=len(templates))
+            result["ema"] = weighted / total
+
+            # Depth-weighted floor from each template's latest snapshot
+            snapshot_time = np.zeros(len(templates), dtype=np.int64)
+            np.maximum.at(snapshot_time, rows[listing], recent["time"][listing].astype(np.int64))
+            latest_snapshot = listing & (recent["time"] == snapshot_time[rows])
+            rank_weights = 1 / (recent["rank"][latest_snapshot] + 1.0)
+            snapshot_rows = rows[latest_snapshot]
+            snapshot_prices = recent["price"][latest_snapshot] / PRICE_SCALE
+            result["depth_floor"] = (
+                np.bincount(snapshot_rows, rank_weights * snapshot_prices, minlength=len(templates))
+                / np.bincount(snapshot_rows, rank_weights, minlength=len(templates))
+            )
+
+            sale_rows, _, sale_prices = _series(rows, recent, recent["kind"] == KIND_SALE)
+            sale_matrix = _padded(sale_rows, sale_prices, len(templates))
+            result["sale_median"] = np.nanmedian(sale_matrix, axis=1) if sale_matrix.shape[1] else latest * np.nan
+
+        return {
+            str(template_id): {
+                name: (int(values[i]) if name == "observations" else _optional(values[i]))
+                for name, values in result.items()
+            }
+            for i, template_id in enumerate(template_ids)
+        }
+
+
+    def reference_prices(self, template_ids, now=None):
+        """
+        Robust reference price per template: the median floor over the window, so a single
+        outlier listing barely moves it.
+
+        Returns:
+            dict: Template ID -> price in WAX, None with fewer than MIN_OBSERVATIONS floor snapshots.
+        """
+
+        stats = self.stats(template_ids, now=now, percentiles=(50,))
+
+        return {
+            template_id: values["p50"] if values["observations"] >= MIN_OBSERVATIONS else None
+            for template_id, values in stats.items()
+        }
+
+
+def _to_fixed(price):
+    return round(price * PRICE_SCALE)
+
+
+def _optional(value):
+    return None if np.isnan(value) else float(value)
+
+
+def _series(rows, recent, mask):
+    """Row, time and WAX price of the masked records, sorted by row then time."""
+
+    rows, times, prices = rows[mask], recent["time"][mask].astype(np.float64), recent["price"][mask] / PRICE_SCALE
+    order = np.lexsort((times, rows))
+    return rows[order], times[order], prices[order]
+
+
+def _padded(rows, values, n_rows):
+    """Values sorted by row spread into an (n_rows, longest series) matrix padded with NaN."""
+
+    counts = np.bincount(rows, minlength=n_rows)
+    matrix = np.full((n_rows, counts.max(initial=0)), np.nan)
+
+    starts = np.cumsum(counts) - counts
+    matrix[rows, np.arange(len(rows)) - starts[rows]] = values
+    return matrix
@@ -0,0 +1,291 @@
+"""
+Typed decoding of AtomicAssets and AtomicMarket responses.
+
+Pages of assets, sales and transfers are decoded into small record tuples holding only
+the fields the tools use. Mutable and immutable data, collection and schema blobs are
+skipped. The JSON backend is the fastest one installed:
+
+    msgspec  - decodes straight into typed structs, skipped fields are never built as Python objects
+    orjson   - fast full parse, records are built from the parsed dicts
+    json     - the standard library, as response.json()
+
+    assets = decode_assets(response.content)        # [AssetRecord(asset_id=..., template_id=..., ...)]
+    sales = decode_sales(response.content)          # [SaleRecord(sale_id=..., price=..., assets=[...])]
+    transfers = decode_transfers(response.content)  # [TransferRecord(sender_name=..., recipient_name=..., assets=[...])]
+
+Every decoder raises ValueError on a body that isn't valid JSON or has no "data" field, such as the error
+body of a throttled or failed request, so it is never mistaken for an empty page.
+"""
+
+import json
+from collections import namedtuple
+from typing import Any, List, Optional, Union
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+AssetRecord = namedtuple(
+    "AssetRecord",
+    ["asset_id", "template_id", "schema_name", "collection_name", "owner", "minted_at", "template_name"],
+    defaults=(None, None)
+)
+SaleRecord = namedtuple("SaleRecord", ["sale_id", "seller", "price", "assets"])  # price in WAX, None if unknown
+TransferRecord = namedtuple("TransferRecord", ["sender_name", "recipient_name", "assets", "created_at", "created_at_block"], defaults=(None, None))
+
+PRICE_SCALE = 10**8
+
+BACKEND = "msgspec" if msgspec is not None else "orjson" if orjson is not None else "json"
+
+
+def available_backends():
+    return [name for name, module in (("msgspec", msgspec), ("orjson", orjson), ("json", json)) if module is not None]
+
+
+def use_backend(name):
+    """Switch the JSON backend, e.g. to compare them. Raises ValueError if it isn't installed."""
+
+    global BACKEND
+
+    if name not in available_backends():
+        raise ValueError(f"JSON backend {name} is not installed, available: {available_backends()}")
+
+    BACKEND = name
+
+
+# ---------------- Records from parsed dicts ----------------------
+
+def asset_record(nft):
+    """AssetRecord from an AtomicAssets asset object, as found in assets, sales and transfers responses."""
+
+    minted_at = nft.get("minted_at_time")
+    template = nft.get("template") or {}
+
+    return AssetRecord(
+        nft["asset_id"],
+        template.get("template_id"),
+        (nft.get("schema") or {}).get("schema_name"),
+        (nft.get("collection") or {}).get("collection_name"),
+        nft.get("owner"),
+        int(minted_at) if minted_at is not None else None,
+        (template.get("immutable_data") or {}).get("name"),
+    )
+
+
+def sale_record(sale):
+    """SaleRecord from an AtomicMarket sale object, v1 (listing_price) or v2 (price.amount)."""
+
+    price = (sale.get("price") or {}).get("amount", sale.get("listing_price"))
+
+    return SaleRecord(
+        sale.get("sale_id"),
+        sale.get("seller"),
+        float(price) / PRICE_SCALE if price else None,
+        [asset_record(asset) for asset in sale.get("assets") or []],
+    )
+
+
+def transfer_record(transfer):
+    """TransferRecord from an AtomicAssets transfer object."""
+
+    created_at = transfer.get("created_at_time")
+    created_at_block = transfer.get("created_at_block")
+
+    return TransferRecord(
+        transfer.get("sender_name"),
+        transfer.get("recipient_name"),
+        [asset_record(asset) for asset in transfer.get("assets") or []],
+        int(created_at) if created_at is not None else None,
+        int(created_at_block) if created_at_block is not None else None,
+    )
+
+
+def _loads_data(content):
+    """The "data" field of a response parsed with the orjson or json backend."""
+
+    try:
+        payload = orjson.loads(content) if BACKEND == "orjson" else json.loads(content)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid JSON response: {e}") from e
+
+    if not isinstance(payload, dict) or "data" not in payload:
+        message = payload.get("message") if isinstance(payload, dict) else None
+        raise ValueError(f"Response has no data: {message or str(payload)[:200]}")
+
+    return payload["data"]
+
+
+# ---------------- msgspec wire types ----------------------
+
+if msgspec is not None:
+
+    # Only the fields declared here are decoded, everything else in the payload is skipped.
+    # "data" has no default, so an error body without it fails to decode instead of reading as empty
+    Scalar = Optional[Union[str, int]]
+
+    class _ImmutableData(msgspec.Struct, gc=False):
+        name: Any = None  # Collections put anything in immutable data
+
+    class _Template(msgspec.Struct, gc=False):
+        template_id: Scalar = None
+        immutable_data: Optional[_ImmutableData] = None
+
+    class _Schema(msgspec.Struct, gc=False):
+        schema_name: Optional[str] = None
+
+    class _Collection(msgspec.Struct, gc=False):
+        collection_name: Optional[str] = None
+
+    class _Asset(msgspec.Struct, gc=False):
+        asset_id: Union[str, int]
+        owner: Optional[str] = None
+        minted_at_time: Scalar = None
+        template: Optional[_Template] = None
+        schema: Optional[_Schema] = None
+        collection: Optional[_Collection] = None
+
+    class _Price(msgspec.Struct, gc=False):
+        amount: Scalar = None
+
+    class _Sale(msgspec.Struct, gc=False):
+        sale_id: Scalar = None
+        seller: Optional[str] = None
+        listing_price: Scalar = None
+        price: Optional[_Price] = None
+        assets: List[_Asset] = []
+
+    class _Transfer(msgspec.Struct, gc=False):
+        sender_name: Optional[str] = None
+        recipient_name: Optional[str] = None
+        created_at_time: Scalar = None
+        created_at_block: Scalar = None
+        assets: List[_Asset] = []
+
+    class _AssetPage(msgspec.Struct, gc=False):
+        data: Optional[List[_Asset]]
+
+    class _AssetResponse(msgspec.Struct, gc=False):
+        data: Optional[_Asset]
+
+    class _SalePage(msgspec.Struct, gc=False):
+        data: Optional[List[_Sale]]
+
+    class _TransferPage(msgspec.Struct, gc=False):
+        data: Optional[List[_Transfer]]
+
+    _decoders = {
+        page_type: msgspec.json.Decoder(page_type)
+        for page_type in (_AssetPage, _AssetResponse, _SalePage, _TransferPage)
+    }
+
+
+def _decode(content, page_type):
+
+    try:
+        return _decoders[page_type].decode(content)
+    except msgspec.MsgspecError as e:
+        raise ValueError(f"Invalid {page_type.__name__.lstrip('_')} response: {e}") from e
+
+
+def _wire_asset(asset):
+
+    template = asset.template
+    minted_at = asset.minted_at_time
+
+    return AssetRecord(
+        str(asset.asset_id),
+        template.template_id if template is not None else None,
+        asset.schema.schema_name if asset.schema is not None else None,
+        asset.collection.collection_name if asset.collection is not None else None,
+        asset.owner,
+        int(minted_at) if minted_at is not None else None,
+        template.immutable_data.name if template is not None and template.immutable_data is not None else None,
+    )
+
+
+# ---------------- Decoders ----------------------
+
+def decode_assets(content):
+    """
+    Decode an atomicassets/v1/assets page.
+
+    Parameters:
+        content (bytes): The response body.
+
+    Returns:
+        list: AssetRecord tuples, in response order.
+    """
+
+    if BACKEND == "msgspec":
+        return [_wire_asset(asset) for asset in _decode(content, _AssetPage).data or []]
+
+    return [asset_record(asset) for asset in _loads_data(content) or []]
+
+
+def decode_asset(content):
+    """
+    Decode a single atomicassets/v1/assets/{id} response.
+
+    Returns:
+        AssetRecord: None if the response has no asset.
+    """
+
+    if BACKEND == "msgspec":
+        asset = _decode(content, _AssetResponse).data
+        return _wire_asset(asset) if asset is not None else None
+
+    asset = _loads_data(content)
+    return asset_record(asset) if asset else None
+
+
+def decode_sales(content):
+    """
+    Decode an atomicmarket/v1/sales or v2/sales page.
+
+    Returns:
+        list: SaleRecord tuples, in response order.
+    """
+
+    if BACKEND != "msgspec":
+        return [sale_record(sale) for sale in _loads_data(content) or []]
+
+    sales = []
+    for sale in _decode(content, _SalePage).data or []:
+        price = sale.price.amount if sale.price is not None and sale.price.amount is not None else sale.listing_price
+        sales.append(SaleRecord(
+            sale.sale_id,
+            sale.seller,
+            float(price) / PRICE_SCALE if price else None,
+            [_wire_asset(asset) for asset in sale.assets],
+        ))
+
+    return sales
+
+
+def decode_transfers(content):
+    """
+    Decode an atomicassets/v1/transfers page.
+
+    Returns:
+        list: TransferRecord tuples, in response order.
+    """
+
+    if BACKEND != "msgspec":
+        return [transfer_record(transfer) for transfer in _loads_data(content) or []]
+
+    return [
+        TransferRecord(
+            transfer.sender_name,
+            transfer.recipient_name,
+            [_wire_asset(asset) for asset in transfer.assets],
+            int(transfer.created_at_time) if transfer.created_at_time is not None else None,
+            int(transfer.created_at_block) if transfer.created_at_block is not None else None,
+        )
+        for transfer in _decode(content, _TransferPage).data or []
+    ]
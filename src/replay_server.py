@@ -0,0 +1,119 @@
+"""
+Local replay server for recorded action streams, for testing event consumers offline.
+
+Serves a recording (one Hyperion-format action per line) as a newline-delimited JSON stream
+at /stream, paced by the recorded block numbers. ActionStreamSource can connect to it directly.
+
+Usage:
+    python -m src.replay_server recording.ndjson --port 8900 --speed 10
+"""
+
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+from src.events import BLOCK_SECONDS
+
+
+def load_recording(path):
+    """Load a recording, sorted by block number."""
+
+    with open(path, "r") as f:
+        actions = [json.loads(line) for line in f if line.strip()]
+
+    return sorted(actions, key=lambda action: action.get("block_num", 0))
+
+
+class ReplayServer:
+    """
+    Plays recorded actions to every client connecting to /stream.
+
+    Parameters:
+        actions (list): Hyperion-format actions in block order.
+        speed (float): Playback speed multiplier, 0 streams everything without pauses.
+        port (int): Port to listen on, 0 picks a free one (see self.url).
+    """
+
+    def __init__(self, actions, speed=1.0, host="127.0.0.1", port=0):
+        self.actions = actions
+        self.speed = speed
+        self._stopped = threading.Event()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path != "/stream":
+                    self.send_error(404)
+                    return
+
+                after_block = parse_qs(parts.query).get("after_block", [None])[0]
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+
+                try:
+                    server.play(self.wfile, int(after_block) if after_block else None)
+                    server._stopped.wait()  # Hold the stream open like a live feed once the recording ends
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}/stream"
+
+
+    def play(self, stream, after_block=None):
+        """Write actions after after_block to stream, pausing for the recorded block gaps."""
+
+        previous_block = None
+
+        for action in self.actions:
+            block_num = action.get("block_num", 0)
+            if after_block is not None and block_num <= after_block:
+                continue
+
+            if previous_block is not None and self.speed > 0 and block_num > previous_block:
+                time.sleep((block_num - previous_block) * BLOCK_SECONDS / self.speed)
+            previous_block = block_num
+
+            stream.write(json.dumps(action).encode() + b"\n")
+            stream.flush()
+
+
+    def start(self):
+        """Serve from a daemon thread."""
+
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+
+    def stop(self):
+        self._stopped.set()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("recording", help="File with one Hyperion-format action per line")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--speed", type=float, default=1.0)
+    args = parser.parse_args()
+
+    server = ReplayServer(load_recording(args.recording), speed=args.speed, port=args.port)
+    print(f"Replaying {len(server.actions)} actions at {server.url}", flush=True)
+    server.httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Paces transactions by the signing account's available CPU and NET.
+
+Each account's CPU and NET are read from get_account and tracked between reads from the
+receipts of its own transactions. Before a transaction is sent its cost is predicted from
+past receipts of the same actions; if the account can't afford it, the transaction waits
+for the resources to regenerate instead of being rejected by the chain.
+
+Waiting transactions go in priority order, taken from the api_priority context the
+transaction is sent in (market_bot buys run at PRIORITY_HIGH, post_lower and pack_opener
+at PRIORITY_LOW). Only high priority transactions may use the last reserve share of an
+account's CPU and NET, so bulk transfers and price updates can't starve a buy.
+
+Opt in from code, or with RESOURCE_SCHEDULER=1 in .env:
+
+    enable_resource_scheduler(reserve=0.2)
+"""
+
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+
+from src import metrics
+from src.api_session import api_get, current_priority, PRIORITY_HIGH
+from src.wax_tools import cpu_estimator
+
+logger = logging.getLogger(__name__)
+
+HIGH_PRIORITY_RESERVE = 0.2     # Share of an account's CPU and NET only high priority transactions may use
+REFRESH_SECONDS = 30            # Re-read get_account at least this often
+SHORTFALL_REFRESH_SECONDS = 3   # ... and at most this often while a transaction can't be afforded
+MAX_WAIT_SECONDS = 60           # Then send anyway and let the chain decide, estimates may be off
+USAGE_WINDOW_SECONDS = 24 * 3600  # The chain averages usage over this window
+COST_SMOOTHING = 0.3
+DEFAULT_NET_BYTES_PER_ACTION = 120
+NET_OVERHEAD_BYTES = 100        # Header, extensions and one signature
+
+# Chain errors for an account out of CPU or NET
+RESOURCE_ERRORS = ("tx_cpu_usage_exceeded", "tx_net_usage_exceeded", "leeway_deadline_exception")
+
+resource_wait_seconds = metrics.registry.counter(
+    "wax_resource_wait_seconds_total", "Time transactions waited for CPU or NET", ["priority"]
+)
+resource_rejections = metrics.registry.counter(
+    "wax_resource_rejections_total", "Transactions the chain rejected for lack of CPU or NET", ["account"]
+)
+
+
+class AccountResources:
+    """An account's CPU (microseconds) and NET (bytes), as of the last get_account plus local accounting since."""
+
+    def __init__(self, account):
+        self.account = account
+        self.cpu_available = None
+        self.cpu_max = None
+        self.net_available = None
+        self.net_max = None
+        self.refreshed_at = None  # monotonic
+        self.updated_at = None
+        self.refreshing = False   # A scheduler thread is reading get_account
+
+
+    def read(self):
+        """
+        Read the account's limits from get_account, without touching the tracked values.
+
+        Returns:
+            tuple: (cpu_available, cpu_max, net_available, net_max), None if the read failed.
+        """
+
+        try:
+            response = api_get("v2/state/get_account", params={"limit": "1", "account": self.account})
+            data = response.json().get("account") or {}
+            cpu, net = data["cpu_limit"], data["net_limit"]
+            return int(cpu["available"]), int(cpu["max"]), int(net["available"]), int(net["max"])
+
+        except Exception as e:
+            logger.warning(f"Could not read resources of {self.account}: {e}")
+            return None
+
+
+    def apply(self, limits):
+        """Replace the tracked values with limits from read. None keeps the previous values."""
+
+        self.refreshed_at = time.monotonic()
+
+        if limits is not None:
+            self.cpu_available, self.cpu_max, self.net_available, self.net_max = limits
+            self.updated_at = self.refreshed_at
+
+
+    def refresh(self):
+        """Read the account's limits from get_account. Failures keep the previous values."""
+
+        self.apply(self.read())
+
+
+    def regenerate(self):
+        """Credit back usage the chain has forgotten since the last update, a linear approximation of its decay."""
+
+        if self.updated_at is None:
+            return
+
+        now = time.monotonic()
+        fraction = min(1.0, (now - self.updated_at) / USAGE_WINDOW_SECONDS)
+        self.cpu_available += (self.cpu_max - self.cpu_available) * fraction
+        self.net_available += (self.net_max - self.net_available) * fraction
+        self.updated_at = now
+
+
+    def known(self):
+        return self.cpu_max is not None
+
+
+    def charge(self, cpu_us, net_bytes):
+        if self.known():
+            self.cpu_available -= cpu_us
+            self.net_available -= net_bytes
+
+
+    def affords(self, cpu_us, net_bytes, reserve):
+        """Whether the cost fits, keeping a reserve share of max CPU and NET untouched."""
+
+        if not self.known():
+            return True
+
+        return (
+            cpu_us <= self.cpu_available - reserve * self.cpu_max
+            and net_bytes <= self.net_available - reserve * self.net_max
+        )
+
+
+    def seconds_until(self, cpu_us, net_bytes, reserve):
+        """Approximate seconds of regeneration before the cost fits."""
+
+        waits = []
+        for cost, available, maximum in ((cpu_us, self.cpu_available, self.cpu_max), (net_bytes, self.net_available, self.net_max)):
+            needed = cost - (available - reserve * maximum)
+            if needed > 0 and maximum:
+                waits.append(needed / maximum * USAGE_WINDOW_SECONDS)
+
+        return max(waits, default=0)
+
+
+class Ticket:
+    """A transaction admitted by the scheduler, passed back to release once it is sent."""
+
+    __slots__ = ("account", "actions", "cpu_us", "net_bytes")
+
+    def __init__(self, account, actions, cpu_us, net_bytes):
+        self.account = account
+        self.actions = actions
+        self.cpu_us = cpu_us
+        self.net_bytes = net_bytes
+
+
+class ResourceScheduler:
+    """
+    Admits transactions when their signing account can afford them, highest priority first.
+
+    Parameters:
+        reserve (float): Share of max CPU and NET kept for PRIORITY_HIGH transactions.
+        refresh_seconds (float): Seconds between get_account reads per account.
+        max_wait (float): Seconds a transaction waits at most before it is sent regardless.
+    """
+
+    def __init__(self, reserve=HIGH_PRIORITY_RESERVE, refresh_seconds=REFRESH_SECONDS, max_wait=MAX_WAIT_SECONDS):
+        self.reserve = reserve
+        self.refresh_seconds = refresh_seconds
+        self.max_wait = max_wait
+
+        self._accounts = {}  # account -> AccountResources
+        self._costs = {}     # (action label, assets) -> [cpu_us, net_bytes] smoothed from receipts
+        self._waiting = {}   # account -> heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._changed = threading.Condition()
+
+
+    "--------------COST METHODS--------------"
+
+
+    def estimate(self, actions):
+        """
+        Predicted (cpu_us, net_bytes) of a transaction, from past receipts of the same actions on as many assets.
+        Unseen transactions start from the transfer CPU model and a per-action NET guess.
+        """
+
+        cost = self._costs.get(_cost_key(actions))
+        if cost is not None:
+            return tuple(cost)
+
+        assets = _asset_count(actions)
+        return cpu_estimator.estimate(len(actions), assets), NET_OVERHEAD_BYTES + DEFAULT_NET_BYTES_PER_ACTION * len(actions)
+
+
+    def _observe_cost(self, actions, cpu_us, net_bytes):
+
+        key = _cost_key(actions)
+        cost = self._costs.get(key)
+
+        if cost is None:
+            self._costs[key] = [cpu_us, net_bytes]
+        else:
+            cost[0] += COST_SMOOTHING * (cpu_us - cost[0])
+            cost[1] += COST_SMOOTHING * (net_bytes - cost[1])
+
+
+    "--------------ADMISSION METHODS--------------"
+
+
+    def acquire(self, actions, priority=None):
+        """
+        Block until the signing account can afford the transaction and nothing of a higher priority is waiting.
+        The predicted cost is charged immediately, so concurrent transactions don't count the same CPU twice.
+
+        Parameters:
+            actions (list): The transaction's actions, the first authorization is the paying account.
+            priority (int): PRIORITY_* constant, defaults to the api_priority context.
+
+        Returns:
+            Ticket: Pass to release once the transaction has been sent or has failed.
+        """
+
+        priority = current_priority() if priority is None else priority
+        account = actions[0]["authorization"][0]["actor"]
+        cpu_us, net_bytes = self.estimate(actions)
+        reserve = 0 if priority == PRIORITY_HIGH else self.reserve
+
+        start = time.monotonic()
+        entry = (priority, next(self._sequence))
+
+        with self._changed:
+            resources = self._accounts.get(account)
+            if resources is None:
+                resources = self._accounts[account] = AccountResources(account)
+
+            waiting = self._waiting.setdefault(account, [])
+            heapq.heappush(waiting, entry)
+
+            try:
+                while True:
+                    now = time.monotonic()
+
+                    if resources.refreshed_at is None or now - resources.refreshed_at >= self.refresh_seconds:
+                        self._refresh(resources)
+                        continue
+                    resources.regenerate()
+
+                    first = waiting[0] == entry
+                    if first and (resources.affords(cpu_us, net_bytes, reserve) or now - start >= self.max_wait):
+                        break
+
+                    if first and now - resources.refreshed_at >= SHORTFALL_REFRESH_SECONDS:
+                        self._refresh(resources)  # Local accounting may be pessimistic, check with the chain
+                        continue
+
+                    delay = resources.seconds_until(cpu_us, net_bytes, reserve) if first else self.max_wait
+                    self._changed.wait(min(max(delay, 0.05), SHORTFALL_REFRESH_SECONDS, self.max_wait))
+
+            finally:
+                waiting.remove(entry)
+                heapq.heapify(waiting)
+                self._changed.notify_all()
+
+            resources.charge(cpu_us, net_bytes)
+
+        waited = time.monotonic() - start
+        if waited > 0.001:
+            resource_wait_seconds.inc(waited, priority=str(priority))
+
+        return Ticket(account, actions, cpu_us, net_bytes)
+
+
+    def _refresh(self, resources):
+        """
+        Re-read an account's resources. Called and returns with the lock held, but releases it for
+        the request, so a slow get_account never blocks other accounts, priorities or releases.
+        """
+
+        if resources.refreshing:
+            self._changed.wait(SHORTFALL_REFRESH_SECONDS)  # Another thread is reading, its result wakes us
+            return
+
+        resources.refreshing = True
+        self._changed.release()
+
+        try:
+            limits = resources.read()
+        finally:
+            self._changed.acquire()
+            resources.refreshing = False
+
+        resources.apply(limits)
+        self._changed.notify_all()
+
+
+    def release(self, ticket, receipt=None, error=None):
+        """
+        Settle a ticket: replace the predicted cost with the receipt's actual usage, refund it if the
+        transaction failed, or mark the account as exhausted if the chain rejected it for lack of resources.
+        """
+
+        with self._changed:
+            resources = self._accounts[ticket.account]
+            resources.charge(-ticket.cpu_us, -ticket.net_bytes)
+
+            if receipt is not None and receipt.get("cpu_usage_us"):
+                cpu_us = receipt["cpu_usage_us"]
+                net_bytes = (receipt.get("net_usage_words") or 0) * 8
+                resources.charge(cpu_us, net_bytes)
+                self._observe_cost(ticket.actions, cpu_us, net_bytes)
+
+            elif receipt is not None:
+                resources.charge(ticket.cpu_us, ticket.net_bytes)  # No receipt (e.g. a duplicate), assume the estimate
+
+            elif error is not None and any(name in str(error) for name in RESOURCE_ERRORS):
+                logger.warning(f"{ticket.account} is out of CPU or NET, pausing its low priority transactions")
+                resource_rejections.inc(account=ticket.account)
+                if resources.known():
+                    resources.cpu_available = min(resources.cpu_available, self.reserve * resources.cpu_max)
+                    resources.net_available = min(resources.net_available, self.reserve * resources.net_max)
+                resources.refreshed_at = time.monotonic() - self.refresh_seconds + SHORTFALL_REFRESH_SECONDS
+
+            self._changed.notify_all()
+
+
+    def stats(self):
+        """
+        Returns:
+            dict: Account -> {"cpu_available", "cpu_max", "net_available", "net_max", "waiting"}.
+        """
+
+        with self._changed:
+            return {
+                account: {
+                    "cpu_available": resources.cpu_available,
+                    "cpu_max": resources.cpu_max,
+                    "net_available": resources.net_available,
+                    "net_max": resources.net_max,
+                    "waiting": len(self._waiting.get(account, ())),
+                }
+                for account, resources in self._accounts.items()
+            }
+
+
+def _asset_count(actions):
+    return sum(len(action.get("data", {}).get("asset_ids", [])) for action in actions)
+
+
+def _cost_key(actions):
+    return metrics.action_label(actions), _asset_count(actions)
+
+
+_scheduler = None
+
+
+def enable_resource_scheduler(reserve=HIGH_PRIORITY_RESERVE, refresh_seconds=REFRESH_SECONDS, max_wait=MAX_WAIT_SECONDS):
+    """Route every transaction sent through WaxTransaction via a ResourceScheduler. Returns it."""
+
+    global _scheduler
+    _scheduler = ResourceScheduler(reserve, refresh_seconds, max_wait)
+    return _scheduler
+
+
+def disable_resource_scheduler():
+
+    global _scheduler
+    _scheduler = None
+
+
+def get_resource_scheduler():
+    """The active ResourceScheduler, None unless enabled."""
+
+    return _scheduler
+
+
+if os.getenv("RESOURCE_SCHEDULER") == "1":
+    enable_resource_scheduler()
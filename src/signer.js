@@ -0,0 +1,361 @@
+// Long-lived signer -- Loads key from .env file -- Reads one JSON request per line on stdin -- Writes one JSON response per line on stdout
+//
+// Request:  {"id": 1, "op": "transact", "actions": [...]}
+// Response: {"id": 1, "result": {"tx_id": "...", "rpc_saved": 5, "endpoint": "...", "block_num": 123, "cpu_usage_us": 310, "net_usage_words": 20}}  or  {"id": 1, "error": {...}}
+// Progress: {"id": 1, "signed": {"tx_id": "..."}} once signed, before the broadcast, so a caller that times out knows what to look for
+// Other ops: "ping", "stats" (cumulative RPC calls made and saved by the caches, current chain endpoint, push outcomes per node)
+//
+// Transactions are signed once and the same packed transaction is pushed to every PUSH_ENDPOINTS node at once.
+// The first node to accept it answers the request, "endpoint" in the result names it.
+//
+// Requests are handled concurrently, so responses may arrive out of order and must be matched by id.
+
+import { Api, JsonRpc } from 'eosjs';
+import { JsSignatureProvider } from 'eosjs/dist/eosjs-jssig.js';
+import { TextEncoder, TextDecoder } from 'util';
+import { createHash } from 'crypto';
+import { createInterface } from 'readline';
+import fetch from 'node-fetch';
+import 'dotenv/config';
+
+const privateKey = process.env.PRIVATE_KEY;
+if (!privateKey) {
+    console.error("Error: PRIVATE_KEY is not defined in the .env file");
+    process.exit(1);
+}
+
+// Sign without broadcasting, used by the benchmarks
+const dryRun = process.env.WAX_DRY_RUN === "1";
+
+const EXPIRE_SECONDS = 30;
+const TAPOS_REFRESH_MS = 5000;      // Background get_info interval
+const CODE_HASH_CHECK_MS = 60000;   // Background ABI invalidation interval
+const PREFETCH_CONTRACTS = ["atomicassets", "atomicmarket", "eosio.token"];
+const MAX_LAG_BLOCKS = 20;          // Endpoints further behind the freshest one are skipped
+
+// Comma-separated chain RPC nodes, the fastest up-to-date one is picked on every TAPOS refresh
+const CHAIN_ENDPOINTS = (process.env.CHAIN_ENDPOINTS || "https://wax.greymass.com")
+    .split(",")
+    .map((url) => url.trim().replace(/\/+$/, ""))
+    .filter(Boolean);
+
+// Comma-separated nodes every signed transaction is broadcast to in parallel, defaults to the chain endpoints
+const PUSH_ENDPOINTS = (process.env.PUSH_ENDPOINTS || CHAIN_ENDPOINTS.join(","))
+    .split(",")
+    .map((url) => url.trim().replace(/\/+$/, ""))
+    .filter(Boolean);
+
+const PUSH_TIMEOUT_MS = 10000;
+const TX_DUPLICATE_CODE = 3040008;  // tx_duplicate: another node already relayed it to this one
+
+// Count every RPC call so the savings from caching can be reported
+const rpcCalls = {};
+function countingFetch(url, options) {
+    const path = new URL(url).pathname;
+    rpcCalls[path] = (rpcCalls[path] || 0) + 1;
+    return fetch(url, options);
+}
+
+const signatureProvider = new JsSignatureProvider([privateKey]);
+const rpc = new JsonRpc(CHAIN_ENDPOINTS[0], { fetch: countingFetch });
+
+const api = new Api({
+    rpc,
+    signatureProvider,
+    textDecoder: new TextDecoder(),
+    textEncoder: new TextEncoder(),
+});
+
+
+// ---------------- Chain state cache ----------------------
+
+// TAPOS references the last irreversible block from the latest get_info.
+// It stays valid for ~65k blocks, so a background refresh keeps transact() free of network calls.
+let tapos = null;
+let requiredKeys = null;
+const codeHashes = new Map();
+const stats = { transactions: 0, rpc_saved: 0 };
+const pushStats = { first_accepted: {}, duplicates: {}, failures: {} };  // endpoint -> count
+
+async function timedGetInfo(endpoint) {
+    const start = Date.now();
+    const response = await countingFetch(`${endpoint}/v1/chain/get_info`, { method: "POST", body: "{}" });
+
+    if (!response.ok) {
+        throw new Error(`get_info failed on ${endpoint}: ${response.status}`);
+    }
+
+    return { endpoint, info: await response.json(), latency: Date.now() - start };
+}
+
+async function refreshTapos() {
+    // Ask every endpoint at once and route the signer's RPC to the fastest one that isn't lagging
+    const results = (await Promise.allSettled(CHAIN_ENDPOINTS.map(timedGetInfo)))
+        .filter((result) => result.status === "fulfilled")
+        .map((result) => result.value);
+
+    if (!results.length) {
+        throw new Error("No chain endpoint reachable");
+    }
+
+    const freshest = Math.max(...results.map(({ info }) => info.head_block_num));
+    const best = results
+        .filter(({ info }) => freshest - info.head_block_num <= MAX_LAG_BLOCKS)
+        .sort((a, b) => a.latency - b.latency)[0];
+
+    rpc.endpoint = best.endpoint;
+    const info = best.info;
+    api.chainId = info.chain_id;
+
+    tapos = {
+        ref_block_num: info.last_irreversible_block_num & 0xffff,
+        ref_block_prefix: Buffer.from(info.last_irreversible_block_id, "hex").readUInt32LE(8),
+        head_block_time: Date.parse(info.head_block_time + "Z"),
+        fetched_at: Date.now(),
+    };
+}
+
+function transactionHeader() {
+    // Expiration from chain time, advanced by local time elapsed since the last refresh
+    const now = tapos.head_block_time + (Date.now() - tapos.fetched_at);
+    const expiration = new Date(now + EXPIRE_SECONDS * 1000).toISOString().slice(0, 19);
+
+    return {
+        expiration,
+        ref_block_num: tapos.ref_block_num,
+        ref_block_prefix: tapos.ref_block_prefix,
+    };
+}
+
+async function fetchCodeHash(account) {
+    const response = await rpc.fetch("/v1/chain/get_code_hash", { account_name: account });
+    return response.code_hash;
+}
+
+async function loadContract(account, reload = false) {
+    codeHashes.set(account, await fetchCodeHash(account));
+    await api.getContract(account, reload);
+}
+
+async function checkCodeHashes() {
+    // Drop a cached ABI only when the contract's code has actually changed
+    for (const [account, cachedHash] of codeHashes) {
+        const codeHash = await fetchCodeHash(account);
+
+        if (codeHash !== cachedHash) {
+            console.error(`Code hash changed for ${account}, reloading ABI`);
+            await loadContract(account, true);
+        }
+    }
+}
+
+function runEvery(fn, ms) {
+    setInterval(() => fn().catch((error) => console.error(`Background refresh failed: ${error.message}`)), ms).unref();
+}
+
+async function warmUp() {
+    await refreshTapos();
+    requiredKeys = await signatureProvider.getAvailableKeys();
+    await Promise.all(PREFETCH_CONTRACTS.map((account) => loadContract(account)));
+}
+
+// Warm up immediately, retry on the next transaction if the network was unavailable
+let ready = warmUp();
+ready.catch((error) => console.error(`Warm up failed: ${error.message}`));
+
+async function ensureReady() {
+    try {
+        await ready;
+    } catch (error) {
+        ready = warmUp();
+        await ready;
+    }
+}
+
+runEvery(refreshTapos, TAPOS_REFRESH_MS);
+runEvery(checkCodeHashes, CODE_HASH_CHECK_MS);
+
+
+// ---------------- Broadcast ----------------------
+
+function countPush(counts, endpoint) {
+    counts[endpoint] = (counts[endpoint] || 0) + 1;
+}
+
+function isDuplicate(json) {
+    const error = (json && json.error) || {};
+    return error.code === TX_DUPLICATE_CODE || error.name === "tx_duplicate";
+}
+
+async function pushTo(endpoint, body) {
+    const response = await countingFetch(`${endpoint}/v1/chain/push_transaction`, {
+        method: "POST",
+        body,
+        signal: AbortSignal.timeout(PUSH_TIMEOUT_MS),
+    });
+    const json = await response.json();
+
+    if (response.ok) {
+        return { endpoint, json, duplicate: false };
+    }
+
+    if (isDuplicate(json)) {
+        return { endpoint, json, duplicate: true };
+    }
+
+    const error = new Error(`push_transaction failed on ${endpoint}: ${response.status}`);
+    error.json = json;
+    throw error;
+}
+
+function broadcast(signed) {
+    // Resolves with the first node to accept the transaction, a duplicate error counts as accepted.
+    // Rejects with the first node's error only when every node refused it.
+    const body = JSON.stringify({
+        signatures: signed.signatures,
+        compression: 0,
+        packed_context_free_data: signed.serializedContextFreeData ? Buffer.from(signed.serializedContextFreeData).toString("hex") : "",
+        packed_trx: Buffer.from(signed.serializedTransaction).toString("hex"),
+    });
+
+    return new Promise((resolve, reject) => {
+        let remaining = PUSH_ENDPOINTS.length;
+        let settled = false;
+        const errors = [];
+
+        for (const endpoint of PUSH_ENDPOINTS) {
+            pushTo(endpoint, body)
+                .then((outcome) => {
+                    if (outcome.duplicate) {
+                        countPush(pushStats.duplicates, endpoint);
+                    }
+
+                    if (!settled) {
+                        settled = true;
+                        countPush(pushStats.first_accepted, endpoint);
+                        resolve(outcome);
+                    }
+                })
+                .catch((error) => {
+                    countPush(pushStats.failures, endpoint);
+                    errors.push(error);
+                })
+                .finally(() => {
+                    if (--remaining === 0 && !settled) {
+                        settled = true;
+                        reject(errors[0]);
+                    }
+                });
+        }
+    });
+}
+
+
+// ---------------- Requests ----------------------
+
+function reply(message) {
+    process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+
+async function transact(actions, onSigned = () => {}) {
+    await ensureReady();
+
+    // Without the caches eosjs makes get_info, get_block, get_required_keys and one ABI call per contract
+    const contracts = [...new Set(actions.map((action) => action.account))];
+    const uncached = contracts.filter((account) => !api.cachedAbis.has(account));
+    await Promise.all(uncached.map((account) => loadContract(account)));
+    const rpcSaved = 3 + contracts.length - uncached.length;
+
+    // Sign once, the packed transaction is broadcast to every push node below
+    const signed = await api.transact(
+        { ...transactionHeader(), actions: actions },
+        {
+            broadcast: false,
+            requiredKeys,
+        }
+    );
+
+    // The transaction ID is the hash of the packed transaction, whichever node accepts it
+    const txId = createHash("sha256").update(Buffer.from(signed.serializedTransaction)).digest("hex");
+    onSigned(txId);
+
+    if (dryRun) {
+        stats.transactions++;
+        stats.rpc_saved += rpcSaved;
+        return { tx_id: txId, rpc_saved: rpcSaved };
+    }
+
+    const accepted = await broadcast(signed);
+
+    stats.transactions++;
+    stats.rpc_saved += rpcSaved;
+
+    // Duplicate responses carry no receipt or block
+    const processed = (!accepted.duplicate && accepted.json.processed) || {};
+    const receipt = processed.receipt || {};
+
+    return {
+        tx_id: txId,
+        rpc_saved: rpcSaved,
+        endpoint: accepted.endpoint,
+        block_num: processed.block_num,
+        cpu_usage_us: receipt.cpu_usage_us,
+        net_usage_words: receipt.net_usage_words,
+    };
+}
+
+
+async function handleLine(line) {
+    if (!line.trim()) {
+        return;
+    }
+
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (error) {
+        reply({ id: null, error: { message: `Invalid request: ${error.message}` } });
+        return;
+    }
+
+    const { id, op = "transact" } = request;
+
+    try {
+        if (op === "ping") {
+            reply({ id, result: "pong" });
+        } else if (op === "stats") {
+            reply({ id, result: { ...stats, rpc_calls: rpcCalls, endpoint: rpc.endpoint, push: pushStats } });
+        } else if (op === "transact") {
+            reply({ id, result: await transact(request.actions, (txId) => reply({ id, signed: { tx_id: txId } })) });
+        } else {
+            throw new Error(`Unknown op: ${op}`);
+        }
+    } catch (error) {
+        reply({ id, error: error.json || { message: error.message } });
+    }
+}
+
+
+// Exit once stdin closes and every in-flight request has been answered
+let inFlight = 0;
+let closing = false;
+
+const lines = createInterface({ input: process.stdin });
+
+lines.on("line", async (line) => {
+    inFlight++;
+    await handleLine(line);
+    inFlight--;
+
+    if (closing && inFlight === 0) {
+        process.exit(0);
+    }
+});
+
+lines.on("close", () => {
+    closing = true;
+    if (inFlight === 0) {
+        process.exit(0);
+    }
+});
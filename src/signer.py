@@ -0,0 +1,274 @@
+import atexit
+import itertools
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+SIGNER_JS_PATH = os.path.join(script_dir, "signer.js")
+TRANSFER_JS_PATH = os.path.join(script_dir, "transfer.js")
+
+REQUEST_TIMEOUT_SECONDS = 60
+
+
+class OutcomeUnknownError(Exception):
+    """
+    The signer didn't answer in time. A transaction may still be broadcast and land,
+    so it must be checked before it is sent again, not retried like a failure.
+
+    Attributes:
+        request_id (int): The signer request.
+        tx_id (str): The transaction ID if it was signed, None otherwise.
+        handle (TransactionHandle): Set by WaxTransaction when tx_id is known, wait on it to learn the outcome.
+    """
+
+    def __init__(self, request_id, tx_id=None):
+        super().__init__(f"No response from the signer to request {request_id}, transaction {tx_id or 'not signed yet'}")
+        self.request_id = request_id
+        self.tx_id = tx_id
+        self.handle = None
+
+
+class SignerClient:
+    """
+    Client for the long-lived signer.js process.
+
+    Requests are written to the process as JSON lines and matched to responses by id,
+    so any number of threads can have transactions in flight at the same time.
+    The process is started on first use and restarted if it exits.
+    """
+
+    def __init__(self, command=None, timeout=REQUEST_TIMEOUT_SECONDS):
+        self.command = command or ["node", "--no-warnings", SIGNER_JS_PATH]
+        self.timeout = timeout
+
+        self._process = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stderr = deque(maxlen=20)
+
+
+    def start(self):
+        """Start the signer process if it is not already running."""
+
+        with self._lock:
+            self._ensure_process()
+
+
+    def _ensure_process(self):
+        """Start the process and its reader threads. Caller must hold self._lock."""
+
+        if self._process is not None and self._process.poll() is None:
+            return self._process
+
+        process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+        )
+        self._process = process
+
+        threading.Thread(target=self._read_stdout, args=(process,), daemon=True).start()
+        threading.Thread(target=self._read_stderr, args=(process,), daemon=True).start()
+
+        return process
+
+
+    def _read_stdout(self, process):
+        """Resolve pending futures as responses arrive."""
+
+        for line in process.stdout:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+
+            if "signed" in message:
+                # Progress, the response follows. Kept so a timeout can name the transaction
+                with self._lock:
+                    future = self._pending.get(message.get("id"))
+                if future is not None:
+                    future.tx_id = message["signed"].get("tx_id")
+                continue
+
+            with self._lock:
+                future = self._pending.pop(message.get("id"), None)
+
+            if future is None:
+                continue
+
+            if "error" in message:
+                future.set_exception(RuntimeError(f"JavaScript error: {json.dumps(message['error'])}"))
+            else:
+                future.set_result(message.get("result"))
+
+        # Process exited, fail everything still waiting on it
+        with self._lock:
+            if self._process is process:
+                pending, self._pending = self._pending, {}
+            else:
+                pending = {}
+
+        stderr = " ".join(self._stderr).strip()
+        for future in pending.values():
+            future.set_exception(RuntimeError(f"Signer exited: {stderr or 'no output'}"))
+
+
+    def _read_stderr(self, process):
+        for line in process.stderr:
+            self._stderr.append(line.strip())
+
+
+    def request(self, op, **payload):
+        """
+        Send a request to the signer without waiting for the response.
+
+        Returns:
+            Future: Resolves to the "result" field of the response. Its request_id attribute
+                    identifies the request, see wait.
+        """
+
+        future = Future()
+        future.tx_id = None  # Reported by the signer once it has signed
+
+        with self._lock:
+            process = self._ensure_process()
+            request_id = future.request_id = next(self._ids)
+            self._pending[request_id] = future
+
+            try:
+                process.stdin.write(json.dumps({"id": request_id, "op": op, **payload}) + "\n")
+                process.stdin.flush()
+            except OSError as e:
+                self._pending.pop(request_id, None)
+                future.set_exception(RuntimeError(f"Signer unavailable: {e}"))
+
+        return future
+
+
+    def wait(self, future, timeout=None):
+        """
+        Block until a request's response arrives.
+        On timeout the request is forgotten, so a late response is dropped instead of resolving a future nobody waits on.
+
+        Raises:
+            OutcomeUnknownError: No response in time, with the transaction ID if it was signed.
+        """
+
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._pending.pop(future.request_id, None)
+            future.cancel()
+            raise OutcomeUnknownError(future.request_id, future.tx_id) from None
+
+
+    def send_transaction(self, actions, timeout=None):
+        """Sign and push a transaction, blocking until the signer responds."""
+
+        return self.wait(self.request("transact", actions=actions), timeout)
+
+
+    def ping(self, timeout=None):
+        return self.wait(self.request("ping"), timeout)
+
+
+    def stats(self, timeout=None):
+        """
+        Cumulative caching statistics from the signer.
+
+        Returns:
+            dict: "transactions", "rpc_saved" (RPC calls avoided by the ABI/TAPOS caches),
+                  "rpc_calls" (calls actually made, by path) and "push" ("first_accepted",
+                  "duplicates" and "failures" counts per push endpoint).
+        """
+
+        return self.wait(self.request("stats"), timeout)
+
+
+    def close(self):
+        """Close stdin so the signer exits after answering in-flight requests."""
+
+        with self._lock:
+            process, self._process = self._process, None
+
+        if process is None:
+            return
+
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+
+
+_signer = None
+_signer_lock = threading.Lock()
+
+
+def get_signer():
+    """Return the process-wide SignerClient, creating it on first use."""
+
+    global _signer
+
+    with _signer_lock:
+        if _signer is None:
+            _signer = SignerClient()
+            atexit.register(_signer.close)
+
+    return _signer
+
+
+def set_signer(signer):
+    """
+    Replace the process-wide SignerClient, e.g. with one running benchmarks/fake_signer.py.
+    The previous client is closed.
+    """
+
+    global _signer
+
+    with _signer_lock:
+        previous, _signer = _signer, signer
+
+    if previous is not None and previous is not signer:
+        previous.close()
+
+
+def send_via_subprocess(actions):
+    """
+    Sign and push a transaction by spawning transfer.js once.
+    Kept as the baseline for the signer latency benchmark.
+
+    Returns:
+        str: Transaction ID.
+    """
+
+    # Unique file per call so concurrent callers cannot overwrite each other's actions
+    fd, actions_path = tempfile.mkstemp(prefix="actions_", suffix=".json", dir=script_dir)
+
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(actions, f, indent=4)
+
+        result = subprocess.run(
+            ["node", "--no-warnings", TRANSFER_JS_PATH, actions_path],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+    finally:
+        os.remove(actions_path)
+
+    if result.returncode != 0:
+        raise RuntimeError(f"JavaScript error: {result.stderr.strip()}")
+
+    return result.stdout.strip()
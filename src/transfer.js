@@ -1,10 +1,12 @@
-// Loads key from .env file -- Pushes transactions from actions.json file -- Returns txid
+// Loads key from .env file -- Pushes transactions from actions.json (or the file given as the first argument) -- Returns txid
+// One-shot fallback for signer.js, kept for the latency benchmark
 
 import { Api, JsonRpc } from 'eosjs';
 import { JsSignatureProvider } from 'eosjs/dist/eosjs-jssig.js';
 import { TextEncoder, TextDecoder } from 'util';
 import fetch from 'node-fetch';
 import fs from "fs";
+import { createHash } from "crypto";
 import { dirname } from "path";
 import { fileURLToPath } from "url";
 import 'dotenv/config';
@@ -15,8 +17,13 @@ if (!privateKey) {
     process.exit(1);
 }
 
+// Sign without broadcasting, used by the benchmarks
+const dryRun = process.env.WAX_DRY_RUN === "1";
+
 const signatureProvider = new JsSignatureProvider([privateKey]);
-const rpc = new JsonRpc('https://wax.greymass.com', { fetch });
+// First of the comma-separated CHAIN_ENDPOINTS, signer.js picks between them by latency
+const endpoint = (process.env.CHAIN_ENDPOINTS || "https://wax.greymass.com").split(",")[0].trim();
+const rpc = new JsonRpc(endpoint, { fetch });
 
 const api = new Api({
     rpc,
@@ -32,7 +39,7 @@ const __dirname = dirname(__filename);
 
 async function transferTokens() {
     try {
-        const actionsJsonPath = `${__dirname}/actions.json`;
+        const actionsJsonPath = process.argv[2] || `${__dirname}/actions.json`;
 
         if (!fs.existsSync(actionsJsonPath)) {
             throw new Error("actions.json file not found");
@@ -46,9 +53,16 @@ async function transferTokens() {
             {
                 blocksBehind: 3,
                 expireSeconds: 30,
+                broadcast: !dryRun,
             }
         );
-        
+
+        if (dryRun) {
+            const serialized = Buffer.from(result.serializedTransaction);
+            console.log(createHash("sha256").update(serialized).digest("hex"));
+            return;
+        }
+
         console.log(result.transaction_id);
 
     } catch (error) {
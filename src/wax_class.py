@@ -1,66 +1,171 @@
 import json
-import subprocess
-import os
-from src.api_session import api_get
+import time
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from src import metrics
+from src.api_session import api_get, api_get_async
+from src.wax_tools import batch_ids, pack_transfer_actions, cpu_estimator, PAGE_SIZE
+from src.signer import get_signer, OutcomeUnknownError
+from src.resource_scheduler import get_resource_scheduler
+from src.confirmations import TransactionHandle
+from src.records import decode_asset, decode_assets, decode_sales, decode_transfers
+
+
+_UNSET = object()  # WaxNFT field not loaded yet
+
+_lookup_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="nft-lookups")
+
+
+def _concurrently(*calls):
+    """Run calls on the lookup threads, in the caller's api_priority context. Returns their results in order."""
+
+    futures = [_lookup_executor.submit(contextvars.copy_context().run, call) for call in calls]
+    return [future.result() for future in futures]
+
+
+def _lazy(field, load):
+    """WaxNFT property for field, loaded on first read by the method named load."""
+
+    slot = f"_{field}"
+
+    def get(self):
+        value = getattr(self, slot)
+
+        if value is _UNSET:
+            getattr(self, load)()
+            self._settle(field)
+            value = getattr(self, slot)
+
+        return value
+
+    def set(self, value):
+        setattr(self, slot, value)
+
+    return property(get, set)
 
 
 class WaxTransaction:
     """Base class to handle Wax transactions."""
 
+    __slots__ = ("last_receipt",)
+
     def _send_transaction(self, actions):
-        """Run transfer.js to execute transaction"""
+        """
+        Sign and push actions through the shared signer.js process.
 
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        actions_path = os.path.join(script_dir, "actions.json")
-        transfer_js_path = os.path.join(script_dir, "transfer.js")
+        Returns:
+            TransactionHandle: The transaction ID, which can be waited on until the transaction is included, irreversible or indexed.
 
-        # Write actions to actions.json
-        try:
-            with open(actions_path, "w") as f:
-                json.dump(actions, f, indent=4)
+        Raises:
+            OutcomeUnknownError: The signer didn't answer in time, its handle (if signed) tells whether the transaction landed.
+            RuntimeError: The transaction failed.
+        """
+
+        action = metrics.action_label(actions)
 
-            # Call transfer.js
-            result = subprocess.run(
-                ["node", "--no-warnings", transfer_js_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
+        # Opt-in CPU/NET pacing, waits here until the account can afford the transaction
+        scheduler = get_resource_scheduler()
+        ticket = scheduler.acquire(actions) if scheduler is not None else None
 
-            if result.returncode != 0:
-                raise RuntimeError(f"JavaScript error: {result.stderr.strip()}")
-            print("tx_id:", result.stdout.strip())
+        start = time.monotonic()
 
+        try:
+            result = get_signer().send_transaction(actions)
+        except OutcomeUnknownError as e:
+            # May still land, raised as is so callers check the handle instead of sending again
+            metrics.transactions.inc(action=action, result="unknown")
+            if ticket is not None:
+                scheduler.release(ticket, receipt={})
+            if e.tx_id is not None:
+                e.handle = TransactionHandle(e.tx_id)
+            raise
         except Exception as e:
+            metrics.transactions.inc(action=action, result="error")
+            if ticket is not None:
+                scheduler.release(ticket, error=e)
             raise RuntimeError(f"Error during transaction: {e}")
+
+        finally:
+            metrics.transaction_seconds.observe(time.monotonic() - start, action=action)
+
+        metrics.transactions.inc(action=action, result="ok")
+        if ticket is not None:
+            scheduler.release(ticket, receipt=result)
+
+        self.last_receipt = result  # tx_id plus cpu_usage_us / net_usage_words when broadcast
+        print("tx_id:", result["tx_id"])
+        return TransactionHandle(result["tx_id"], result.get("block_num"))
         
 
 class WaxNFT(WaxTransaction):
-    """Handle NFT-specific operations."""
+    """
+    Handle NFT-specific operations.
+
+    Fields not given to the constructor are loaded on first read, together with the other
+    fields of the same lookup: reading template_name costs one asset request and no sale
+    or transfer lookups. fetch_details loads everything in one concurrent round trip.
+    """
+
+    # No per-instance __dict__, large inventories can hold many of these (see AssetTable for more)
+    __slots__ = ("nft_id", "_owner", "_template_id", "_template_name", "_price", "_sale_id", "_previous_owner")
 
     def __init__(self, nft_id, owner=None, template_id=None, template_name=None, price=None, sale_id=None):
         self.nft_id = str(nft_id)
-        self.owner = owner
-        self.template_id = template_id
-        self.template_name = template_name
-        self.price = price
-        self.sale_id = sale_id
-        self.previous_owner = None
+        self._owner = _UNSET if owner is None else owner
+        self._template_id = _UNSET if template_id is None else template_id
+        self._template_name = _UNSET if template_name is None else template_name
+        self._price = _UNSET if price is None else price
+        self._sale_id = _UNSET if sale_id is None else sale_id
+        self._previous_owner = _UNSET
+
+
+    owner = _lazy("owner", "_load_asset")
+    template_id = _lazy("template_id", "_load_asset")
+    template_name = _lazy("template_name", "_load_asset")
+    price = _lazy("price", "fetch_market_details")
+    sale_id = _lazy("sale_id", "fetch_market_details")
+    previous_owner = _lazy("previous_owner", "_load_previous_owner")
 
     
     "--------------UTILITY METHODS--------------"
 
+
+    def peek(self, field):
+        """Value of field if it is loaded, None otherwise. Never makes a request."""
+
+        value = getattr(self, f"_{field}")
+        return None if value is _UNSET else value
+
+
+    def _settle(self, *fields):
+        """Mark fields a lookup didn't fill as loaded, so reading them doesn't look them up again."""
+
+        for field in fields:
+            if getattr(self, f"_{field}") is _UNSET:
+                setattr(self, f"_{field}", None)
+
     
     def fetch_owner(self):
         """Ensure that self.owner is fetched and available."""
 
-        path = f"atomicassets/v1/assets/{self.nft_id}"
-        response = api_get(path)
+        response = api_get(self._asset_path())
+        return self._apply_owner(response)
+
+
+    async def fetch_owner_async(self):
+        """Async version of fetch_owner."""
+
+        response = await api_get_async(self._asset_path())
+        return self._apply_owner(response)
+
+
+    def _apply_owner(self, response):
 
         if response.status_code == 200:
-            data = response.json().get("data")
-            if data:
-                self.owner = data.get("owner")
+            record = decode_asset(response.content)
+            if record:
+                self.owner = record.owner
 
             else:
                 raise ValueError(f"NFT {self.nft_id} not found.")
@@ -69,88 +174,178 @@ class WaxNFT(WaxTransaction):
         
         return self.owner
 
+
+    def _asset_path(self):
+        return f"atomicassets/v1/assets/{self.nft_id}"
+
+
+    def _market_path(self):
+        return f"atomicmarket/v1/sales?asset_id={self.nft_id}&state=1"
+
+
+    def _transfer_path(self):
+        return f"atomicassets/v1/transfers?asset_id={self.nft_id}&limit=1"
+
     
     "--------------INFORMATION METHODS--------------"
 
 
     def fetch_details(self, callback=None):
-        """Fetch ALL the details of the NFT and update the object properties."""
+        """Fetch ALL the details of the NFT and update the object properties. The asset, sale and last transfer lookups run concurrently."""
 
-        path = f"atomicassets/v1/assets/{self.nft_id}"
-        response = api_get(path)
+        asset, market, transfer = _concurrently(
+            lambda: api_get(self._asset_path()),
+            lambda: api_get(self._market_path()),
+            lambda: api_get(self._transfer_path()),
+        )
+        self._apply_details(asset, market, transfer)
 
-        if response.status_code == 200:
-            data = response.json().get("data")
+        return self._report_details(callback)
 
-            if data:
-                self.owner = data.get("owner", self.owner)
-                self.template_id = data.get("template", {}).get("template_id", self.template_id)
-                self.template_name = data.get("template", {}).get("immutable_data", {}).get("name", self.template_name)
-                
-                self.fetch_market_details()
-                self.fetch_previous_owner()
 
-                details = {
-                    "owner": self.owner,
-                    "template_id": self.template_id,
-                    "template_name": self.template_name,
-                    "price": self.price,
-                    "sale_id": self.sale_id,
-                    "previous_owner": self.previous_owner,
-                }
-            
-                if callback:
-                    formatted_details = json.dumps(details, indent=4)
-                    callback(formatted_details)
+    async def fetch_details_async(self, callback=None):
+        """Async version of fetch_details."""
 
-                return details
+        asset, market, transfer = await asyncio.gather(
+            api_get_async(self._asset_path()),
+            api_get_async(self._market_path()),
+            api_get_async(self._transfer_path()),
+        )
+        self._apply_details(asset, market, transfer)
+
+        return self._report_details(callback)
+
+
+    def _apply_details(self, asset, market, transfer):
+
+        self._apply_asset(asset)
+
+        if self.owner is None:  # NFT burned
+            self.previous_owner = None
+        else:
+            self._apply_previous_owner(transfer)
+
+        # Last, a failed sales lookup raises once the other fields are in
+        self._apply_market(market)
+
+
+    def _load_asset(self):
+        self._apply_asset(api_get(self._asset_path()))
+
+
+    def _apply_asset(self, response):
+
+        if response.status_code == 200:
+            record = decode_asset(response.content)
+
+            if record:
+                self.owner = record.owner
+                self.template_id = record.template_id
+                self.template_name = record.template_name
 
             else:
                 raise ValueError(f"NFT {self.nft_id} not found.")
         else:
             raise ValueError(f"Failed to fetch details for NFT {self.nft_id}. HTTP Status: {response.status_code}")
+
+
+    def _report_details(self, callback):
+
+        details = {
+            "owner": self.owner,
+            "template_id": self.template_id,
+            "template_name": self.template_name,
+            "price": self.price,
+            "sale_id": self.sale_id,
+            "previous_owner": self.previous_owner,
+        }
+    
+        if callback:
+            formatted_details = json.dumps(details, indent=4)
+            callback(formatted_details)
+
+        return details
         
 
     def fetch_market_details(self):
-        """Fetch the sale price and sale ID for the NFT if it is listed on the marketplace."""
+        """Fetch the sale price and sale ID for the NFT if it is listed on the marketplace, both are None if it isn't or the lookup fails (ValueError)."""
 
-        path = f"atomicmarket/v1/sales?asset_id={self.nft_id}&state=1"
-        response = api_get(path)
+        response = api_get(self._market_path())
+        return self._apply_market(response)
 
-        if response.status_code == 200:
-            data = response.json().get("data")
 
-            if data:
-                sale = data[0]
-                price = sale.get("listing_price", None)
-                sale_id = sale.get("sale_id", None)
-                if price:
-                    price = float(price) / 10**8
+    async def fetch_market_details_async(self):
+        """Async version of fetch_market_details."""
+
+        response = await api_get_async(self._market_path())
+        return self._apply_market(response)
 
-                self.price = price
-                self.sale_id = sale_id
-                return {"price": price, "sale_id": sale_id}
+
+    def _apply_market(self, response):
+
+        if response.status_code != 200:
+            # Settled so a later read of either field doesn't request the sale again, fetch_market_details refreshes them
+            self.price = None
+            self.sale_id = None
+            raise ValueError(f"Failed to fetch sale for NFT {self.nft_id}. HTTP Status: {response.status_code}")
+
+        sales = decode_sales(response.content)
+
+        if sales:
+            self.price = sales[0].price
+            self.sale_id = sales[0].sale_id
+            return {"price": self.price, "sale_id": self.sale_id}
+
+        # Not listed
+        self.price = None
+        self.sale_id = None
 
         return {"price": None, "sale_id": None}
     
 
     def fetch_previous_owner(self):
-        """Fetch the previous owner of the NFT by inspecting the last transfer"""
+        """Fetch the previous owner of the NFT by inspecting the last transfer. The current owner is fetched alongside."""
+
+        asset, transfer = _concurrently(lambda: api_get(self._asset_path()), lambda: api_get(self._transfer_path()))
+        self._apply_owner(asset)
+
+        if self.owner is None:  # NFT burned
+            return None
+
+        return self._apply_previous_owner(transfer)
+
 
-        self.fetch_owner()
+    async def fetch_previous_owner_async(self):
+        """Async version of fetch_previous_owner."""
+
+        asset, transfer = await asyncio.gather(api_get_async(self._asset_path()), api_get_async(self._transfer_path()))
+        self._apply_owner(asset)
 
         if self.owner is None:  # NFT burned
             return None
 
-        path = f"atomicassets/v1/transfers?asset_id={self.nft_id}&limit=1"
-        response = api_get(path)
+        return self._apply_previous_owner(transfer)
+
+
+    def _load_previous_owner(self):
+
+        # The owner is needed to check the transfer against, fetch both at once unless it is already known
+        if self._owner is _UNSET:
+            self.fetch_previous_owner()
+        elif self._owner is None:  # NFT burned
+            self.previous_owner = None
+        else:
+            self._apply_previous_owner(api_get(self._transfer_path()))
+
+
+    def _apply_previous_owner(self, response):
 
         if response.status_code == 200:
-            data = response.json().get("data")
+            transfers = decode_transfers(response.content)
 
             # Ensure chain API is up to date by checking that the current owner is the recipient of the last transfer
-            if data and data[0].get("recipient_name") == self.owner:
-                self.previous_owner = data[0].get("sender_name")
+            if transfers and transfers[0].recipient_name == self.owner:
+                self.previous_owner = transfers[0].sender_name
 
                 return self.previous_owner
             
@@ -166,7 +361,7 @@ class WaxNFT(WaxTransaction):
     def transfer(self, recipient, memo=""):
         """Transfer the NFT to a new owner"""
 
-        if not self.owner:
+        if not self.peek("owner"):
             self.fetch_owner()
 
         action = {
@@ -180,15 +375,16 @@ class WaxNFT(WaxTransaction):
                 "memo": memo,
             },
         }
-        self._send_transaction([action])
+        handle = self._send_transaction([action])
         self.owner = recipient
         print(f"NFT {self.nft_id} transferred to {recipient}")
+        return handle
 
 
     def sell(self, price):
         """List the NFT for sale on the atomicmarket"""
 
-        if not self.owner:
+        if not self.peek("owner"):
             self.fetch_owner()
 
         action_createoffer = {
@@ -217,19 +413,20 @@ class WaxNFT(WaxTransaction):
             },
         }
 
-        self._send_transaction([action_announcesale, action_createoffer])
+        handle = self._send_transaction([action_announcesale, action_createoffer])
 
         self.price = price
         print(f"NFT {self.nft_id} listed for sale at {price} WAX")
+        return handle
 
     
     def cancel_sale(self):
         """Cancels the sale of the NFT"""
 
-        if not self.owner:
+        if not self.peek("owner"):
             self.fetch_owner()
 
-        if not self.sale_id:
+        if not self.peek("sale_id"):
             self.fetch_market_details()
         
         action = {
@@ -241,19 +438,21 @@ class WaxNFT(WaxTransaction):
             },
         }
 
-        self._send_transaction([action])
+        handle = self._send_transaction([action])
         self.price = None
         self.sale_id = None
         print(f"Sale {self.sale_id} cancelled")
+        return handle
 
 
     def update_offer(self, new_price):
         """Updates the price of the NFT if it is already on sale"""
 
-        if not self.owner:
+        if not self.peek("owner"):
             self.fetch_owner()
 
-        if self.sale_id is None or self.price is None:
+        # peek, reading the lazy fields would already look an unlisted NFT up once
+        if self.peek("sale_id") is None or self.peek("price") is None:
             self.fetch_market_details()
 
         old_price = self.price
@@ -293,16 +492,18 @@ class WaxNFT(WaxTransaction):
             },
         }
 
-        self._send_transaction([action_cancelsale, action_announcesale, action_createoffer])
+        handle = self._send_transaction([action_cancelsale, action_announcesale, action_createoffer])
         self.price = new_price
         self.sale_id = None
         print(f"Price updated from {old_price} WAX to {self.price} WAX")
+        return handle
 
 
     def buy(self, buyer):
         """Buys the NFT listed for sale"""
 
-        if self.sale_id is None or self.price is None:
+        # peek, reading the lazy fields would already look an unlisted NFT up once
+        if self.peek("sale_id") is None or self.peek("price") is None:
             self.fetch_market_details()
 
         action_assertsale = {
@@ -341,8 +542,156 @@ class WaxNFT(WaxTransaction):
             },
         }
         
-        self._send_transaction([action_assertsale, action_transfer, action_purchasesale])
+        handle = self._send_transaction([action_assertsale, action_transfer, action_purchasesale])
         print(f"NFT {self.nft_id} bought for {self.price} WAX")
+        return handle
+
+
+class WaxNFTCollection:
+    """
+    Load many NFTs at once with batched requests.
+
+    Fills the same fields as WaxNFT.fetch_details using comma-separated ID filters,
+    so N assets cost about 3 * N / 100 requests instead of 4 * N.
+    """
+
+    MAX_TRANSFER_PAGES = 10  # Per batch, stops heavily traded assets from paging through their whole history
+
+    def __init__(self, nft_ids):
+        self.nfts = {str(nft_id): WaxNFT(nft_id) for nft_id in nft_ids}
+
+
+    @classmethod
+    def from_nfts(cls, nfts):
+        """Wrap existing WaxNFT objects so they can be refreshed together."""
+
+        collection = cls([])
+        collection.nfts = {nft.nft_id: nft for nft in nfts}
+        return collection
+
+
+    def __iter__(self):
+        return iter(self.nfts.values())
+
+
+    def __len__(self):
+        return len(self.nfts)
+
+
+    def __getitem__(self, nft_id):
+        return self.nfts[str(nft_id)]
+
+
+    "--------------INFORMATION METHODS--------------"
+
+
+    def fetch_details(self, callback=None):
+        """Fetch ALL the details of every NFT and update the WaxNFT objects."""
+
+        self.fetch_assets()
+        self.fetch_market_details()
+        self.fetch_previous_owners()
+
+        details = {nft.nft_id: nft._report_details(None) for nft in self}
+
+        if callback:
+            formatted_details = json.dumps(details, indent=4)
+            callback(formatted_details)
+
+        return details
+
+
+    def fetch_assets(self):
+        """Fetch owner and template details. Burned or unknown assets are left unchanged."""
+
+        for batch in batch_ids(self.nfts, max_count=PAGE_SIZE):
+            params = {"ids": ",".join(batch), "limit": len(batch)}
+            response = api_get("atomicassets/v1/assets", params=params)
+
+            if response.status_code != 200:
+                raise ValueError(f"Failed to fetch assets. HTTP Status: {response.status_code}")
+
+            for record in decode_assets(response.content):
+                nft = self.nfts.get(record.asset_id)
+                if nft is None:
+                    continue
+
+                nft.owner = record.owner
+                nft.template_id = record.template_id
+                nft.template_name = record.template_name
+
+        # Not looked up one by one on a later read
+        for nft in self:
+            nft._settle("owner", "template_id", "template_name")
+
+
+    def fetch_market_details(self):
+        """Fetch the sale price and sale ID of every NFT listed on the marketplace, others are cleared."""
+
+        for nft in self:
+            nft.price = None
+            nft.sale_id = None
+
+        for batch in batch_ids(self.nfts, max_count=PAGE_SIZE):
+            params = {"asset_id": ",".join(batch), "state": "1", "limit": len(batch)}
+            response = api_get("atomicmarket/v1/sales", params=params)
+
+            if response.status_code != 200:
+                raise ValueError(f"Failed to fetch sales. HTTP Status: {response.status_code}")
+
+            for sale in decode_sales(response.content):
+                for asset in sale.assets:
+                    nft = self.nfts.get(asset.asset_id)
+                    if nft is not None:
+                        nft.price = sale.price
+                        nft.sale_id = sale.sale_id
+
+
+    def fetch_previous_owners(self):
+        """
+        Fetch the previous owner of every NFT from its last transfer.
+        Requires owners to be loaded, an NFT whose last transfer isn't to its current owner
+        (API lagging) keeps previous_owner as None.
+        """
+
+        for batch in batch_ids(self.nfts, max_count=PAGE_SIZE):
+            remaining = set(batch)
+            page = 1
+
+            while remaining and page <= self.MAX_TRANSFER_PAGES:
+                params = {
+                    "asset_id": ",".join(batch),
+                    "sort": "created",
+                    "order": "desc",
+                    "limit": PAGE_SIZE,
+                    "page": page,
+                }
+                response = api_get("atomicassets/v1/transfers", params=params)
+
+                if response.status_code != 200:
+                    raise ValueError(f"Failed to fetch transfers. HTTP Status: {response.status_code}")
+
+                transfers = decode_transfers(response.content)
+
+                # Newest first, so the first transfer seen for an asset is its last one
+                for transfer in transfers:
+                    for asset in transfer.assets:
+                        asset_id = asset.asset_id
+                        if asset_id not in remaining:
+                            continue
+
+                        remaining.discard(asset_id)
+                        nft = self.nfts[asset_id]
+                        if transfer.recipient_name == nft.peek("owner"):
+                            nft.previous_owner = transfer.sender_name
+
+                if len(transfers) < PAGE_SIZE:
+                    break
+
+                page += 1
+
+        for nft in self:
+            nft._settle("previous_owner")
 
 
 class WaxAccount(WaxTransaction):
@@ -361,8 +710,8 @@ class WaxAccount(WaxTransaction):
     def fetch_details(self, callback=None):
         """Fetch and display account information, update the object properties"""
 
-        url = f"https://api.waxsweden.org/v2/state/get_account?limit=1&account={self.account}"  # Requires different endpoint
-        response = api_get(url)
+        # Routed to the Hyperion pool (STATE_ENDPOINTS)
+        response = api_get("v2/state/get_account", params={"limit": "1", "account": self.account})
 
         if response.status_code == 200:
             data = response.json().get("account")
@@ -413,8 +762,9 @@ class WaxAccount(WaxTransaction):
             },
         }
 
-        self._send_transaction([action])
+        handle = self._send_transaction([action])
         print(f"{self.account} unstaked {cpu_amount} WAX of CPU and {net_amount} WAX of NET from {from_account}")
+        return handle
 
 
     def transfer_wax(self, recipient, amount, memo=""):
@@ -432,12 +782,24 @@ class WaxAccount(WaxTransaction):
             },
         }
 
-        self._send_transaction([action])
+        handle = self._send_transaction([action])
         print(f"{self.account} transferred {amount} WAX to {recipient}")
+        return handle
+
 
+    def bulk_transfer_nfts(self, recipient, nfts_list: list=None, memo=""):
+        """
+        Transfer single or multiple NFTs to a new owner.
 
-    def bulk_transfer_nfts(self, recipient, nfts_list: list, memo=""):
-        """Transfer single or multiple NFTs to a new owner"""
+        Pass a dict of recipient -> NFT list as recipient to transfer to many owners at once,
+        the transfers are packed into as few transactions as the size and CPU budgets allow.
+
+        Returns:
+            list: TransactionHandles of the transactions sent, one for a single recipient.
+        """
+
+        if isinstance(recipient, dict):
+            return self._bulk_transfer_packed(recipient, memo)
 
         action = {
             "account": "atomicassets",
@@ -451,5 +813,50 @@ class WaxAccount(WaxTransaction):
             },
         }
 
-        self._send_transaction([action])
-        print(f"{len(nfts_list)} NFTs transferred from {self.account} to {recipient}")
\ No newline at end of file
+        handle = self._send_transaction([action])
+        print(f"{len(nfts_list)} NFTs transferred from {self.account} to {recipient}")
+        return [handle]
+
+
+    def _bulk_transfer_packed(self, transfers, memo=""):
+
+        handles = []
+
+        for actions in pack_transfer_actions(self.account, transfers, memo):
+            assets = sum(len(action["data"]["asset_ids"]) for action in actions)
+
+            handles.append(self._send_transaction(actions))
+            cpu_estimator.observe(len(actions), assets, self.last_receipt.get("cpu_usage_us"))
+
+            print(f"{assets} NFTs transferred from {self.account} to {len(actions)} recipients")
+
+        return handles
+
+
+    def transfer_nfts_separately(self, recipient, nft_ids: list, memo=""):
+        """
+        Transfer NFTs with one transfer action each, all in a single transaction.
+        For contracts that handle one asset per transfer notification, e.g. pack openers.
+
+        Returns:
+            TransactionHandle: The transaction ID.
+        """
+
+        actions = [
+            {
+                "account": "atomicassets",
+                "name": "transfer",
+                "authorization": [{"actor": self.account, "permission": "active"}],
+                "data": {
+                    "from": self.account,
+                    "to": recipient,
+                    "asset_ids": [nft_id],
+                    "memo": memo,
+                },
+            }
+            for nft_id in nft_ids
+        ]
+
+        tx_id = self._send_transaction(actions)
+        print(f"{len(nft_ids)} NFTs transferred from {self.account} to {recipient}")
+        return tx_id
\ No newline at end of file
@@ -1,46 +1,79 @@
-from src.api_session import api_get
+import asyncio
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 
+from src.api_session import api_get, api_get_async
+from src.records import AssetRecord, decode_assets, decode_sales, decode_transfers
 
-def get_collection_by_templates(account: str, template_ids: list, display: str="none"):
+PAGE_SIZE = 100  # Maximum page size accepted by the AtomicAssets API
+MAX_FILTER_LENGTH = 1500  # Characters per comma-separated filter, keeps URLs well under common 2k limits
+
+def get_collection_by_templates(account: str, template_ids: list, display: str="none", inventory=None):
     """
     Fetch NFT asset IDs for a given account and list of template IDs.
+    Templates are queried together in as few requests as the URL length allows.
 
     Parameters:
         account (str): The WAX account name.
         template_ids (list): A list of template IDs to query.
         display (str): Output mode - "full" (detailed list), "count" (total count), "none" (silent).
+        inventory (InventoryIndex): Answer from this local index of the account's assets instead of the API.
 
     Returns:
         list: Collected NFT asset IDs or empty list if none found.
     """
 
+    grouped = get_collection_grouped_by_templates(account, template_ids, inventory=inventory)
+    combined_nft_ids = [nft_id for nft_ids in grouped.values() for nft_id in nft_ids]
+
+    return _display_collection(combined_nft_ids, display)
+
+
+def get_collection_grouped_by_templates(account: str, template_ids: list, inventory=None):
+    """
+    Fetch NFT asset IDs for a given account and list of template IDs, split per template.
+
+    Returns:
+        dict: Template ID -> list of asset IDs, in the order the templates were given.
+    """
+
     if isinstance(template_ids, (int, str)):
         template_ids = [template_ids]
 
-    combined_nft_ids = []
+    if inventory is not None:
+        return _inventory_for(inventory, account).grouped_by_templates(template_ids)
 
-    for template_id in template_ids:
-        
-        path = f"atomicassets/v1/assets?owner={account}&template_id={template_id}&page=1&limit=100&order=desc"
-        response = api_get(path)
-        data = response.json()
+    grouped = {str(template_id): [] for template_id in template_ids}
 
-        nft_ids = [nft["asset_id"] for nft in data["data"]]
-        combined_nft_ids.extend(nft_ids)
+    for asset in iter_collection_by_templates(account, template_ids, records=True):
+        grouped.setdefault(asset.template_id, []).append(asset.asset_id)
 
-    if not combined_nft_ids:
-        return []
+    return grouped
 
-    if display == "full":
-        print("\n".join(f"{i+1}) {nft}" for i, nft in enumerate(combined_nft_ids)), flush=True)  # Single print call is more efficient here
-    
-    if display == "count":
-        print(f"{len(combined_nft_ids)} NFTs found", flush=True)
-    
-    return combined_nft_ids
 
+async def get_collection_by_templates_async(account: str, template_ids: list, display: str="none"):
+    """Async version of get_collection_by_templates, template batches are queried concurrently."""
+
+    if isinstance(template_ids, (int, str)):
+        template_ids = [template_ids]
+
+    async def collect(batch):
+        params = {"owner": account, "template_id": ",".join(batch)}
+        return [asset async for asset in iter_assets_async(params, records=True)]
 
-def get_collection_by_category(account, schema_name, display="none"):
+    results = await asyncio.gather(*(collect(batch) for batch in batch_ids(template_ids)))
+
+    grouped = {str(template_id): [] for template_id in template_ids}
+    for assets in results:
+        for asset in assets:
+            grouped.setdefault(asset.template_id, []).append(asset.asset_id)
+
+    combined_nft_ids = [nft_id for nft_ids in grouped.values() for nft_id in nft_ids]
+    return _display_collection(combined_nft_ids, display)
+
+
+def get_collection_by_category(account, schema_name, display="none", inventory=None):
     """
     Fetch NFT asset IDs for a given account and schema name.
 
@@ -48,71 +81,371 @@ def get_collection_by_category(account, schema_name, display="none"):
         account (str): The WAX account name.
         schema_name (str): The schema name to query.
         display (str): Output mode - "full" (detailed list), "count" (total count), "none" (silent).
+        inventory (InventoryIndex): Answer from this local index of the account's assets instead of the API.
 
     Returns:
         list: Collected NFT asset IDs or empty list if none found.
     """
 
-    combined_nft_ids = []
-        
-    path = f"atomicassets/v1/assets?owner={account}&schema_name={schema_name}&page=1&limit=100&order=desc"
-    response = api_get(path)
-    data = response.json()
+    if inventory is not None:
+        return _display_collection(_inventory_for(inventory, account).asset_ids(schema_name=schema_name), display)
+
+    return _display_collection(list(iter_collection_by_category(account, schema_name)), display)
+
+
+async def get_collection_by_category_async(account, schema_name, display="none"):
+    """Async version of get_collection_by_category."""
+
+    params = {"owner": account, "schema_name": schema_name}
+    return _display_collection([nft_id async for nft_id in iter_assets_async(params)], display)
+
+
+def iter_collection_by_templates(account: str, template_ids: list, records: bool=False, prefetch: bool=True):
+    """
+    Stream every asset owned by account for the given templates, one page in memory at a time.
+
+    Parameters:
+        account (str): The WAX account name.
+        template_ids (list): A list of template IDs to query.
+        records (bool): Yield AssetRecord tuples instead of asset ID strings.
+        prefetch (bool): Fetch the next page in the background while the current one is consumed.
+
+    Yields:
+        str | AssetRecord: One item per asset, newest asset IDs first within each request batch.
+    """
+
+    if isinstance(template_ids, (int, str)):
+        template_ids = [template_ids]
+
+    for batch in batch_ids(template_ids):
+        params = {"owner": account, "template_id": ",".join(batch)}
+        yield from iter_assets(params, records=records, prefetch=prefetch)
+
+
+def iter_collection_by_category(account: str, schema_name: str, records: bool=False, prefetch: bool=True):
+    """Stream every asset owned by account in the given schema, see iter_collection_by_templates."""
+
+    params = {"owner": account, "schema_name": schema_name}
+    yield from iter_assets(params, records=records, prefetch=prefetch)
+
+
+def iter_assets(params: dict, records: bool=False, prefetch: bool=True, page_size: int=PAGE_SIZE):
+    """
+    Stream atomicassets/v1/assets results for any filter using keyset pagination on asset_id.
+
+    Each page asks for assets below the last ID seen (upper_bound is exclusive),
+    so results stay consistent while assets move and deep pages cost the same as the first.
+
+    Parameters:
+        params (dict): AtomicAssets filters, e.g. {"owner": ..., "template_id": ...}.
+        records (bool): Yield AssetRecord tuples instead of asset ID strings.
+        prefetch (bool): Fetch the next page on a worker thread while the current one is consumed.
+        page_size (int): Assets per request, at most PAGE_SIZE.
+    """
+
+    def fetch(upper_bound):
+        page_params = {**params, "sort": "asset_id", "order": "desc", "limit": page_size}
+        if upper_bound is not None:
+            page_params["upper_bound"] = upper_bound
+
+        response = api_get("atomicassets/v1/assets", params=page_params)
+        if response.status_code != 200:
+            raise ValueError(f"Failed to fetch assets. HTTP Status: {response.status_code}")
+
+        return decode_assets(response.content)
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    try:
+        page = fetch(None)
+
+        while page:
+            next_page = None
+            if len(page) == page_size:
+                upper_bound = page[-1].asset_id
+                if executor:
+                    # Copy the context so the worker keeps the caller's api_priority
+                    next_page = executor.submit(contextvars.copy_context().run, fetch, upper_bound)
+
+            yield from _page_items(page, records)
+
+            if len(page) < page_size:
+                break
+
+            page = next_page.result() if next_page else fetch(upper_bound)
+
+    finally:
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def iter_assets_async(params: dict, records: bool=False, prefetch: bool=True, page_size: int=PAGE_SIZE):
+    """Async version of iter_assets, prefetching runs as a task on the same event loop."""
+
+    async def fetch(upper_bound):
+        page_params = {**params, "sort": "asset_id", "order": "desc", "limit": page_size}
+        if upper_bound is not None:
+            page_params["upper_bound"] = upper_bound
+
+        response = await api_get_async("atomicassets/v1/assets", params=page_params)
+        if response.status_code != 200:
+            raise ValueError(f"Failed to fetch assets. HTTP Status: {response.status_code}")
+
+        return decode_assets(response.content)
+
+    page = await fetch(None)
+    next_page = None
+
+    try:
+        while page:
+            if len(page) == page_size:
+                upper_bound = page[-1].asset_id
+                if prefetch:
+                    next_page = asyncio.ensure_future(fetch(upper_bound))
+
+            for item in _page_items(page, records):
+                yield item
+
+            if len(page) < page_size:
+                break
+
+            page = await next_page if next_page else await fetch(upper_bound)
+            next_page = None
+
+    finally:
+        if next_page is not None:
+            next_page.cancel()
+
+
+def batch_ids(ids, max_length=MAX_FILTER_LENGTH, max_count=None):
+    """
+    Split IDs into batches for comma-separated API filters.
 
-    nft_ids = [nft["asset_id"] for nft in data["data"]]
-    combined_nft_ids.extend(nft_ids)
+    Parameters:
+        ids (iterable): IDs to split.
+        max_length (int): Maximum characters in the joined filter.
+        max_count (int): Maximum IDs per batch, e.g. PAGE_SIZE when every ID returns a row.
+
+    Returns:
+        list: Lists of ID strings.
+    """
+
+    batches = []
+    batch = []
+    length = 0
+
+    for item in map(str, ids):
+        if batch and (length + len(item) + 1 > max_length or len(batch) == max_count):
+            batches.append(batch)
+            batch = []
+            length = 0
+
+        batch.append(item)
+        length += len(item) + 1
+
+    if batch:
+        batches.append(batch)
+
+    return batches
+
+
+def _page_items(page, records):
+    """Asset IDs of a decoded page, or the AssetRecords themselves."""
+
+    if not records:
+        return [record.asset_id for record in page]
+
+    return page
 
-    if not combined_nft_ids:
+
+def _inventory_for(inventory, account):
+    """Check that a local inventory index covers the account being queried."""
+
+    if inventory.account != account:
+        raise ValueError(f"Inventory index is for {inventory.account}, not {account}")
+
+    return inventory
+
+
+def _display_collection(nft_ids, display):
+    """Print the collected IDs according to the display mode and return them."""
+
+    if not nft_ids:
         return []
 
     if display == "full":
-        print("\n".join(f"{i+1}) {nft}" for i, nft in enumerate(combined_nft_ids)), flush=True)
+        print("\n".join(f"{i+1}) {nft}" for i, nft in enumerate(nft_ids)), flush=True)  # Single print call is more efficient here
     
     if display == "count":
-        print(f"{len(combined_nft_ids)} NFTs found", flush=True)
+        print(f"{len(nft_ids)} NFTs found", flush=True)
     
-    return combined_nft_ids
+    return nft_ids
 
 
-def get_lowest_listing(template_id):
+def get_lowest_listing(template_id, hedge: bool=False):
     """
     Fetches the lowest-priced listing for the given template.
+    With hedge, a slow endpoint is raced by a second one (see api_get).
 
     Returns:
         dict: Collected NFT info or empty dict if none found.
     """
     
-    path = f"atomicmarket/v2/sales"
+    response = api_get("atomicmarket/v2/sales", params=_listings_params(template_id, 1), hedge=hedge)
+    return _parse_lowest_listing(decode_sales(response.content))
+
+
+async def get_lowest_listing_async(template_id, hedge: bool=False):
+    """Async version of get_lowest_listing."""
+
+    response = await api_get_async("atomicmarket/v2/sales", params=_listings_params(template_id, 1), hedge=hedge)
+    return _parse_lowest_listing(decode_sales(response.content))
+
+
+def get_template_listings(template_id, limit: int=PAGE_SIZE):
+    """
+    Fetches the cheapest listings for the given template in a single request.
+
+    Returns:
+        list: Dicts with "asset_id", "sale_id", "price", "seller" and "template_id", cheapest first.
+    """
+
+    response = api_get("atomicmarket/v2/sales", params=_listings_params(template_id, limit))
+    return _parse_listings(decode_sales(response.content))
+
+
+async def get_template_listings_async(template_id, limit: int=PAGE_SIZE):
+    """Async version of get_template_listings."""
+
+    response = await api_get_async("atomicmarket/v2/sales", params=_listings_params(template_id, limit))
+    return _parse_listings(decode_sales(response.content))
+
+
+def get_recent_listings(template_ids: list, limit: int=PAGE_SIZE, hedge: bool=False, page: int=1):
+    """
+    Fetches the most recently created listings across several templates in a single request.
+    With hedge, a slow endpoint is raced by a second one (see api_get). Older listings are on later pages.
+
+    Returns:
+        list: Dicts with "asset_id", "sale_id", "price", "seller" and "template_id", newest first.
+    """
+
+    if isinstance(template_ids, (int, str)):
+        template_ids = [template_ids]
+
     params = {
+        "template_id": ",".join(map(str, template_ids)),
+        "limit": str(limit),
+        "order": "desc",
+        "page": str(page),
+        "sort": "created",
+        "state": "1",
+        "symbol": "WAX"
+    }
+    response = api_get("atomicmarket/v2/sales", params=params, hedge=hedge)
+    return _parse_listings(decode_sales(response.content))
+
+
+def _listings_params(template_id, limit):
+    return {
         "template_id": template_id,
-        "limit": "1",
+        "limit": str(limit),
         "order": "asc",
         "page": "1",
         "sort": "price",
         "state": "1",
         "symbol": "WAX"
     }
-    response = api_get(path, params=params)
-    data = response.json().get("data")
 
-    if data:
-        asset_id = data[0].get("assets")[0].get("asset_id")
-        sale_id = data[0].get("sale_id")
-        price = data[0].get("price").get("amount")
-        price = float(price) / 10**8
 
-    else:
+def _parse_listings(sales):
+
+    return [
+        {
+            "asset_id": sale.assets[0].asset_id,
+            "sale_id": sale.sale_id,
+            "price": sale.price,
+            "seller": sale.seller,
+            "template_id": sale.assets[0].template_id,
+        }
+        for sale in sales
+    ]
+
+
+def _parse_lowest_listing(sales):
+
+    listings = _parse_listings(sales)
+
+    if not listings:
         return {}
 
     details = {
-        "asset_id": asset_id,
-        "sale_id": sale_id,
-        "price": price
+        "asset_id": listings[0]["asset_id"],
+        "sale_id": listings[0]["sale_id"],
+        "price": listings[0]["price"]
     }
 
     return details
 
 
+def build_sender_index(account: str, after: int=None, asset_ids: list=None, max_pages: int=50, sender: str=None, from_block: int=None):
+    """
+    Map assets received by an account to the sender of their most recent incoming transfer,
+    paging through the account's incoming transfers newest first.
+
+    Parameters:
+        account (str): The receiving WAX account.
+        after (int): Only consider transfers after this time, in milliseconds since the epoch.
+        asset_ids (list): Stop paging once all of these assets have been seen.
+        max_pages (int): Upper bound on requests, PAGE_SIZE transfers each.
+        sender (str): Only consider transfers from this account.
+        from_block (int): Only consider transfers in this block or later. The API filters by time only,
+            pass after as well to keep the paging short.
+
+    Returns:
+        dict: Asset ID -> sender account name.
+    """
+
+    index = {}
+    wanted = set(map(str, asset_ids)) if asset_ids is not None else None
+
+    for page in range(1, max_pages + 1):
+        params = {
+            "recipient": account,
+            "sort": "created",
+            "order": "desc",
+            "limit": PAGE_SIZE,
+            "page": page,
+        }
+        if after is not None:
+            params["after"] = after
+        if sender is not None:
+            params["sender"] = sender
+
+        response = api_get("atomicassets/v1/transfers", params=params)
+        if response.status_code != 200:
+            raise ValueError(f"Failed to fetch transfers. HTTP Status: {response.status_code}")
+
+        transfers = decode_transfers(response.content)
+
+        for transfer in transfers:
+            if from_block is not None and (transfer.created_at_block or 0) < from_block:
+                continue
+
+            for asset in transfer.assets:
+                asset_id = asset.asset_id
+                if asset_id not in index:  # Newest first, keep the most recent sender
+                    index[asset_id] = transfer.sender_name
+
+                    if wanted is not None:
+                        wanted.discard(asset_id)
+
+        if len(transfers) < PAGE_SIZE or wanted == set():
+            break
+
+    return index
+
+
 def group_transactions(nft_ids: list, recepients: list, group_size: int = 50):
     """
     Groups NFTs by recipient into sub-lists of a specified maximum size.
@@ -143,4 +476,165 @@ def group_transactions(nft_ids: list, recepients: list, group_size: int = 50):
         else:
             transactions[recepient].append([nft])
     
-    return transactions
\ No newline at end of file
+    return transactions
+
+
+def group_by_recipient(nft_ids: list, recepients: list):
+    """
+    Collect NFTs per recipient without splitting them, for pack_transfer_actions.
+
+    Returns:
+        dict: Recipient address -> list of NFT IDs.
+    """
+
+    if len(nft_ids) != len(recepients):
+        raise ValueError("nft_ids and recepients lists must be of equal length")
+
+    transfers = {}
+    for nft, recepient in zip(nft_ids, recepients):
+        transfers.setdefault(recepient, []).append(nft)
+
+    return transfers
+
+
+# ---------------- Transaction packing ----------------------
+
+MAX_TRANSACTION_BYTES = 32 * 1024    # Well inside the chain's max_transaction_net_usage
+MAX_TRANSACTION_CPU_US = 20_000      # Keep each transaction well inside the per-transaction and staked CPU limits
+TRANSACTION_OVERHEAD_BYTES = 100     # Header, extensions and one signature
+TRANSFER_ACTION_BYTES = 61           # account, name, one authorization, from, to and length prefixes
+
+
+class CpuEstimator:
+    """
+    Estimates the CPU cost of atomicassets transfer transactions.
+
+    Starts from a linear model (base + per action + per asset) and scales it
+    by the ratio of observed to predicted CPU from past receipts.
+    """
+
+    def __init__(self, base_us=150, per_action_us=100, per_asset_us=40, smoothing=0.2):
+        self.base_us = base_us
+        self.per_action_us = per_action_us
+        self.per_asset_us = per_asset_us
+        self.smoothing = smoothing
+        self.scale = 1.0
+
+        self._lock = threading.Lock()
+
+
+    def _model(self, actions, assets):
+        return self.base_us + self.per_action_us * actions + self.per_asset_us * assets
+
+
+    def estimate(self, actions, assets):
+        return self._model(actions, assets) * self.scale
+
+
+    def observe(self, actions, assets, cpu_usage_us):
+        """Update the scale from a receipt's cpu_usage_us."""
+
+        if not cpu_usage_us:
+            return
+
+        with self._lock:
+            ratio = cpu_usage_us / self._model(actions, assets)
+            self.scale += self.smoothing * (ratio - self.scale)
+
+
+cpu_estimator = CpuEstimator()
+
+
+def _varint_size(value):
+    size = 1
+    while value >= 0x80:
+        value >>= 7
+        size += 1
+    return size
+
+
+def _transfer_size(assets, memo_bytes):
+    """Serialized size of an atomicassets::transfer action with the given number of assets."""
+
+    return TRANSFER_ACTION_BYTES + _varint_size(assets) + 8 * assets + _varint_size(memo_bytes) + memo_bytes
+
+
+def pack_transfer_actions(
+    sender: str,
+    transfers: dict,
+    memo: str="",
+    max_bytes: int=MAX_TRANSACTION_BYTES,
+    max_cpu_us: int=MAX_TRANSACTION_CPU_US,
+    estimator: CpuEstimator=cpu_estimator,
+):
+    """
+    Bin-pack NFT transfers to many recipients into as few transactions as possible.
+
+    Each recipient gets one transfer action, split across transactions only when it alone
+    would exceed the size or CPU budget. Actions are placed largest first into the first
+    transaction with room (first-fit decreasing).
+
+    Parameters:
+        sender (str): The account sending the NFTs.
+        transfers (dict): Recipient -> list of asset IDs.
+        memo (str): Memo for every transfer action.
+        max_bytes (int): Serialized size budget per transaction.
+        max_cpu_us (int): Estimated CPU budget per transaction in microseconds.
+        estimator (CpuEstimator): CPU model, learns from receipts via observe().
+
+    Returns:
+        list: Transactions, each a list of atomicassets transfer actions.
+    """
+
+    memo_bytes = len(memo.encode())
+
+    def fits(actions, assets, size):
+        return size <= max_bytes and estimator.estimate(actions, assets) <= max_cpu_us
+
+    # Split recipients whose transfer can't fit in an empty transaction on its own
+    items = []
+    for recipient, asset_ids in transfers.items():
+        asset_ids = list(asset_ids)
+        while asset_ids:
+            count = len(asset_ids)
+            while count > 1 and not fits(1, count, TRANSACTION_OVERHEAD_BYTES + _transfer_size(count, memo_bytes)):
+                count //= 2
+
+            items.append((recipient, asset_ids[:count]))
+            asset_ids = asset_ids[count:]
+
+    items.sort(key=lambda item: len(item[1]), reverse=True)
+
+    bins = []  # [actions, assets, size, items]
+    for recipient, asset_ids in items:
+        size = _transfer_size(len(asset_ids), memo_bytes)
+
+        for tx in bins:
+            if fits(tx[0] + 1, tx[1] + len(asset_ids), tx[2] + size):
+                break
+        else:
+            tx = [0, 0, TRANSACTION_OVERHEAD_BYTES, []]
+            bins.append(tx)
+
+        tx[0] += 1
+        tx[1] += len(asset_ids)
+        tx[2] += size
+        tx[3].append((recipient, asset_ids))
+
+    return [
+        [
+            {
+                "account": "atomicassets",
+                "name": "transfer",
+                "authorization": [{"actor": sender, "permission": "active"}],
+                "data": {
+                    "from": sender,
+                    "to": recipient,
+                    "asset_ids": asset_ids,
+                    "memo": memo,
+                },
+            }
+            for recipient, asset_ids in tx[3]
+        ]
+        for tx in bins
+    ]